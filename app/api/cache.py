@@ -0,0 +1,155 @@
+"""
+HTTP cache for the transaction read endpoints.
+
+A response is stored under its route and parameters together with the data
+versions (see `app.db.cache.DataVersions`) of everything it was built from:
+the months of its transactions and the price histories of their items. It is
+served again for as long as none of those versions has moved. Every response
+carries an ``ETag``; a matching ``If-None-Match`` gets a bodyless 304.
+"""
+import hashlib
+import json
+from datetime import date
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.timing import serializing
+from app.core.config import settings
+from app.db.cache import data_versions
+from app.models import Transaction
+
+# What a cached endpoint renders: the response content, and the data version
+# keys it depends on.
+Rendered = Tuple[Any, Iterable[str]]
+
+
+class CachedResponse(NamedTuple):
+    keys: Tuple[str, ...]
+    versions: List[int]
+    etag: str
+    body: bytes
+
+
+def transaction_keys(transactions: Iterable[Transaction]) -> List[str]:
+    """Data version keys of the given transactions as `schemas.Transaction`."""
+    keys = set()
+    for transaction in transactions:
+        keys.add(data_versions.month(transaction.date))
+        keys.update(data_versions.item(item.id) for item in transaction.items)
+    return list(keys)
+
+
+def plain_transaction_keys(transactions: Iterable[Dict[str, Any]]) -> List[str]:
+    """`transaction_keys` of the plain dicts of `CRUDTransaction.*_plain`."""
+    keys = set()
+    for transaction in transactions:
+        keys.add(data_versions.month(transaction["date"]))
+        keys.update(data_versions.item(item["id"]) for item in transaction["items"])
+    return list(keys)
+
+
+def month_keys(year: int, month: int, keys: Iterable[str]) -> List[str]:
+    """
+    ``keys`` of the transactions read for a month, plus the month's own: a
+    month that came back empty must still be invalidated by what is added to
+    it later.
+    """
+    return [data_versions.month(date(year, month, 1)), *keys]
+
+
+def _cache_key(request: Request, params: Dict[str, Any]) -> str:
+    route = request.scope["route"]
+    return json.dumps(
+        [request.method, route.path, params], sort_keys=True, default=str
+    )
+
+
+def _etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _respond(request: Request, etag: str, body: bytes) -> Response:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+def _body(content: Any) -> bytes:
+    if isinstance(content, bytes):
+        return content
+    # Rendered exactly as FastAPI renders a response_model.
+    with serializing():
+        return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def _lookup(key: str) -> Optional[CachedResponse]:
+    cached = data_versions.backend.get(key)
+    if cached is not None and data_versions.current(cached.keys) == cached.versions:
+        return cached
+    return None
+
+
+def _store(key: str, sequence: int, rendered: Rendered) -> CachedResponse:
+    content, keys = rendered
+    body = _body(content)
+    keys = tuple(sorted({data_versions.ALL, *keys}))
+    cached = CachedResponse(keys, data_versions.current(keys), _etag(body), body)
+    # A write committed while rendering may or may not be in the body; such a
+    # response is served but not kept.
+    if data_versions.sequence() == sequence:
+        data_versions.backend.set(key, cached)
+    return cached
+
+
+def cached_json(
+    request: Request, params: Dict[str, Any], render: Callable[[], Rendered]
+) -> Response:
+    """
+    Serve ``render()``'s content as JSON through the cache: a model, or the
+    already encoded body. ``params`` are the endpoint's parameters; exceptions
+    raised by ``render`` are not cached.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        body = _body(render()[0])
+        return _respond(request, _etag(body), body)
+
+    key = _cache_key(request, params)
+    cached = _lookup(key)
+    if cached is None:
+        sequence = data_versions.sequence()
+        cached = _store(key, sequence, render())
+    return _respond(request, cached.etag, cached.body)
+
+
+async def acached_json(
+    request: Request,
+    params: Dict[str, Any],
+    render: Callable[[], Awaitable[Rendered]],
+) -> Response:
+    """`cached_json` for an async ``render``."""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        body = _body((await render())[0])
+        return _respond(request, _etag(body), body)
+
+    key = _cache_key(request, params)
+    cached = _lookup(key)
+    if cached is None:
+        sequence = data_versions.sequence()
+        cached = _store(key, sequence, await render())
+    return _respond(request, cached.etag, cached.body)
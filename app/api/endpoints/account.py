@@ -0,0 +1,47 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app import schemas, crud
+from app.api.deps import get_db
+from app.api.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/", response_model=schemas.Account)
+def create_account(account: schemas.AccountCreate, db: Session = Depends(get_db)):
+    return crud.account.create(db, obj_in=account)
+
+
+@router.get("/{account_id}/balance", response_model=schemas.AccountBalance)
+def read_account_balance(
+    account_id: int, at: Optional[date] = None, db: Session = Depends(get_db)
+):
+    """The balance at the end of `at`, or the current one."""
+    account = crud.account.get(db, account_id)
+    if account is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return schemas.AccountBalance(
+        account_id=account_id, at=at, balance=crud.account.balance(db, account, at)
+    )
+
+
+@router.put(
+    "/{account_id}/payment_methods/{payment_method_id}", response_model=schemas.Account
+)
+def attach_payment_method(
+    account_id: int, payment_method_id: int, db: Session = Depends(get_db)
+):
+    """
+    Post the transactions paid with the payment method to this account,
+    including those already recorded.
+    """
+    account = crud.account.get(db, account_id)
+    if account is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    crud.account.attach_payment_method(db, account_id, payment_method_id)
+    db.refresh(account)
+    return account
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from app import schemas
+from app.api.timing import TimedRoute
+from app.core.ingest import ingest_buffer
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/ingest", status_code=202, response_model=schemas.IngestTicket)
+async def ingest_transaction(
+    request: Request, response: Response, transaction: schemas.TransactionCreate
+):
+    """
+    Queue a transaction to be written later, together with others (see
+    app.core.ingest). The ticket answered follows what becomes of it.
+    """
+    ticket = await ingest_buffer.submit(transaction)
+    response.headers["Location"] = str(
+        request.url_for("read_ingest_ticket", ticket=ticket.ticket)
+    )
+    return ticket
+
+
+@router.get("/ingest/{ticket}", response_model=schemas.IngestTicket)
+def read_ingest_ticket(ticket: str):
+    found = ingest_buffer.get(ticket)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return found
@@ -0,0 +1,81 @@
+import os
+import uuid
+from contextlib import suppress
+from typing import BinaryIO, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.api.deps import get_db
+from app.api.timing import TimedRoute
+from app.core.config import settings
+from app.core.jobs import job_runner
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def _open_upload() -> Tuple[str, BinaryIO]:
+    os.makedirs(settings.JOB_DATA_DIR, exist_ok=True)
+    path = os.path.join(settings.JOB_DATA_DIR, f"{uuid.uuid4().hex}.csv")
+    return path, open(path, "wb")
+
+
+def _remove(path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def _accepted(request: Request, response: Response, job) -> schemas.Job:
+    job_runner.wake()
+    response.headers["Location"] = str(request.url_for("read_job", id=job.id))
+    return job
+
+
+@router.post("/import", status_code=202, response_model=schemas.Job)
+async def create_import_job(
+    request: Request, response: Response, db: Session = Depends(get_db)
+):
+    """
+    Import a CSV statement sent as the raw request body, as
+    `POST /transaction/import` does but in the background, by chunks (see
+    app.core.jobs). Follow it with `GET /jobs/{id}`.
+    """
+    path, file = await run_in_threadpool(_open_upload)
+    try:
+        with file:
+            # Written from the threadpool: a large statement must not hold up
+            # the event loop.
+            async for chunk in request.stream():
+                await run_in_threadpool(file.write, chunk)
+    except BaseException:
+        await run_in_threadpool(_remove, path)
+        raise
+    job = await run_in_threadpool(crud.job.create, db, "import", {"path": path})
+    return _accepted(request, response, job)
+
+
+@router.post("/purge", status_code=202, response_model=schemas.Job)
+def create_purge_job(
+    request: Request,
+    response: Response,
+    target: schemas.PurgeJobCreate,
+    db: Session = Depends(get_db),
+):
+    """
+    Delete the transactions dated `start_date` through `end_date` as
+    `POST /transaction/remove_range` does, but in the background, a month at
+    a time.
+    """
+    job = crud.job.create(db, "purge", jsonable_encoder(target))
+    return _accepted(request, response, job)
+
+
+@router.get("/{id}", response_model=schemas.Job)
+def read_job(id: int, db: Session = Depends(get_db)):
+    job = crud.job.get(db, id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter
+
+from app.api.timing import TimedRoute, request_metrics
+from app.core.ingest import ingest_buffer
+from app.db import session
+from app.db.cache import data_versions, dimension_cache, price_series_cache
+from app.db.pool import async_pool_metrics, sync_pool_metrics
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/pool")
+def read_pool_metrics() -> Dict[str, Any]:
+    metrics = {"sync": sync_pool_metrics.snapshot(session.engine.pool)}
+    if session.async_engine is not None:
+        metrics["async"] = async_pool_metrics.snapshot(
+            session.async_engine.sync_engine.pool
+        )
+    return metrics
+
+
+@router.get("/dimension_cache")
+def read_dimension_cache_metrics() -> Dict[str, Any]:
+    return dimension_cache.stats()
+
+
+@router.get("/price_series_cache")
+def read_price_series_cache_metrics() -> Dict[str, Any]:
+    return price_series_cache.stats()
+
+
+@router.get("/response_cache")
+def read_response_cache_metrics() -> Dict[str, Any]:
+    return data_versions.backend.stats()
+
+
+@router.get("/ingest")
+def read_ingest_metrics() -> Dict[str, Any]:
+    return ingest_buffer.stats()
+
+
+@router.get("/requests")
+def read_request_metrics() -> List[Dict[str, Any]]:
+    return request_metrics.snapshot()
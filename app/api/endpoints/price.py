@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import Depends, APIRouter, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import schemas, crud
+from app.api.deps import get_db
+from app.api.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def _end(to_date: Optional[date]) -> Optional[date]:
+    return None if to_date is None else to_date + timedelta(days=1)
+
+
+@router.get("/series", response_model=List[schemas.ItemPriceSeries])
+def read_price_series(
+    item_id: List[int] = Query([]),
+    category: Optional[str] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    window: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+):
+    """
+    Daily price series of the items listed with `item_id` and/or of every item
+    in `category`, dated from `from` through `to`, inclusive. With `window`,
+    each series also carries its trailing mean over that many points.
+    """
+    if not item_id and category is None:
+        raise HTTPException(status_code=400, detail="Give item_id or category.")
+    return crud.price_history.get_series(
+        db,
+        item_ids=item_id,
+        category=category,
+        start_date=from_date,
+        end_date=_end(to_date),
+        window=window,
+    )
+
+
+@router.get("/index", response_model=List[schemas.CategoryPriceIndex])
+def read_price_index(
+    category: Optional[str] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """Monthly price index per category, the first month being 100."""
+    return crud.price_history.get_category_index(
+        db, category=category, start_date=from_date, end_date=_end(to_date)
+    )
@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from fastapi import Depends, APIRouter
+from sqlalchemy.orm import Session
+
+from app import schemas, crud
+from app.api.deps import get_db
+from app.api.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/monthly", response_model=List[schemas.MonthlySpend])
+def read_monthly_spend(
+    year: int, month: int, family: Optional[str] = None, db: Session = Depends(get_db)
+):
+    return crud.monthly_spend.get_month(db, year=year, month=month, family=family)
+
+
+@router.get("/monthly/categories", response_model=List[schemas.CategorySpend])
+def read_monthly_spend_by_category(
+    year: int, month: int, family: Optional[str] = None, db: Session = Depends(get_db)
+):
+    return crud.monthly_spend.get_month_by_category(
+        db, year=year, month=month, family=family
+    )
@@ -0,0 +1,44 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.api.deps import get_db
+from app.api.timing import TimedRoute
+from app.models import Category, Item, TransactionTarget
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/items", response_model=List[schemas.NameMatch])
+def search_items(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Items named like `q`: those starting with it first, then (from three
+    characters on) those containing it or similar to it.
+    """
+    return crud.search.names(db, Item, q, limit)
+
+
+@router.get("/transaction_targets", response_model=List[schemas.NameMatch])
+def search_transaction_targets(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Transaction targets named like `q`, as for `/search/items`."""
+    return crud.search.names(db, TransactionTarget, q, limit)
+
+
+@router.get("/categories", response_model=List[schemas.NameMatch])
+def search_categories(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Categories named like `q`, as for `/search/items`."""
+    return crud.search.names(db, Category, q, limit)
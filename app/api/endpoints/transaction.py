@@ -1,49 +1,230 @@
-from typing import List, Type
+import tempfile
+from datetime import date, timedelta
+from typing import List, Optional, Tuple, Type
 
-from fastapi import Depends, HTTPException, APIRouter
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import parse_obj_as
 from sqlalchemy.orm import Session
 
 from app import schemas, crud
+from app.api.cache import (
+    cached_json,
+    month_keys,
+    plain_transaction_keys,
+    transaction_keys,
+)
 from app.api.deps import get_db
+from app.api.export import csv_lines, ndjson_lines
+from app.api.fast_json import dumps_transaction, dumps_transactions
+from app.api.idempotency import idempotent
+from app.api.pagination import keyset_after, set_next_cursor
+from app.api.timing import TimedRoute
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.utils.case import month_range
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+# Read endpoints live on their own router so they can be swapped for the
+# AsyncSession versions in transaction_async when DB_ASYNC is set.
+read_router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/", response_model=schemas.Transaction)
 def create_transaction(
+    request: Request,
     transaction: schemas.TransactionCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     db: Session = Depends(get_db),
 ):
-    return crud.transaction.create(db=db, obj_in=transaction)
+    """
+    Create a transaction. A retry sent with the `Idempotency-Key` of the
+    first attempt gets the first attempt's response (see app.api.idempotency).
+    """
+    return idempotent(
+        db,
+        request,
+        idempotency_key,
+        transaction,
+        lambda: schemas.Transaction.from_orm(
+            crud.transaction.create(db=db, obj_in=transaction, commit=False)
+        ),
+    )
 
 
-@router.get("/", response_model=List[schemas.Transaction])
-def read_transactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    transactions = crud.transaction.get_multi(db, skip=skip, limit=limit)
+@router.post("/bulk", response_model=List[schemas.TransactionBulkResult])
+def create_transactions(
+    request: Request,
+    transactions: List[schemas.TransactionCreate],
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    """As `POST /transaction/`, for many transactions at once."""
+    return idempotent(
+        db,
+        request,
+        idempotency_key,
+        transactions,
+        lambda: crud.transaction.create_bulk(
+            db=db, objs_in=transactions, commit=False
+        ),
+    )
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_transactions(request: Request, db: Session = Depends(get_db)):
+    """
+    Import a CSV statement sent as the raw request body (`text/csv`). See
+    `CRUDStatement.import_csv` for the columns.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as file:
+        async for chunk in request.stream():
+            file.write(chunk)
+        file.seek(0)
+        return await run_in_threadpool(crud.statement.import_csv, db, file)
+
+
+# Registered on `router`, which is mounted before read_router, so that it is
+# matched ahead of /{transaction_id}.
+@router.get("/export")
+def export_transactions(
+    from_date: date = Query(alias="from"),
+    to_date: date = Query(alias="to"),
+    format: schemas.ExportFormat = schemas.ExportFormat.ndjson,
+    db: Session = Depends(get_db),
+):
+    """Stream the transactions dated from `from` through `to`, inclusive."""
+    batches = crud.transaction.stream_range(
+        db, from_date, to_date + timedelta(days=1)
+    )
+    if format == schemas.ExportFormat.csv:
+        return StreamingResponse(csv_lines(batches), media_type="text/csv")
+    return StreamingResponse(ndjson_lines(batches), media_type="application/x-ndjson")
+
+
+@read_router.get("/", response_model=List[schemas.Transaction])
+def read_transactions(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[date, int]] = Depends(keyset_after),
+    db: Session = Depends(get_db),
+):
+    if settings.FAST_JSON_RESPONSES:
+        transactions = crud.transaction.get_multi_plain(
+            db, skip=skip, limit=limit, after=after
+        )
+        response = Response(
+            dumps_transactions(transactions), media_type="application/json"
+        )
+        set_next_cursor(response, transactions, limit)
+        return response
+
+    transactions = crud.transaction.get_multi(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, transactions, limit)
     return transactions
 
 
-@router.get("/{transaction_id}", response_model=schemas.Transaction)
-def read_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    transaction = crud.transaction.get(db=db, id=transaction_id)
-    if transaction is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    return transaction
+@read_router.get("/{transaction_id}", response_model=schemas.Transaction)
+def read_transaction(
+    request: Request, transaction_id: int, db: Session = Depends(get_db)
+):
+    def render():
+        transaction = crud.transaction.get(db=db, id=transaction_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return schemas.Transaction.from_orm(transaction), transaction_keys(
+            [transaction]
+        )
+
+    def render_plain():
+        transaction = crud.transaction.get_plain(db, transaction_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return dumps_transaction(transaction), plain_transaction_keys([transaction])
+
+    return cached_json(
+        request,
+        {"transaction_id": transaction_id},
+        render_plain if settings.FAST_JSON_RESPONSES else render,
+    )
+
+
+def sweep_orphans(start_date: date, end_date: date) -> None:
+    db = SessionLocal()
+    try:
+        crud.transaction.sweep_orphans(db, start_date, end_date)
+    finally:
+        db.close()
 
 
 @router.post("/remove_month", response_model=List[int])
 def delete_transaction(
-    target: schemas.TransactionDelete, db: Session = Depends(get_db)
+    target: schemas.TransactionDelete,
+    background_tasks: BackgroundTasks,
+    sweep: bool = False,
+    db: Session = Depends(get_db),
 ):
+    """
+    Delete a month of transactions. With `sweep`, items and prices left
+    unreferenced are garbage-collected in the background afterwards.
+    """
     result = crud.transaction.delete_month(db, target)
+    if sweep and result:
+        background_tasks.add_task(
+            sweep_orphans, *month_range(target.year, target.month)
+        )
 
     return result
 
 
-@router.post("/retrive_month", response_model=List[schemas.Transaction])
-def delete_transaction(
-    target: schemas.TransactionDelete, db: Session = Depends(get_db)
+@router.post("/remove_range", response_model=List[int])
+def delete_transaction_range(
+    target: schemas.TransactionRangeDelete,
+    background_tasks: BackgroundTasks,
+    sweep: bool = False,
+    db: Session = Depends(get_db),
 ):
-    result = crud.transaction.retrive_month(db, target)
+    """
+    As `/remove_month`, for the transactions dated `start_date` through
+    `end_date`, inclusive.
+    """
+    end_date = target.end_date + timedelta(days=1)
+    result = crud.transaction.delete_range(
+        db, target.start_date, end_date, family=target.family
+    )
+    if sweep and result:
+        background_tasks.add_task(sweep_orphans, target.start_date, end_date)
 
     return result
+
+
+@read_router.post("/retrive_month", response_model=List[schemas.Transaction])
+def delete_transaction(
+    request: Request, target: schemas.TransactionDelete, db: Session = Depends(get_db)
+):
+    def render():
+        result = crud.transaction.retrive_month(db, target)
+        return parse_obj_as(List[schemas.Transaction], result), month_keys(
+            target.year, target.month, transaction_keys(result)
+        )
+
+    def render_plain():
+        result = crud.transaction.retrive_month_plain(db, target)
+        return dumps_transactions(result), month_keys(
+            target.year, target.month, plain_transaction_keys(result)
+        )
+
+    return cached_json(
+        request, target.dict(), render_plain if settings.FAST_JSON_RESPONSES else render
+    )
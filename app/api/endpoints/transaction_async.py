@@ -0,0 +1,94 @@
+from datetime import date
+from typing import List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, APIRouter, Request, Response
+from pydantic import parse_obj_as
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas, crud
+from app.api.cache import (
+    acached_json,
+    month_keys,
+    plain_transaction_keys,
+    transaction_keys,
+)
+from app.api.deps import get_async_db
+from app.api.fast_json import dumps_transaction, dumps_transactions
+from app.api.pagination import keyset_after, set_next_cursor
+from app.api.timing import TimedRoute
+from app.core.config import settings
+
+read_router = APIRouter(route_class=TimedRoute)
+
+
+@read_router.get("/", response_model=List[schemas.Transaction])
+async def read_transactions(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[date, int]] = Depends(keyset_after),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if settings.FAST_JSON_RESPONSES:
+        transactions = await crud.transaction.aget_multi_plain(
+            db, skip=skip, limit=limit, after=after
+        )
+        response = Response(
+            dumps_transactions(transactions), media_type="application/json"
+        )
+        set_next_cursor(response, transactions, limit)
+        return response
+
+    transactions = await crud.transaction.aget_multi(
+        db, skip=skip, limit=limit, after=after
+    )
+    set_next_cursor(response, transactions, limit)
+    return transactions
+
+
+@read_router.get("/{transaction_id}", response_model=schemas.Transaction)
+async def read_transaction(
+    request: Request, transaction_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    async def render():
+        transaction = await crud.transaction.aget(db=db, id=transaction_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return schemas.Transaction.from_orm(transaction), transaction_keys(
+            [transaction]
+        )
+
+    async def render_plain():
+        transaction = await crud.transaction.aget_plain(db, transaction_id)
+        if transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return dumps_transaction(transaction), plain_transaction_keys([transaction])
+
+    return await acached_json(
+        request,
+        {"transaction_id": transaction_id},
+        render_plain if settings.FAST_JSON_RESPONSES else render,
+    )
+
+
+@read_router.post("/retrive_month", response_model=List[schemas.Transaction])
+async def retrive_month(
+    request: Request,
+    target: schemas.TransactionDelete,
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def render():
+        result = await crud.transaction.aretrive_month(db, target)
+        return parse_obj_as(List[schemas.Transaction], result), month_keys(
+            target.year, target.month, transaction_keys(result)
+        )
+
+    async def render_plain():
+        result = await crud.transaction.aretrive_month_plain(db, target)
+        return dumps_transactions(result), month_keys(
+            target.year, target.month, plain_transaction_keys(result)
+        )
+
+    return await acached_json(
+        request, target.dict(), render_plain if settings.FAST_JSON_RESPONSES else render
+    )
@@ -0,0 +1,42 @@
+import csv
+import io
+from typing import Iterable, Iterator, List
+
+from app import schemas
+from app.models import Transaction
+
+CSV_HEADER = ["transaction_id", "date", "payment_method", "item_id", "item", "price"]
+
+
+def ndjson_lines(batches: Iterable[List[Transaction]]) -> Iterator[str]:
+    for batch in batches:
+        yield "".join(
+            schemas.Transaction.from_orm(transaction).json() + "\n"
+            for transaction in batch
+        )
+
+
+def csv_lines(batches: Iterable[List[Transaction]]) -> Iterator[str]:
+    """One row per item of a transaction, priced on the transaction date."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for batch in batches:
+        for transaction in batch:
+            for item in transaction.items:
+                price = next(
+                    (p.value for p in item.prices if p.date == transaction.date), None
+                )
+                writer.writerow(
+                    [
+                        transaction.id,
+                        transaction.date.isoformat(),
+                        transaction.payment_method.name,
+                        item.id,
+                        item.name,
+                        price,
+                    ]
+                )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,49 @@
+"""
+Encoding of the plain transaction dicts of `CRUDTransaction.*_plain`.
+
+The output is byte for byte what FastAPI renders for the same transactions
+through ``response_model=schemas.Transaction``. It is encoded with orjson,
+whose float formatting matches ``repr`` only for magnitudes between 1e-4 and
+1e16, so a payload holding any other float goes through the standard library
+encoder, called with FastAPI's arguments.
+"""
+import json
+from datetime import date
+from typing import Any, Dict, List
+
+import orjson
+
+from app.api.timing import serializing
+
+
+def _repr_compatible(value: Any) -> bool:
+    return value is None or value == 0.0 or 1e-4 <= abs(value) < 1e16
+
+
+def _dumps(content: Any, floats_compatible: bool) -> bytes:
+    with serializing():
+        if floats_compatible:
+            return orjson.dumps(content)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+            default=date.isoformat,
+        ).encode("utf-8")
+
+
+def _floats_compatible(transaction: Dict[str, Any]) -> bool:
+    payment_method = transaction["payment_method"]
+    return payment_method is None or _repr_compatible(
+        payment_method["tax_deduction_rate"]
+    )
+
+
+def dumps_transaction(transaction: Dict[str, Any]) -> bytes:
+    return _dumps(transaction, _floats_compatible(transaction))
+
+
+def dumps_transactions(transactions: List[Dict[str, Any]]) -> bytes:
+    return _dumps(transactions, all(map(_floats_compatible, transactions)))
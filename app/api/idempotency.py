@@ -0,0 +1,85 @@
+"""
+Idempotency keys of the transaction write endpoints.
+
+A client retrying a request it got no answer to sends it again with the same
+``Idempotency-Key`` header. The first request carrying a key claims it (see
+`CRUDIdempotencyKey.claim`); its response is recorded and replayed to every
+retry, marked with an ``Idempotent-Replayed`` header, without the request
+being handled again. The response is recorded in the database transaction
+of the write itself, so that a key is never left claimed by a write that
+committed. A retry arriving while the first request is still being handled
+gets a 409, a key reused for a different request a 422. A request that fails
+releases its key, so that it can be retried.
+"""
+import hashlib
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.api.timing import serializing
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _request_hash(payload: Any) -> bytes:
+    encoded = json.dumps(
+        jsonable_encoder(payload), sort_keys=True, separators=(",", ":")
+    ).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def idempotent(
+    db: Session,
+    request: Request,
+    key: Optional[str],
+    payload: Any,
+    handle: Callable[[], Any],
+) -> Any:
+    """
+    Answer the request with body ``payload`` by ``handle()``'s content (a
+    model), once per ``key``. ``handle`` writes without committing; its
+    writes are committed here, along with the recorded response. Without a
+    key the content is returned as is.
+    """
+    if key is None:
+        content = handle()
+        db.commit()
+        return content
+
+    path = request.scope["route"].path
+    request_hash = _request_hash(payload)
+    held = crud.idempotency_key.claim(db, key, path, request_hash)
+    if held is not None:
+        if held.path != path or bytes(held.request_hash) != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="The Idempotency-Key was already used for another request.",
+            )
+        if held.status_code is None:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being handled.",
+            )
+        return Response(
+            bytes(held.response),
+            status_code=held.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    try:
+        content = handle()
+        with serializing():
+            body = JSONResponse(content=jsonable_encoder(content)).body
+        crud.idempotency_key.complete(db, key, 200, body)
+    except BaseException:
+        # What failed may have left the session unusable.
+        db.rollback()
+        crud.idempotency_key.release(db, key)
+        raise
+    return Response(body, media_type="application/json")
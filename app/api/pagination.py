@@ -0,0 +1,30 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Response
+
+from app.models import Transaction
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+def keyset_after(cursor: Optional[str] = None) -> Optional[Tuple[date, int]]:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def set_next_cursor(
+    response: Response,
+    transactions: Union[List[Transaction], List[Dict[str, Any]]],
+    limit: int,
+) -> None:
+    if transactions and len(transactions) == limit:
+        last = transactions[-1]
+        if isinstance(last, dict):
+            cursor = encode_cursor(last["date"], last["id"])
+        else:
+            cursor = encode_cursor(last.date, last.id)
+        response.headers["X-Next-Cursor"] = cursor
@@ -1,9 +1,37 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import transaction
+from app.api.endpoints import (
+    account,
+    ingest,
+    jobs,
+    metrics,
+    price,
+    report,
+    search,
+    transaction,
+    transaction_async,
+)
+from app.core.config import settings
+from app.graphql import graphql_router
 
 api_router = APIRouter()
 api_router.include_router(
     transaction.router, prefix="/transaction", tags=["transaction"]
 )
+api_router.include_router(
+    (transaction_async if settings.DB_ASYNC else transaction).read_router,
+    prefix="/transaction",
+    tags=["transaction"],
+)
+if settings.INGEST_BUFFER_ENABLED:
+    api_router.include_router(
+        ingest.router, prefix="/transaction", tags=["transaction"]
+    )
+api_router.include_router(report.router, prefix="/report", tags=["report"])
+api_router.include_router(price.router, prefix="/price", tags=["price"])
+api_router.include_router(account.router, prefix="/account", tags=["account"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(graphql_router, prefix="/graphql", tags=["graphql"])
 # api_router.include_router(items.router, prefix="/items", tags=["items"])
@@ -0,0 +1,163 @@
+"""
+Per-request timing: SQL statements and their time (from the cursor events of
+`app.db.instrumentation`), serialization time and total time. They are sent
+back in a ``Server-Timing`` header and aggregated per route into latency
+histograms (``/metrics/requests``).
+"""
+import asyncio
+import functools
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.db.instrumentation import RequestStats, request_stats
+
+# Upper bounds of the latency buckets, in milliseconds; one more bucket holds
+# everything slower.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@contextmanager
+def serializing() -> Iterator[None]:
+    """Count the time spent in the block as serialization time."""
+    stats = request_stats.get()
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serialize += perf_counter() - started
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that counts what follows the endpoint (response_model
+    validation, encoding and rendering of the response) as serialization.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        call = self.dependant.call
+
+        if call is not None and not getattr(call, "_timed", False):
+
+            def done(result: Any) -> Any:
+                stats = request_stats.get()
+                if stats is not None:
+                    stats.endpoint_done = perf_counter()
+                return result
+
+            if asyncio.iscoroutinefunction(call):
+
+                @functools.wraps(call)
+                async def timed(*args, **kwargs):
+                    return done(await call(*args, **kwargs))
+
+            else:
+
+                @functools.wraps(call)
+                def timed(*args, **kwargs):
+                    return done(call(*args, **kwargs))
+
+            timed._timed = True
+            self.dependant.call = timed
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            stats = request_stats.get()
+            if stats is not None and stats.endpoint_done is not None:
+                stats.serialize += perf_counter() - stats.endpoint_done
+            return response
+
+        return timed_handler
+
+
+class RouteHistogram:
+    __slots__ = ("buckets", "count", "total", "db", "serialize", "queries")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.queries = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "buckets_ms": dict(zip([*map(str, BUCKETS_MS), "+Inf"], self.buckets)),
+            "total_ms_mean": round(self.total * 1000 / count, 3),
+            "db_ms_mean": round(self.db * 1000 / count, 3),
+            "serialize_ms_mean": round(self.serialize * 1000 / count, 3),
+            "queries_mean": round(self.queries / count, 3),
+        }
+
+
+class RequestMetrics:
+    """Latency histograms per ``(method, route)``."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._routes: Dict[Tuple[str, str], RouteHistogram] = {}
+
+    def record(
+        self, method: str, route: str, seconds: float, stats: RequestStats
+    ) -> None:
+        bucket = bisect_left(BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            histogram = self._routes.get((method, route))
+            if histogram is None:
+                histogram = self._routes[method, route] = RouteHistogram()
+            histogram.buckets[bucket] += 1
+            histogram.count += 1
+            histogram.total += seconds
+            histogram.db += stats.db
+            histogram.serialize += stats.serialize
+            histogram.queries += stats.queries
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"method": method, "route": route, **histogram.snapshot()}
+                for (method, route), histogram in sorted(self._routes.items())
+            ]
+
+
+request_metrics = RequestMetrics()
+
+
+def server_timing(stats: RequestStats, seconds: float) -> str:
+    return ", ".join(
+        [
+            f'db;dur={stats.db * 1000:.2f};desc="{stats.queries} queries"',
+            f"serialize;dur={stats.serialize * 1000:.2f}",
+            f"total;dur={seconds * 1000:.2f}",
+        ]
+    )
+
+
+async def time_request(request: Request, call_next) -> Response:
+    """HTTP middleware filling in `request_stats` for the request."""
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    started = perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_stats.reset(token)
+    seconds = perf_counter() - started
+
+    response.headers["Server-Timing"] = server_timing(stats, seconds)
+    route = request.scope.get("route")
+    if route is not None:
+        path = request.scope.get("root_path", "") + route.path
+        request_metrics.record(request.method, path, seconds, stats)
+    return response
@@ -1,5 +1,7 @@
 import json
+import os
 import secrets
+import tempfile
 from typing import Any, Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, BaseSettings, EmailStr, HttpUrl, PostgresDsn, validator
@@ -49,6 +51,102 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    # Connection pool, shared by the sync and the async engine.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Seconds after which a connection is replaced; -1 keeps them forever.
+    DB_POOL_RECYCLE: int = -1
+    # Round trip on every checkout to weed out dead connections.
+    DB_POOL_PRE_PING: bool = True
+
+    # Serve the read endpoints from an asyncpg-backed AsyncSession instead of
+    # the synchronous session run in FastAPI's threadpool.
+    DB_ASYNC: bool = False
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[PostgresDsn] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> Any:
+        if isinstance(v, str):
+            return v
+        _, rest = str(values.get("SQLALCHEMY_DATABASE_URI")).split("://", 1)
+        return f"postgresql+asyncpg://{rest}"
+
+    # Statements slower than this are logged with their parameters; -1
+    # disables the log.
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+
+    DIMENSION_CACHE_ENABLED: bool = True
+    DIMENSION_CACHE_SIZE: int = 10000
+
+    # Per-item price series (app.crud.price); entries are whole histories.
+    PRICE_SERIES_CACHE_ENABLED: bool = True
+    PRICE_SERIES_CACHE_SIZE: int = 10000
+
+    # In-memory prefix indexes of item, transaction target and category names
+    # serving /search; off, prefix searches go to the database.
+    NAME_INDEX_ENABLED: bool = True
+
+    # HTTP cache of the transaction read endpoints (app.api.cache), in
+    # responses kept.
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SIZE: int = 1024
+
+    # Serve the transaction read endpoints from plain rows encoded directly
+    # (app.api.fast_json) instead of through the response_model.
+    FAST_JSON_RESPONSES: bool = False
+
+    # Ledger entries posted to an account between two balance snapshots.
+    LEDGER_SNAPSHOT_INTERVAL: int = 1000
+
+    # Months of transaction partitions created ahead of the current one, on
+    # startup and by `manage.py create-partitions`.
+    PARTITION_MONTHS_AHEAD: int = 3
+    # How long deleting a whole month waits to lock its partitions before
+    # falling back to deleting the rows.
+    PARTITION_LOCK_TIMEOUT_MS: int = 2000
+
+    # Limits of the queries /graphql accepts: nesting depth, and cost (one
+    # per field, times the size of the lists it is nested in; see
+    # app.graphql.limits).
+    GRAPHQL_MAX_DEPTH: int = 6
+    GRAPHQL_MAX_COMPLEXITY: int = 5000
+
+    # How long the response to a request sent with an Idempotency-Key is
+    # replayed to retries; older keys can be used again, and are deleted by
+    # `manage.py purge-idempotency-keys`.
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    # Refuse to create a transaction with the same content (family, date,
+    # payment method, items with their prices and quantities) as an existing
+    # one. Fingerprints are recorded either way.
+    REJECT_DUPLICATE_TRANSACTIONS: bool = False
+
+    # Write-behind ingest (app.core.ingest, POST /transaction/ingest):
+    # transactions queued at most, how long a new one waits for room in a
+    # full queue before a 503, transactions written per database
+    # transaction, and tickets remembered.
+    INGEST_BUFFER_ENABLED: bool = False
+    INGEST_QUEUE_SIZE: int = 10000
+    INGEST_ENQUEUE_TIMEOUT_MS: int = 100
+    INGEST_BATCH_SIZE: int = 500
+    INGEST_TICKETS_KEPT: int = 100000
+
+    # Background jobs (app.core.jobs): worker processes, hence jobs run at
+    # once, off by default (queued jobs wait for a server started with
+    # workers); seconds between looks for queued jobs; seconds without
+    # progress after which a running job is taken to have died and resumed;
+    # runs a job gets before it is failed.
+    JOB_WORKERS: int = 0
+    JOB_POLL_SECONDS: float = 5
+    JOB_STALE_SECONDS: int = 600
+    JOB_MAX_ATTEMPTS: int = 3
+    # Rows of a statement imported per database transaction, and where
+    # uploaded statements wait to be imported.
+    JOB_IMPORT_CHUNK_ROWS: int = 5000
+    JOB_DATA_DIR: str = os.path.join(tempfile.gettempdir(), "payments-jobs")
+
     # SMTP_TLS: bool = True
     # SMTP_PORT: Optional[int] = None
     # SMTP_HOST: Optional[str] = None
@@ -0,0 +1,184 @@
+"""
+Write-behind ingest of transactions.
+
+`POST /transaction/ingest` puts a transaction on a bounded in-process queue
+and answers 202 with a ticket straight away. A worker task takes whatever
+has queued up, at most INGEST_BATCH_SIZE transactions, and writes it with
+`CRUDTransaction.create_bulk`: one database transaction, hence one commit,
+for the whole batch instead of one per transaction. Transactions arriving
+while a batch is written make up the next one, so batches grow with the
+load without holding anything back when it is light. What became of each
+transaction is kept under its ticket (`GET /transaction/ingest/{ticket}`).
+
+A full queue makes new transactions wait up to INGEST_ENQUEUE_TIMEOUT_MS for
+room, then get a 503. On shutdown new transactions are refused and the queue
+is written out before the worker stops. Tickets are only known to the
+process that issued them.
+"""
+import asyncio
+import logging
+import uuid
+from contextlib import suppress
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud, schemas
+from app.core.config import settings
+from app.db.cache import rollback
+from app.db.session import SessionLocal
+from app.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, schemas.TransactionCreate]
+
+
+class IngestBuffer:
+    FAILED = "The transaction could not be written."
+
+    def __init__(self, maxsize: int, batch_size: int, tickets_kept: int):
+        """
+        **Parameters**
+
+        * `maxsize`: Transactions the queue holds before enqueuing waits
+        * `batch_size`: Most transactions written in one database transaction
+        * `tickets_kept`: Tickets remembered, the least recently used evicted
+        """
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.tickets = LRUCache(maxsize=tickets_kept)
+        self.closing = False
+        self.batches = 0
+        self.written = 0
+        self._queue: Optional["asyncio.Queue[Entry]"] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self.closing
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(self.maxsize)
+        self.closing = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Refuse new transactions, write out the queued ones, and stop."""
+        if self._worker is None:
+            return
+        self.closing = True
+        await self._queue.join()
+        self._worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._worker
+        self._worker = None
+
+    async def submit(self, obj_in: schemas.TransactionCreate) -> schemas.IngestTicket:
+        if not self.running:
+            raise HTTPException(
+                status_code=503, detail="Transactions are not being ingested."
+            )
+        ticket = schemas.IngestTicket(ticket=uuid.uuid4().hex)
+        self.tickets.set(ticket.ticket, ticket)
+        try:
+            await asyncio.wait_for(
+                self._queue.put((ticket.ticket, obj_in)),
+                settings.INGEST_ENQUEUE_TIMEOUT_MS / 1000,
+            )
+        except asyncio.TimeoutError:
+            self.tickets.discard(ticket.ticket)
+            raise HTTPException(
+                status_code=503,
+                detail="The ingest queue is full.",
+                headers={"Retry-After": "1"},
+            )
+        return ticket
+
+    def get(self, ticket: str) -> Optional[schemas.IngestTicket]:
+        return self.tickets.get(ticket)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await run_in_threadpool(self._write, batch)
+            except Exception:
+                logger.exception("Writing %d ingested transactions failed", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Entry]) -> None:
+        objs_in = [obj_in for _, obj_in in batch]
+        db = SessionLocal()
+        try:
+            try:
+                results = crud.transaction.create_bulk(db, objs_in=objs_in)
+            except HTTPException:
+                # The batch was rolled back; write its transactions one by one
+                # so that one that cannot be written does not fail the rest.
+                results = [self._write_one(db, obj_in) for obj_in in objs_in]
+        except Exception as e:
+            logger.exception("Writing %d ingested transactions failed", len(batch))
+            self._rollback(db, e)
+            results = [
+                schemas.TransactionBulkResult(index=i, error=self.FAILED)
+                for i in range(len(batch))
+            ]
+        finally:
+            db.close()
+        for (ticket, _), result in zip(batch, results):
+            self.tickets.set(
+                ticket,
+                schemas.IngestTicket(
+                    ticket=ticket,
+                    status=schemas.IngestStatus.created
+                    if result.error is None
+                    else schemas.IngestStatus.failed,
+                    id=result.id,
+                    error=result.error,
+                ),
+            )
+        self.batches += 1
+        self.written += sum(result.error is None for result in results)
+
+    @classmethod
+    def _write_one(
+        cls, db: Session, obj_in: schemas.TransactionCreate
+    ) -> schemas.TransactionBulkResult:
+        try:
+            return crud.transaction.create_bulk(db, objs_in=[obj_in])[0]
+        except HTTPException as e:
+            return schemas.TransactionBulkResult(index=0, error=e.detail)
+        except Exception as e:
+            logger.exception("Writing an ingested transaction failed")
+            cls._rollback(db, e)
+            return schemas.TransactionBulkResult(index=0, error=cls.FAILED)
+
+    @staticmethod
+    def _rollback(db: Session, exc: Exception) -> None:
+        # The tickets are failed whether or not the rollback goes through;
+        # closing the session releases the connection either way.
+        with suppress(Exception):
+            rollback(db, exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": 0 if self._queue is None else self._queue.qsize(),
+            "maxsize": self.maxsize,
+            "batches": self.batches,
+            "written": self.written,
+        }
+
+
+ingest_buffer = IngestBuffer(
+    maxsize=settings.INGEST_QUEUE_SIZE,
+    batch_size=settings.INGEST_BATCH_SIZE,
+    tickets_kept=settings.INGEST_TICKETS_KEPT,
+)
@@ -0,0 +1,328 @@
+"""
+Background jobs: statement imports and purges too long for a request.
+
+Jobs are rows of the ``job`` table (app.models.Job), so they outlive the
+process that queued them. A `JobRunner` claims them (`CRUDJob.claim`) and runs
+each in a pool of JOB_WORKERS processes. A job is split into chunks (rows of
+the statement, months of the purge), each written in one database transaction
+together with the job's progress. A run that dies therefore leaves its job at
+the last chunk committed, and the next run resumes from there: at once when
+the worker process crashed, after JOB_STALE_SECONDS when the whole runner did.
+A job claimed more than JOB_MAX_ATTEMPTS times is failed.
+
+The writes are made by other processes, so the caches of the runner's
+process are dropped whenever a poll finds that a running job moved on by a
+chunk, at every poll while a job has done its chunks but is still running
+(the sweep of a purge), and when a job ends.
+"""
+import asyncio
+import csv
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from datetime import date, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.crud.job import StaleJob
+from app.db.cache import invalidate_all
+from app.db.session import SessionLocal
+from app.models import Job
+from app.utils.case import month_range
+
+logger = logging.getLogger(__name__)
+
+
+def _import_chunks(
+    reader: Iterator[List[str]], size: int, ref: Optional[int]
+) -> Iterator[List[List[str]]]:
+    """
+    Rows of ``reader`` by ``size``, or a little more: the rows of one
+    transaction, adjacent rows sharing a non-empty ``ref`` column, are never
+    split across chunks.
+    """
+
+    def ref_of(row: List[str]) -> str:
+        return row[ref].strip() if ref is not None and ref < len(row) else ""
+
+    chunk: List[List[str]] = []
+    for row in reader:
+        if len(chunk) >= size and not (
+            ref_of(row) and ref_of(row) == ref_of(chunk[-1])
+        ):
+            yield chunk
+            chunk = []
+        chunk.append(row)
+    if chunk:
+        yield chunk
+
+
+def run_import(db: Session, job: Job, attempt: int) -> Dict[str, Any]:
+    """
+    Import the CSV statement at ``params["path"]`` by chunks of
+    JOB_IMPORT_CHUNK_ROWS rows, each with `CRUDStatement.import_csv`.
+    """
+    result = job.result or {"lines": 0, "transactions": 0, "rejected": []}
+    with open(job.params["path"], newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        if job.total is None:
+            total = sum(1 for _ in reader)
+            crud.job.progress(db, job.id, attempt, job.done, total=total)
+            db.commit()
+            file.seek(0)
+            next(reader, None)
+        names = [name.strip() for name in header]
+        ref = names.index("ref") if "ref" in names else None
+
+        done = job.done
+        for chunk in _import_chunks(
+            islice(reader, done, None), settings.JOB_IMPORT_CHUNK_ROWS, ref
+        ):
+            text = io.StringIO()
+            writer = csv.writer(text)
+            writer.writerow(header)
+            writer.writerows(chunk)
+            imported = crud.statement.import_csv(
+                db, io.BytesIO(text.getvalue().encode()), commit=False
+            )
+            result["lines"] += imported.lines
+            result["transactions"] += imported.transactions
+            result["rejected"] += [
+                # Lines of the chunk, header included, to lines of the file.
+                {"line": row.line + done, "error": row.error}
+                for row in imported.rejected
+            ]
+            done += len(chunk)
+            crud.job.progress(db, job.id, attempt, done, result=result)
+            db.commit()
+    return result
+
+
+def run_purge(db: Session, job: Job, attempt: int) -> Dict[str, Any]:
+    """
+    Delete the transactions of ``params`` (a `schemas.PurgeJobCreate`) month
+    by month with `CRUDTransaction.delete_range`, then sweep if asked to.
+    """
+    params = job.params
+    start_date = date.fromisoformat(params["start_date"])
+    end_date = date.fromisoformat(params["end_date"]) + timedelta(days=1)
+    pieces = []
+    piece_start = start_date
+    while piece_start < end_date:
+        piece_end = min(month_range(piece_start.year, piece_start.month)[1], end_date)
+        pieces.append((piece_start, piece_end))
+        piece_start = piece_end
+
+    result = job.result or {"deleted": 0}
+    for done, (piece_start, piece_end) in enumerate(pieces[job.done :], job.done):
+        deleted = crud.transaction.delete_range(
+            db, piece_start, piece_end, family=params.get("family"), commit=False
+        )
+        result["deleted"] += len(deleted)
+        crud.job.progress(
+            db, job.id, attempt, done + 1, total=len(pieces), result=result
+        )
+        db.commit()
+    if params.get("sweep"):
+        result["prices_swept"], result["items_swept"] = crud.transaction.sweep_orphans(
+            db, start_date, end_date
+        )
+    return result
+
+
+HANDLERS: Dict[str, Callable[[Session, Job, int], Dict[str, Any]]] = {
+    "import": run_import,
+    "purge": run_purge,
+}
+
+
+def remove_upload(job: Job) -> None:
+    """Delete the file uploaded for ``job``, once it will not be run again."""
+    path = job.params.get("path")
+    if path is not None:
+        with suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def run(id: int, attempt: int) -> None:
+    """Run attempt ``attempt`` of job ``id``; called in a worker process."""
+    db = SessionLocal()
+    try:
+        job = crud.job.get(db, id)
+        try:
+            result = HANDLERS[job.kind](db, job, attempt)
+        except StaleJob:
+            db.rollback()
+            return
+        except Exception as e:
+            db.rollback()
+            if not isinstance(e, HTTPException):
+                logger.exception("Job %d failed", id)
+            crud.job.fail(
+                db, id, attempt, e.detail if isinstance(e, HTTPException) else str(e)
+            )
+        else:
+            crud.job.finish(db, id, attempt, result)
+        remove_upload(job)
+    except StaleJob:
+        db.rollback()
+    finally:
+        db.close()
+
+
+class JobRunner:
+    def __init__(self, workers: int):
+        """
+        **Parameters**
+
+        * `workers`: Worker processes, hence jobs run at the same time
+        """
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[int, "asyncio.Future[None]"] = {}
+        # Chunks done by each running job when last looked at.
+        self._done_seen: Dict[int, int] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: the server process has threads and open
+        # connections a fork would copy.
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def start(self) -> None:
+        self._pool = self._new_pool()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop claiming jobs. Those running are left to finish; were the
+        process to be killed meanwhile, they resume from their last chunk.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def wake(self) -> None:
+        """Look for jobs now rather than at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    @staticmethod
+    def _claim() -> Optional[Tuple[int, int]]:
+        db = SessionLocal()
+        try:
+            while True:
+                claimed = crud.job.claim(db)
+                if claimed is None or claimed[1] <= settings.JOB_MAX_ATTEMPTS:
+                    return claimed
+                id, attempt = claimed
+                crud.job.fail(
+                    db, id, attempt, f"Gave up after {attempt - 1} interrupted runs."
+                )
+                remove_upload(crud.job.get(db, id))
+        finally:
+            db.close()
+
+    @staticmethod
+    def _requeue(id: int, attempt: int) -> None:
+        db = SessionLocal()
+        try:
+            crud.job.requeue(db, id, attempt)
+        finally:
+            db.close()
+
+    def _observe(self) -> None:
+        """Drop the caches if a running job wrote anything since last time."""
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Job.id, Job.done, Job.total, Job.status).where(
+                    Job.id.in_(list(self._running))
+                )
+            ).all()
+        finally:
+            db.close()
+        changed = False
+        for id, done, total, status in rows:
+            if self._done_seen.get(id) != done or (
+                status == "running" and total is not None and done >= total
+            ):
+                changed = True
+            self._done_seen[id] = done
+        if changed:
+            invalidate_all()
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                if self._running:
+                    await run_in_threadpool(self._observe)
+                while len(self._running) < self.workers:
+                    claimed = await run_in_threadpool(self._claim)
+                    if claimed is None:
+                        break
+                    self._submit(*claimed)
+            except Exception:
+                logger.exception("Claiming jobs failed")
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), settings.JOB_POLL_SECONDS)
+
+    def _submit(self, id: int, attempt: int) -> None:
+        pool = self._pool
+        try:
+            future = asyncio.wrap_future(pool.submit(run, id, attempt))
+        except BrokenProcessPool:
+            # A worker died since the last job ended; its pool refuses more.
+            self._resume(id, attempt, pool)
+            return
+        self._running[id] = future
+        future.add_done_callback(lambda f: self._done(id, attempt, pool, f))
+
+    def _done(
+        self, id: int, attempt: int, pool: ProcessPoolExecutor, future: Future
+    ) -> None:
+        del self._running[id]
+        self._done_seen.pop(id, None)
+        invalidate_all()
+        error = None if future.cancelled() else future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._resume(id, attempt, pool)
+        elif error is not None:
+            logger.error("Job %d could not be run", id, exc_info=error)
+        self.wake()
+
+    def _resume(self, id: int, attempt: int, pool: ProcessPoolExecutor) -> None:
+        """
+        Requeue a job ``pool`` could not run, a worker process having died and
+        taken the pool with it; the job resumes in a new one.
+        """
+        if pool is self._pool and self._task is not None:
+            self._pool = self._new_pool()
+        requeued = asyncio.get_running_loop().run_in_executor(
+            None, self._requeue, id, attempt
+        )
+        requeued.add_done_callback(lambda _: self.wake())
+
+
+job_runner = JobRunner(workers=settings.JOB_WORKERS)
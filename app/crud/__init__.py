@@ -1 +1,8 @@
 from .transaction import *
+from .report import *
+from .statement import *
+from .price import *
+from .account import *
+from .search import *
+from .idempotency import *
+from .job import *
@@ -0,0 +1,334 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    Date,
+    Float,
+    Integer,
+    and_,
+    bindparam,
+    column,
+    delete,
+    func,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.crud.dimension import chunks
+from app.models import (
+    Account,
+    AccountSnapshot,
+    LedgerEntry,
+    PaymentMethod,
+    Transaction,
+)
+from app.models.payments import TransactionLine
+from app import schemas
+
+# (account_id, date, amount) of an entry posted, or reverted.
+Movement = Tuple[int, date, float]
+
+
+class Discrepancy(NamedTuple):
+    account_id: int
+    # None for the account's running balance, else the snapshot's date.
+    date: Optional[date]
+    recorded: float
+    expected: float
+
+
+def _differs(recorded: float, expected: float) -> bool:
+    return abs(recorded - expected) > 1e-6 * max(1.0, abs(expected))
+
+
+class CRUDAccount(CRUDBase[Account, schemas.AccountCreate, schemas.AccountCreate]):
+    """
+    Accounts and their ledger.
+
+    Each transaction paid with a payment method attached to an account posts
+    one `LedgerEntry` for minus its amount. ``Account.balance`` holds the sum
+    of all the account's entries; every ``LEDGER_SNAPSHOT_INTERVAL`` entries
+    an `AccountSnapshot` checkpoints it. Entries posted or reverted later move
+    the balance and every snapshot dated on or after them, so that reading a
+    balance never scans more than the entries since the closest snapshot.
+    """
+
+    def post(self, db: Session, *conditions) -> None:
+        """
+        Post the transactions matching ``conditions`` (on `Transaction`),
+        inside the caller's database transaction. Transactions already posted
+        are left alone.
+        """
+        entries = (
+            select(
+                PaymentMethod.account_id,
+                Transaction.id,
+                Transaction.date,
+                -func.coalesce(func.sum(TransactionLine.amount), 0.0),
+            )
+            .select_from(Transaction)
+            .join(PaymentMethod, PaymentMethod.id == Transaction.payment_method_id)
+            .outerjoin(
+                TransactionLine, TransactionLine.transaction_id == Transaction.id
+            )
+            .where(PaymentMethod.account_id.is_not(None), *conditions)
+            .group_by(PaymentMethod.account_id, Transaction.id, Transaction.date)
+        )
+        stmt = (
+            insert(LedgerEntry)
+            .from_select(["account_id", "transaction_id", "date", "amount"], entries)
+            .on_conflict_do_nothing(index_elements=["transaction_id"])
+            .returning(LedgerEntry.account_id, LedgerEntry.date, LedgerEntry.amount)
+        )
+        posted = db.execute(stmt).all()
+        if posted:
+            self._move(db, posted, count=True)
+            self._checkpoint(db, {account_id for account_id, _, _ in posted})
+
+    def unpost(self, db: Session, transaction_ids) -> None:
+        """
+        Revert the entries of the transactions ``transaction_ids``: a list of
+        ids, or a SELECT of them.
+        """
+        stmt = (
+            delete(LedgerEntry)
+            .where(LedgerEntry.transaction_id.in_(transaction_ids))
+            .returning(LedgerEntry.account_id, LedgerEntry.date, -LedgerEntry.amount)
+        )
+        reverted = db.execute(stmt).all()
+        if reverted:
+            self._move(db, reverted, count=False)
+
+    @staticmethod
+    def _move(db: Session, movements: Iterable[Movement], count: bool) -> None:
+        by_account: Dict[int, List] = defaultdict(lambda: [0.0, 0])
+        by_day: Dict[Tuple[int, date], float] = defaultdict(float)
+        for account_id, day, amount in movements:
+            by_account[account_id][0] += amount
+            by_account[account_id][1] += 1
+            by_day[account_id, day] += amount
+
+        account = Account.__table__
+        db.execute(
+            update(account)
+            .where(account.c.id == bindparam("b_id"))
+            .values(
+                balance=account.c.balance + bindparam("b_amount"),
+                entries_since_snapshot=account.c.entries_since_snapshot
+                + bindparam("b_count"),
+            ),
+            [
+                {"b_id": id_, "b_amount": amount, "b_count": n if count else 0}
+                for id_, (amount, n) in by_account.items()
+            ],
+        )
+
+        snapshot = AccountSnapshot.__table__
+        for chunk in chunks(list(by_day.items())):
+            moved = values(
+                column("account_id", Integer),
+                column("date", Date),
+                column("amount", Float),
+                name="moved",
+            ).data([(account_id, day, amount) for (account_id, day), amount in chunk])
+            deltas = (
+                select(
+                    snapshot.c.account_id,
+                    snapshot.c.date,
+                    func.sum(moved.c.amount).label("amount"),
+                )
+                .join(
+                    moved,
+                    and_(
+                        moved.c.account_id == snapshot.c.account_id,
+                        moved.c.date <= snapshot.c.date,
+                    ),
+                )
+                .group_by(snapshot.c.account_id, snapshot.c.date)
+                .subquery()
+            )
+            db.execute(
+                update(snapshot)
+                .where(
+                    snapshot.c.account_id == deltas.c.account_id,
+                    snapshot.c.date == deltas.c.date,
+                )
+                .values(balance=snapshot.c.balance + deltas.c.amount)
+            )
+
+    @staticmethod
+    def _checkpoint(db: Session, account_ids: Iterable[int]) -> None:
+        """
+        Snapshot the accounts with ``LEDGER_SNAPSHOT_INTERVAL`` or more
+        entries posted since their last snapshot. Their ledger is walked a day
+        at a time in date order, closing a snapshot on each day by which that
+        many entries gathered since the previous one, so that a balance at any
+        date reads one snapshot and at most an interval of entries past it
+        (more only when a single day holds more).
+        """
+        interval = settings.LEDGER_SNAPSHOT_INTERVAL
+        due = db.scalars(
+            select(Account.id)
+            .where(
+                Account.id.in_(list(account_ids)),
+                Account.entries_since_snapshot >= interval,
+            )
+            .order_by(Account.id)
+        ).all()
+        for account_id in due:
+            days = {
+                day: (count, amount)
+                for day, count, amount in db.execute(
+                    select(
+                        LedgerEntry.date, func.count(), func.sum(LedgerEntry.amount)
+                    )
+                    .where(LedgerEntry.account_id == account_id)
+                    .group_by(LedgerEntry.date)
+                )
+            }
+            snapshotted = set(
+                db.scalars(
+                    select(AccountSnapshot.date).where(
+                        AccountSnapshot.account_id == account_id
+                    )
+                )
+            )
+            rows = []
+            balance, since = 0.0, 0
+            for day in sorted(days.keys() | snapshotted):
+                count, amount = days.get(day, (0, 0.0))
+                balance += amount
+                since += count
+                if day in snapshotted:
+                    since = 0
+                elif since >= interval:
+                    rows.append(
+                        {"account_id": account_id, "date": day, "balance": balance}
+                    )
+                    since = 0
+            if rows:
+                db.execute(insert(AccountSnapshot), rows)
+            db.execute(
+                update(Account)
+                .where(Account.id == account_id)
+                .values(entries_since_snapshot=since)
+            )
+
+    def attach_payment_method(
+        self, db: Session, account_id: Optional[int], payment_method_id: int
+    ) -> None:
+        """
+        Make the transactions paid with the payment method post to
+        ``account_id`` (none with ``None``), moving those already posted.
+        """
+        payment_method = db.get(PaymentMethod, payment_method_id)
+        if payment_method is None:
+            raise HTTPException(status_code=404, detail="Payment method not found")
+        paid_with = Transaction.payment_method_id == payment_method_id
+        self.unpost(db, select(Transaction.id).where(paid_with))
+        payment_method.account_id = account_id
+        db.flush()
+        self.post(db, paid_with)
+        db.commit()
+
+    def balance(
+        self, db: Session, account: Account, at: Optional[date] = None
+    ) -> float:
+        """
+        The balance of ``account``: its running balance, or as of the end of
+        ``at``, the closest earlier snapshot plus the entries since.
+        """
+        if at is None:
+            return account.balance
+
+        snapshot = db.execute(
+            select(AccountSnapshot.date, AccountSnapshot.balance)
+            .where(
+                AccountSnapshot.account_id == account.id, AccountSnapshot.date <= at
+            )
+            .order_by(AccountSnapshot.date.desc())
+            .limit(1)
+        ).first()
+        tail = select(func.coalesce(func.sum(LedgerEntry.amount), 0.0)).where(
+            LedgerEntry.account_id == account.id, LedgerEntry.date <= at
+        )
+        if snapshot is None:
+            return db.scalar(tail)
+        tail = tail.where(LedgerEntry.date > snapshot.date)
+        return snapshot.balance + db.scalar(tail)
+
+    def reconcile(self, db: Session, fix: bool = False) -> List[Discrepancy]:
+        """
+        Check every running balance and snapshot against a full pass over the
+        ledger; with ``fix``, overwrite those that disagree and commit.
+        """
+        daily = db.execute(
+            select(
+                LedgerEntry.account_id, LedgerEntry.date, func.sum(LedgerEntry.amount)
+            )
+            .group_by(LedgerEntry.account_id, LedgerEntry.date)
+            .order_by(LedgerEntry.account_id, LedgerEntry.date)
+        )
+        # Per account, the days with entries and the balance at their end.
+        days: Dict[int, List[date]] = defaultdict(list)
+        balances: Dict[int, List[float]] = defaultdict(list)
+        for account_id, day, amount in daily:
+            previous = balances[account_id][-1] if balances[account_id] else 0.0
+            days[account_id].append(day)
+            balances[account_id].append(previous + amount)
+
+        def expected_at(account_id: int, day: Optional[date]) -> float:
+            if not balances.get(account_id):
+                return 0.0
+            if day is None:
+                return balances[account_id][-1]
+            i = bisect_right(days[account_id], day)
+            return balances[account_id][i - 1] if i else 0.0
+
+        discrepancies = []
+        for account_id, recorded in db.execute(select(Account.id, Account.balance)):
+            expected = expected_at(account_id, None)
+            if _differs(recorded, expected):
+                discrepancies.append(Discrepancy(account_id, None, recorded, expected))
+        snapshots = db.execute(
+            select(
+                AccountSnapshot.account_id,
+                AccountSnapshot.date,
+                AccountSnapshot.balance,
+            ).order_by(AccountSnapshot.account_id, AccountSnapshot.date)
+        )
+        for account_id, day, recorded in snapshots:
+            expected = expected_at(account_id, day)
+            if _differs(recorded, expected):
+                discrepancies.append(Discrepancy(account_id, day, recorded, expected))
+
+        if fix and discrepancies:
+            for account_id, day, _, expected in discrepancies:
+                if day is None:
+                    db.execute(
+                        update(Account)
+                        .where(Account.id == account_id)
+                        .values(balance=expected)
+                    )
+                else:
+                    db.execute(
+                        update(AccountSnapshot)
+                        .where(
+                            AccountSnapshot.account_id == account_id,
+                            AccountSnapshot.date == day,
+                        )
+                        .values(balance=expected)
+                    )
+            db.commit()
+        return discrepancies
+
+
+account = CRUDAccount(Account)
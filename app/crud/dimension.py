@@ -0,0 +1,118 @@
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.base_class import Base
+from app.db.cache import dimension_cache, name_indexes, prices_changed
+from app.db.upsert import previous
+from app.models import Price
+
+# PostgreSQL caps a single statement at 65535 bind parameters.
+CHUNK_SIZE = 1000
+
+
+def chunks(values: Sequence[Any], size: int = CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def get_ids(
+    db: Session, model: Base, key_columns: Sequence[str], keys: Iterable[Tuple]
+) -> Dict[Tuple, int]:
+    """
+    Look up the ids of existing rows of a dimension table.
+
+    Keys known to the dimension cache are answered from it; the rest are
+    selected with ``IN (...)`` on the first key column and matched on
+    the full key afterwards, so composite keys with a ``NULL`` member (e.g. a
+    payment method without a family) are resolved as well.
+    """
+    found: Dict[Tuple, int] = {}
+    wanted = set()
+    for key in keys:
+        id_ = dimension_cache.lookup(db, model, key)
+        if id_ is None:
+            wanted.add(key)
+        else:
+            found[key] = id_
+
+    columns = [getattr(model, column) for column in key_columns]
+    firsts = list({key[0] for key in wanted})
+    for chunk in chunks(firsts):
+        rows = db.execute(select(model.id, *columns).where(columns[0].in_(chunk)))
+        for id_, *key in rows:
+            key = tuple(key)
+            if key in wanted:
+                found[key] = id_
+                dimension_cache.stage(db, model, key, id_)
+    return found
+
+
+def get_or_create_ids(
+    db: Session,
+    model: Base,
+    key_columns: Sequence[str],
+    rows: Dict[Tuple, Dict[str, Any]],
+) -> Dict[Tuple, int]:
+    """
+    Set-based version of the ``get_*`` helpers on the models.
+
+    ``rows`` maps each key (the values of ``key_columns``, which must be
+    covered by a unique constraint) to the full set of column values used when
+    the row has to be created. Existing rows are selected in bulk, the missing
+    ones are inserted with a multi-row ``INSERT ... ON CONFLICT DO NOTHING
+    RETURNING`` and anything a concurrent writer inserted in between is picked
+    up by a final select.
+    """
+    found = get_ids(db, model, key_columns, rows.keys())
+    columns = [getattr(model, column) for column in key_columns]
+
+    missing: List[Tuple] = [key for key in rows if key not in found]
+    for chunk in chunks(missing):
+        stmt = (
+            insert(model)
+            .values([rows[key] for key in chunk])
+            .on_conflict_do_nothing()
+            .returning(model.id, *columns)
+        )
+        for id_, *key in db.execute(stmt):
+            key = tuple(key)
+            found[key] = id_
+            dimension_cache.stage(db, model, key, id_)
+            if key_columns == ["name"]:
+                name_indexes.stage(db, model, id_, key[0])
+
+    missing = [key for key in rows if key not in found]
+    if missing:
+        found.update(get_ids(db, model, key_columns, missing))
+    return found
+
+
+def upsert_prices(db: Session, prices: Dict[Tuple[date, float], int]) -> None:
+    """
+    Bulk version of ``Price.get_price`` followed by ``item.prices.append``.
+
+    ``prices`` maps ``(date, value)`` to the item the price belongs to. As in
+    the per-row path, an existing price row is re-pointed to the latest item.
+    """
+    keys = list(prices)
+    changed = set()
+    for chunk in chunks(keys):
+        stmt = insert(Price.__table__).values(
+            [
+                {"date": price_date, "value": value, "item_id": prices[(price_date, value)]}
+                for price_date, value in chunk
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["date", "value"],
+            set_={"item_id": stmt.excluded.item_id},
+        ).returning(Price.item_id, previous(Price, "item_id"))
+        for item_id, previous_item_id in db.execute(stmt):
+            if item_id != previous_item_id:
+                changed.update((item_id, previous_item_id))
+    changed.discard(None)
+    prices_changed(db, changed)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+
+class CRUDIdempotencyKey:
+    def claim(
+        self, db: Session, key: str, path: str, request_hash: bytes
+    ) -> Optional[IdempotencyKey]:
+        """
+        Record ``key`` as being handled for the request to ``path`` hashing to
+        ``request_hash``, and commit. Returns None when it was claimed, or the
+        row of the request that holds it. A key older than
+        IDEMPOTENCY_KEY_TTL_HOURS is claimed again as if new.
+        """
+        values = {
+            "path": path,
+            "request_hash": request_hash,
+            "status_code": None,
+            "response": None,
+            "created_at": func.now(),
+        }
+        expired = IdempotencyKey.created_at < func.now() - timedelta(
+            hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+        )
+        claimed = db.scalar(
+            insert(IdempotencyKey)
+            .values(key=key, **values)
+            .on_conflict_do_update(
+                index_elements=[IdempotencyKey.key], set_=values, where=expired
+            )
+            .returning(IdempotencyKey.key)
+        )
+        db.commit()
+        if claimed is not None:
+            return None
+        return db.scalars(
+            select(IdempotencyKey).where(IdempotencyKey.key == key)
+        ).first()
+
+    def complete(
+        self, db: Session, key: str, status_code: int, response: bytes
+    ) -> None:
+        """
+        Record the response to the request holding ``key``, and commit along
+        with whatever the request wrote.
+        """
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response=response)
+        )
+        db.commit()
+
+    def release(self, db: Session, key: str) -> None:
+        """Forget a claimed ``key`` whose request failed, so it can be retried."""
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        db.commit()
+
+    def purge(self, db: Session) -> int:
+        """Delete the keys past IDEMPOTENCY_KEY_TTL_HOURS; returns how many."""
+        result = db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.created_at
+                < func.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+            )
+        )
+        db.commit()
+        return result.rowcount
+
+
+idempotency_key = CRUDIdempotencyKey()
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Job
+
+
+class StaleJob(Exception):
+    """The job was claimed again since this run started; the run must stop."""
+
+
+class CRUDJob:
+    def create(self, db: Session, kind: str, params: Dict[str, Any]) -> Job:
+        job = Job(kind=kind, params=params)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def get(self, db: Session, id: int) -> Optional[Job]:
+        return db.get(Job, id)
+
+    def claim(self, db: Session) -> Optional[Tuple[int, int]]:
+        """
+        Take the oldest job waiting to run, or running but not heard of for
+        JOB_STALE_SECONDS, and commit. Returns its id and attempt, or None.
+        Concurrent runners skip each other's candidates.
+        """
+        stale = Job.heartbeat_at < func.now() - timedelta(
+            seconds=settings.JOB_STALE_SECONDS
+        )
+        candidate = (
+            select(Job.id)
+            .where(or_(Job.status == "queued", (Job.status == "running") & stale))
+            .order_by(Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == candidate)
+            .values(
+                status="running",
+                attempts=Job.attempts + 1,
+                started_at=func.coalesce(Job.started_at, func.now()),
+                heartbeat_at=func.now(),
+            )
+            .returning(Job.id, Job.attempts)
+        ).first()
+        db.commit()
+        return None if claimed is None else tuple(claimed)
+
+    def _update(self, db: Session, id: int, attempt: int, **values: Any) -> None:
+        matched = db.execute(
+            update(Job)
+            .where(Job.id == id, Job.attempts == attempt)
+            .values(heartbeat_at=func.now(), **values)
+        ).rowcount
+        if not matched:
+            raise StaleJob(id)
+
+    def progress(
+        self,
+        db: Session,
+        id: int,
+        attempt: int,
+        done: int,
+        total: Optional[int] = None,
+        result: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Record the chunks done so far, in the caller's transaction: committed
+        with the last of them, or not at all. Raises `StaleJob` when the job
+        was claimed again meanwhile.
+        """
+        values = {"done": done}
+        if total is not None:
+            values["total"] = total
+        if result is not None:
+            values["result"] = result
+        self._update(db, id, attempt, **values)
+
+    def finish(
+        self, db: Session, id: int, attempt: int, result: Dict[str, Any]
+    ) -> None:
+        self._update(
+            db, id, attempt, status="succeeded", result=result, finished_at=func.now()
+        )
+        db.commit()
+
+    def fail(self, db: Session, id: int, attempt: int, error: str) -> None:
+        self._update(
+            db, id, attempt, status="failed", error=error, finished_at=func.now()
+        )
+        db.commit()
+
+    def requeue(self, db: Session, id: int, attempt: int) -> None:
+        """Put back a job whose run died, to be resumed by the next claim."""
+        db.execute(
+            update(Job)
+            .where(Job.id == id, Job.attempts == attempt, Job.status == "running")
+            .values(status="queued")
+        )
+        db.commit()
+
+
+job = CRUDJob()
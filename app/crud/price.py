@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.crud.dimension import chunks
+from app.db.cache import data_versions, price_series_cache
+from app.models import Category, Item, Price
+from app.utils.series import PriceSeries, chained_index, monthly_means, rolling_mean
+from app import schemas
+
+
+class CRUDPriceHistory:
+    def load_series(
+        self, db: Session, item_ids: Sequence[int]
+    ) -> Dict[int, PriceSeries]:
+        """
+        Whole daily price history (the mean of each day's prices) of the given
+        items. Cached series are reused; the rest are read with one aggregate
+        SELECT per chunk of items and appended straight to typed arrays,
+        without building ORM objects. A series read while a price write
+        commits is returned but not cached, as in `app.api.cache`.
+        """
+        found: Dict[int, PriceSeries] = {}
+        missing = []
+        for item_id in item_ids:
+            series = price_series_cache.get(item_id)
+            if series is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = series
+
+        sequence = data_versions.sequence()
+        for chunk in chunks(missing):
+            loaded = {item_id: PriceSeries() for item_id in chunk}
+            rows = db.execute(
+                select(Price.item_id, Price.date, func.avg(Price.value))
+                .where(Price.item_id.in_(chunk), Price.date.is_not(None))
+                .group_by(Price.item_id, Price.date)
+                .order_by(Price.item_id, Price.date)
+            )
+            for item_id, day, value in rows:
+                series = loaded[item_id]
+                series.days.append(day.toordinal())
+                series.values.append(value)
+            if data_versions.sequence() == sequence:
+                for item_id, series in loaded.items():
+                    price_series_cache.set(item_id, series)
+            found.update(loaded)
+        return found
+
+    def get_series(
+        self,
+        db: Session,
+        *,
+        item_ids: Sequence[int] = (),
+        category: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        window: Optional[int] = None,
+    ) -> List[schemas.ItemPriceSeries]:
+        """
+        Price series of the given items and/or of every item in ``category``,
+        restricted to ``[start_date, end_date)``, with a trailing mean over
+        ``window`` points when given.
+        """
+        stmt = select(Item.id, Item.name).order_by(Item.id)
+        if item_ids:
+            stmt = stmt.where(Item.id.in_(item_ids))
+        if category is not None:
+            stmt = stmt.join(Category, Category.id == Item.category_id).where(
+                Category.name == category
+            )
+        items = db.execute(stmt).all()
+        loaded = self.load_series(db, [item_id for item_id, _ in items])
+
+        results = []
+        for item_id, name in items:
+            series = loaded[item_id].between(start_date, end_date)
+            results.append(
+                schemas.ItemPriceSeries(
+                    item_id=item_id,
+                    item=name,
+                    dates=series.dates(),
+                    values=series.values.tolist(),
+                    rolling=rolling_mean(series.values, window).tolist()
+                    if window
+                    else None,
+                )
+            )
+        return results
+
+    def get_category_index(
+        self,
+        db: Session,
+        *,
+        category: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> List[schemas.CategoryPriceIndex]:
+        """
+        Monthly chained price index (first month = 100) of each category, or
+        of ``category`` only; see `app.utils.series.chained_index`.
+        """
+        stmt = (
+            select(Category.name, Item.id)
+            .select_from(Item)
+            .outerjoin(Category, Category.id == Item.category_id)
+        )
+        if category is not None:
+            stmt = stmt.where(Category.name == category)
+        items_by_category = defaultdict(list)
+        for name, item_id in db.execute(stmt):
+            items_by_category[name].append(item_id)
+        loaded = self.load_series(
+            db, [item_id for ids in items_by_category.values() for item_id in ids]
+        )
+
+        results = []
+        for name in sorted(items_by_category, key=lambda name: (name is None, name)):
+            monthly = (
+                monthly_means(loaded[item_id].between(start_date, end_date))
+                for item_id in items_by_category[name]
+            )
+            results.append(
+                schemas.CategoryPriceIndex(
+                    category=name,
+                    points=[
+                        schemas.PriceIndexPoint(month=month, index=index, items=items)
+                        for month, index, items in chained_index(monthly)
+                    ],
+                )
+            )
+        return results
+
+
+price_history = CRUDPriceHistory()
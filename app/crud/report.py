@@ -0,0 +1,232 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.crud.dimension import chunks
+from app.models import (
+    Category,
+    Family,
+    MonthlySpend,
+    PaymentMethod,
+    TransactionTarget,
+)
+from app.models.payments import TransactionLine
+from app import schemas
+
+# (family_id, month, category_id, payment_method_id, transaction_target_id)
+SpendKey = Tuple[int, date, int, int, int]
+
+
+class SpendDelta:
+    """Accumulates rollup changes in memory so a write path flushes them once."""
+
+    def __init__(self):
+        self.totals: Dict[SpendKey, List] = defaultdict(lambda: [0.0, 0])
+
+    def add(
+        self,
+        *,
+        family_id: Optional[int],
+        day: date,
+        category_id: Optional[int],
+        payment_method_id: Optional[int],
+        transaction_target_id: Optional[int],
+        amount: float,
+    ) -> None:
+        key = (
+            family_id or 0,
+            day.replace(day=1),
+            category_id or 0,
+            payment_method_id or 0,
+            transaction_target_id or 0,
+        )
+        self.totals[key][0] += amount
+        self.totals[key][1] += 1
+
+
+class CRUDMonthlySpend:
+    def __init__(self, model: Type[MonthlySpend]):
+        self.model = model
+
+    def apply(self, db: Session, delta: SpendDelta) -> None:
+        rows = [
+            {
+                "family_id": key[0],
+                "month": key[1],
+                "category_id": key[2],
+                "payment_method_id": key[3],
+                "transaction_target_id": key[4],
+                "total": total,
+                "count": count,
+            }
+            for key, (total, count) in delta.totals.items()
+        ]
+        for chunk in chunks(rows):
+            stmt = insert(MonthlySpend).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=MonthlySpend.__table__.primary_key.columns,
+                set_={
+                    "total": MonthlySpend.total + stmt.excluded.total,
+                    "count": MonthlySpend.count + stmt.excluded.count,
+                },
+            )
+            db.execute(stmt)
+
+    def apply_select(self, db: Session, rollup: Select) -> None:
+        """
+        Set-based counterpart of `apply`: add the rows of ``rollup`` (the key
+        columns, then total and count, already grouped by key) to the rollup.
+        """
+        stmt = insert(MonthlySpend).from_select(
+            [
+                "family_id",
+                "month",
+                "category_id",
+                "payment_method_id",
+                "transaction_target_id",
+                "total",
+                "count",
+            ],
+            rollup,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=MonthlySpend.__table__.primary_key.columns,
+            set_={
+                "total": MonthlySpend.total + stmt.excluded.total,
+                "count": MonthlySpend.count + stmt.excluded.count,
+            },
+        )
+        db.execute(stmt)
+
+    def apply_lines(self, db: Session, *conditions) -> None:
+        """Add the transaction lines matching ``conditions`` to the rollup."""
+        line = TransactionLine
+        key = (
+            func.coalesce(line.family_id, 0),
+            cast(func.date_trunc("month", line.date), Date),
+            func.coalesce(line.category_id, 0),
+            func.coalesce(line.payment_method_id, 0),
+            func.coalesce(line.transaction_target_id, 0),
+        )
+        self.apply_select(
+            db,
+            select(*key, func.sum(line.amount), func.count())
+            .where(*conditions)
+            .group_by(*key),
+        )
+
+    def delete_range(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        family_id: Optional[int] = None,
+    ) -> None:
+        """
+        Drop the rollup rows of the months starting in ``[start, end)``, only
+        those of ``family_id`` when given.
+        """
+        stmt = delete(MonthlySpend)
+        if start_date is not None:
+            stmt = stmt.where(MonthlySpend.month >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(MonthlySpend.month < end_date)
+        if family_id is not None:
+            stmt = stmt.where(MonthlySpend.family_id == family_id)
+        db.execute(stmt)
+
+    def refresh(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> None:
+        """
+        Regenerate the rollup of the months in ``[start, end)`` (everything by
+        default) from the transaction lines, inside the caller's transaction.
+        ``start`` and ``end`` must be the first day of a month.
+        """
+        conditions = []
+        if start_date is not None:
+            conditions.append(TransactionLine.date >= start_date)
+        if end_date is not None:
+            conditions.append(TransactionLine.date < end_date)
+
+        self.delete_range(db, start_date, end_date)
+        self.apply_lines(db, *conditions)
+
+    def rebuild(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> None:
+        """`refresh` the months in ``[start, end)`` and commit."""
+        self.refresh(db, start_date, end_date)
+        db.commit()
+
+    def get_month(
+        self,
+        db: Session,
+        *,
+        year: int,
+        month: int,
+        family: Optional[str] = None,
+    ) -> List[schemas.MonthlySpend]:
+        stmt = (
+            select(
+                MonthlySpend.month,
+                Family.name.label("family"),
+                Category.name.label("category"),
+                PaymentMethod.name.label("payment_method"),
+                TransactionTarget.name.label("transaction_target"),
+                MonthlySpend.total,
+                MonthlySpend.count,
+            )
+            .select_from(MonthlySpend)
+            .outerjoin(Family, Family.id == MonthlySpend.family_id)
+            .outerjoin(Category, Category.id == MonthlySpend.category_id)
+            .outerjoin(PaymentMethod, PaymentMethod.id == MonthlySpend.payment_method_id)
+            .outerjoin(
+                TransactionTarget,
+                TransactionTarget.id == MonthlySpend.transaction_target_id,
+            )
+            .where(MonthlySpend.month == date(year, month, 1))
+            .order_by(MonthlySpend.total.desc())
+        )
+        if family is not None:
+            stmt = stmt.where(Family.name == family)
+        return [schemas.MonthlySpend(**row._mapping) for row in db.execute(stmt)]
+
+    def get_month_by_category(
+        self,
+        db: Session,
+        *,
+        year: int,
+        month: int,
+        family: Optional[str] = None,
+    ) -> List[schemas.CategorySpend]:
+        stmt = (
+            select(
+                Category.name.label("category"),
+                func.sum(MonthlySpend.total).label("total"),
+                func.sum(MonthlySpend.count).label("count"),
+            )
+            .select_from(MonthlySpend)
+            .outerjoin(Category, Category.id == MonthlySpend.category_id)
+            .outerjoin(Family, Family.id == MonthlySpend.family_id)
+            .where(MonthlySpend.month == date(year, month, 1))
+            .group_by(Category.name)
+            .order_by(func.sum(MonthlySpend.total).desc())
+        )
+        if family is not None:
+            stmt = stmt.where(Family.name == family)
+        return [schemas.CategorySpend(**row._mapping) for row in db.execute(stmt)]
+
+
+monthly_spend = CRUDMonthlySpend(MonthlySpend)
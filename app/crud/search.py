@@ -0,0 +1,64 @@
+from typing import List, Type
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.cache import name_indexes
+from app.db.base_class import Base
+from app import schemas
+
+# Shorter queries only get prefix matches: a trigram needs three characters.
+MIN_SIMILAR_LENGTH = 3
+
+
+class CRUDSearch:
+    def names(
+        self, db: Session, model: Type[Base], q: str, limit: int
+    ) -> List[schemas.NameMatch]:
+        """
+        Up to ``limit`` rows of ``model`` (item, transaction target or
+        category) matching ``q``: names starting with it first, by name, then
+        when there are too few, names containing it or similar to it, the
+        closest first. The prefix matches come from the in-memory index, so
+        the usual autocomplete keystroke does not touch the database.
+        """
+        q = q.strip()
+        if not q:
+            return []
+        found = [
+            schemas.NameMatch(id=id_, name=name)
+            for id_, name in self.prefix(db, model, q, limit)
+        ]
+        if len(found) < limit and len(q) >= MIN_SIMILAR_LENGTH:
+            seen = {match.id for match in found}
+            rows = db.execute(
+                select(model.id, model.name)
+                .where(
+                    or_(
+                        model.name.icontains(q, autoescape=True),
+                        model.name.op("%")(q),
+                    ),
+                    model.id.not_in(seen),
+                )
+                .order_by(func.similarity(model.name, q).desc(), model.name)
+                .limit(limit - len(found))
+            )
+            found += [schemas.NameMatch(id=id_, name=name) for id_, name in rows]
+        return found
+
+    @staticmethod
+    def prefix(db: Session, model: Type[Base], q: str, limit: int):
+        index = name_indexes.get(model)
+        if not index.enabled:
+            return db.execute(
+                select(model.id, model.name)
+                .where(model.name.istartswith(q, autoescape=True))
+                .order_by(func.lower(model.name), model.name)
+                .limit(limit)
+            ).all()
+        if not index.loaded:
+            index.load(db.execute(select(model.id, model.name)))
+        return index.search(q, limit)
+
+
+search = CRUDSearch()
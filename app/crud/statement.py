@@ -0,0 +1,413 @@
+import csv
+import traceback
+from typing import IO
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    Float,
+    Identity,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    and_,
+    case,
+    cast,
+    extract,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.crud.account import account
+from app.crud.report import monthly_spend
+from app.db import partitions
+from app.db.cache import (
+    data_versions,
+    name_indexes,
+    prices_changed,
+    rollback,
+    touch,
+)
+from app.db.upsert import previous
+from app.models import (
+    Category,
+    Family,
+    Item,
+    PaymentMethod,
+    Price,
+    Transaction,
+    TransactionTarget,
+    Unit,
+)
+from app.models.payments import (
+    TransactionItemAssociation,
+    TransactionLine,
+    TransactionTargetItem,
+)
+from app import schemas
+
+REQUIRED_COLUMNS = [
+    "date",
+    "payment_method",
+    "item",
+    "transaction_target",
+    "category",
+    "unit",
+    "price",
+]
+OPTIONAL_COLUMNS = ["ref", "family", "quantity"]
+
+DATE_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])$"
+NUMBER_PATTERN = r"^-?\d+(\.\d+)?$"
+
+# Per-import scratch table; it lives in its own MetaData so Alembic never
+# sees it, and disappears with the transaction that created it.
+staging = Table(
+    "import_staging",
+    MetaData(),
+    Column("line", BigInteger, Identity(always=True)),
+    *(Column(name, Text) for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS),
+    Column("error", Text),
+    Column("txn_key", Text),
+    Column("family_id", Integer),
+    Column("unit_id", Integer),
+    Column("category_id", Integer),
+    Column("transaction_target_id", Integer),
+    Column("payment_method_id", Integer),
+    Column("item_id", Integer),
+    Column("transaction_id", Integer),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+def _reject(db: Session, condition, error: str) -> None:
+    db.execute(
+        update(staging)
+        .where(and_(staging.c.error.is_(None), condition))
+        .values(error=error)
+    )
+
+
+def _resolve(db: Session, id_column: Column, model, name_column: Column) -> None:
+    db.execute(
+        update(staging)
+        .where(and_(staging.c.error.is_(None), model.name == name_column))
+        .values({id_column: model.id})
+    )
+
+
+class CRUDStatement:
+    def import_csv(
+        self, db: Session, file: IO[bytes], commit: bool = True
+    ) -> schemas.ImportResult:
+        """
+        Import a CSV statement in one database transaction, committed unless
+        ``commit`` is false.
+
+        The file is streamed into a temporary staging table with ``COPY``;
+        validation, dimension resolution and the fan-out into transactions,
+        items, prices, both association tables and the monthly rollup are all
+        set-based statements over that table. Each row carries a reference
+        (``ref``); rows sharing one become a single transaction, rows without
+        one are a transaction each. Rows that fail validation are reported and
+        take the rest of their transaction with them.
+        """
+        header = next(csv.reader([file.readline().decode("utf-8-sig")]), [])
+        header = [name.strip() for name in header]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        unknown = [
+            name for name in header if name not in REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+        ]
+        if missing or unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Bad CSV header; missing: {missing}, unknown: {unknown}",
+            )
+
+        try:
+            staging.create(db.connection())
+            cursor = db.connection().connection.cursor()
+            cursor.copy_expert(
+                f"COPY {staging.name} ({', '.join(header)}) FROM STDIN WITH (FORMAT csv)",
+                file,
+            )
+            lines = cursor.rowcount
+
+            self._validate(db)
+            self._resolve_dimensions(db)
+            transactions = self._create_transactions(db)
+            self._link(db)
+
+            rejected = [
+                # The header is line 1 of the file.
+                schemas.ImportRejectedRow(line=line + 1, error=error)
+                for line, error in db.execute(
+                    select(staging.c.line, staging.c.error)
+                    .where(staging.c.error.is_not(None))
+                    .order_by(staging.c.line)
+                )
+            ]
+            if commit:
+                db.commit()
+
+        except Exception as e:
+            rollback(db, e)
+            traceback.print_exc()
+            raise HTTPException(
+                status_code=400,
+                detail="An error occurred while importing the statement",
+            )
+
+        return schemas.ImportResult(
+            lines=lines, transactions=transactions, rejected=rejected
+        )
+
+    @staticmethod
+    def _validate(db: Session) -> None:
+        c = staging.c
+        for name in REQUIRED_COLUMNS:
+            _reject(db, func.coalesce(c[name], "") == "", f"Missing {name}.")
+        day = cast(func.substr(c.date, 9, 2), Integer)
+        first_of_month = cast(func.concat(func.substr(c.date, 1, 8), "01"), Date)
+        _reject(
+            db,
+            case(
+                # The pattern bounds month and day; the arithmetic catches
+                # e.g. February 30th without a failing cast.
+                (
+                    c.date.regexp_match(DATE_PATTERN),
+                    extract("day", first_of_month + (day - 1)) != day,
+                ),
+                else_=True,
+            ),
+            "Invalid date.",
+        )
+        _reject(db, ~c.price.regexp_match(NUMBER_PATTERN), "Invalid price.")
+        _reject(
+            db,
+            and_(
+                func.coalesce(c.quantity, "") != "",
+                ~c.quantity.regexp_match(NUMBER_PATTERN),
+            ),
+            "Invalid quantity.",
+        )
+
+        _resolve(db, c.unit_id, Unit, c.unit)
+        _reject(db, c.unit_id.is_(None), "There is no proper unit.")
+        _resolve(db, c.family_id, Family, c.family)
+        _reject(
+            db,
+            and_(func.coalesce(c.family, "") != "", c.family_id.is_(None)),
+            "Unknown family.",
+        )
+
+        # A rejected row takes the rest of its transaction with it.
+        db.execute(
+            update(staging).values(
+                txn_key=func.coalesce(
+                    func.nullif(c.ref, ""), func.concat("line:", c.line)
+                )
+            )
+        )
+        rejected_keys = select(c.txn_key).where(c.error.is_not(None))
+        _reject(db, c.txn_key.in_(rejected_keys), "Rejected with its transaction.")
+
+    @staticmethod
+    def _resolve_dimensions(db: Session) -> None:
+        c = staging.c
+        valid = c.error.is_(None)
+
+        for model, name_column, id_column in (
+            (Category, c.category, c.category_id),
+            (TransactionTarget, c.transaction_target, c.transaction_target_id),
+        ):
+            created = db.execute(
+                insert(model)
+                .from_select(["name"], select(name_column).where(valid).distinct())
+                .on_conflict_do_nothing(index_elements=["name"])
+                .returning(model.id, model.name)
+            )
+            for id_, name in created:
+                name_indexes.stage(db, model, id_, name)
+            _resolve(db, id_column, model, name_column)
+
+        # Payment methods without a family fall under a separate partial
+        # index, so the conflict target is left open and existing rows are
+        # matched with IS NOT DISTINCT FROM.
+        same_payment_method = and_(
+            PaymentMethod.name == c.payment_method,
+            PaymentMethod.family_id.is_not_distinct_from(c.family_id),
+        )
+        new_payment_methods = (
+            select(c.payment_method, c.family_id)
+            .where(valid, ~select(PaymentMethod.id).where(same_payment_method).exists())
+            .distinct()
+        )
+        db.execute(
+            insert(PaymentMethod)
+            .from_select(["name", "family_id"], new_payment_methods)
+            .on_conflict_do_nothing()
+        )
+        db.execute(
+            update(staging)
+            .where(valid, same_payment_method)
+            .values(payment_method_id=PaymentMethod.id)
+        )
+
+        # As in Item.get_item, an existing item keeps its category and unit;
+        # a new one takes them from its first line.
+        first_line = (
+            select(c.item, c.category_id, c.unit_id)
+            .where(valid)
+            .distinct(c.item)
+            .order_by(c.item, c.line)
+        )
+        created = db.execute(
+            insert(Item)
+            .from_select(["name", "category_id", "unit_id"], first_line)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(Item.id, Item.name)
+        )
+        for id_, name in created:
+            name_indexes.stage(db, Item, id_, name)
+        _resolve(db, c.item_id, Item, c.item)
+
+    @staticmethod
+    def _create_transactions(db: Session) -> int:
+        c = staging.c
+        # Draw the ids from the sequence first so they can be written back to
+        # the staging rows, then insert one transaction per key using the date
+        # and payment method of its first line.
+        keys = select(c.txn_key).where(c.error.is_(None)).distinct().subquery()
+        ids = select(
+            keys.c.txn_key,
+            func.nextval(func.pg_get_serial_sequence("transaction", "id")).label("id"),
+        ).subquery()
+        db.execute(
+            update(staging)
+            .where(c.txn_key == ids.c.txn_key)
+            .values(transaction_id=ids.c.id)
+        )
+        first_line = (
+            select(
+                c.transaction_id, c.payment_method_id, cast(c.date, Date).label("date")
+            )
+            .where(c.transaction_id.is_not(None))
+            .distinct(c.transaction_id)
+            .order_by(c.transaction_id, c.line)
+        )
+        first_dates = first_line.subquery().c.date
+        partitions.ensure(db, db.scalars(select(first_dates).distinct()))
+        result = db.execute(
+            insert(Transaction).from_select(
+                ["id", "payment_method_id", "date"], first_line
+            )
+        )
+        return result.rowcount
+
+    @staticmethod
+    def _link(db: Session) -> None:
+        c = staging.c
+        valid = c.transaction_id.is_not(None)
+        line_date = cast(c.date, Date)
+        line_price = cast(c.price, Float)
+
+        # As in Price.get_price, a (date, value) row belongs to the item of
+        # its latest line.
+        prices = (
+            select(c.item_id, line_price, line_date)
+            .where(valid)
+            .distinct(line_date, line_price)
+            .order_by(line_date, line_price, c.line.desc())
+        )
+        stmt = insert(Price.__table__).from_select(
+            ["item_id", "value", "date"], prices
+        )
+        changed = set()
+        for item_id, previous_item_id in db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["date", "value"],
+                set_={"item_id": stmt.excluded.item_id},
+            ).returning(Price.item_id, previous(Price, "item_id"))
+        ):
+            if item_id != previous_item_id:
+                changed.update((item_id, previous_item_id))
+        changed.discard(None)
+        prices_changed(db, changed)
+
+        months = db.scalars(
+            select(func.date_trunc("month", line_date)).where(valid).distinct()
+        )
+        touch(db, *(data_versions.month(month) for month in months))
+
+        db.execute(
+            insert(TransactionItemAssociation)
+            .from_select(
+                ["transaction_id", "item_id"],
+                select(c.transaction_id, c.item_id).where(valid).distinct(),
+            )
+            .on_conflict_do_nothing()
+        )
+        db.execute(
+            insert(TransactionTargetItem)
+            .from_select(
+                ["transaction_target_id", "item_id"],
+                select(c.transaction_target_id, c.item_id).where(valid).distinct(),
+            )
+            .on_conflict_do_nothing()
+        )
+
+        # Dated and paid as their transaction, which takes both from its
+        # first line.
+        quantity = cast(func.coalesce(func.nullif(c.quantity, ""), "1"), Float)
+        lines = (
+            select(
+                c.transaction_id,
+                c.item_id,
+                Transaction.date,
+                PaymentMethod.family_id,
+                Transaction.payment_method_id,
+                c.category_id,
+                c.transaction_target_id,
+                quantity,
+                line_price,
+                quantity * line_price,
+                quantity * Unit.ratio,
+            )
+            .join(Transaction, Transaction.id == c.transaction_id)
+            .join(PaymentMethod, PaymentMethod.id == Transaction.payment_method_id)
+            .join(Unit, Unit.id == c.unit_id)
+            .where(valid)
+            .order_by(c.line)
+        )
+        db.execute(
+            insert(TransactionLine).from_select(
+                [
+                    "transaction_id",
+                    "item_id",
+                    "date",
+                    "family_id",
+                    "payment_method_id",
+                    "category_id",
+                    "transaction_target_id",
+                    "quantity",
+                    "unit_price",
+                    "amount",
+                    "base_quantity",
+                ],
+                lines,
+            )
+        )
+        imported = select(c.transaction_id).where(valid)
+        monthly_spend.apply_lines(db, TransactionLine.transaction_id.in_(imported))
+        account.post(db, Transaction.id.in_(imported))
+
+
+statement = CRUDStatement()
@@ -1,13 +1,32 @@
+import hashlib
+import json
 import traceback
-from datetime import date, timedelta
-from typing import List, Type
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
 
 from fastapi import HTTPException
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql import Select
 
+from app.core.config import settings
+from app.crud.account import account
 from app.crud.base import CRUDBase
+from app.crud.dimension import chunks, get_ids, get_or_create_ids, upsert_prices
+from app.crud.report import SpendDelta, monthly_spend
+from app.db import partitions
+from app.db.cache import (
+    data_versions,
+    dimension_cache,
+    name_indexes,
+    prices_changed,
+    rollback,
+    touch,
+)
 from app.models import (
+    Family,
     Transaction,
     PaymentMethod,
     TransactionTarget,
@@ -16,14 +35,306 @@ from app.models import (
     Item,
     Price,
 )
+from app.models.payments import (
+    TransactionItemAssociation,
+    TransactionLine,
+    TransactionTargetItem,
+)
 from app import schemas
-from app.utils.case import parse_date
+from app.utils.case import month_range, parse_date
+
+
+# Everything schemas.Transaction serializes, loaded up front: the many-to-one
+# payment method joined in, the collections with one SELECT ... IN per level.
+transaction_load_options = (
+    joinedload(Transaction.payment_method),
+    selectinload(Transaction.items).selectinload(Item.prices),
+)
+
+
+def _unit_ratios(db: Session, unit_ids) -> Dict[int, Optional[float]]:
+    """
+    Ratio of each unit: from the dimension cache where known, the rest read in
+    one SELECT and cached alongside the unit ids.
+    """
+    ratios = {}
+    missing = set()
+    for unit_id in set(unit_ids):
+        ratio = dimension_cache.lookup_value(db, Unit, "ratio", unit_id)
+        if ratio is None:
+            missing.add(unit_id)
+        else:
+            ratios[unit_id] = ratio
+    if missing:
+        rows = db.execute(select(Unit.id, Unit.ratio).where(Unit.id.in_(missing)))
+        for unit_id, ratio in rows:
+            ratios[unit_id] = ratio
+            dimension_cache.stage_value(db, Unit, "ratio", unit_id, ratio)
+    return ratios
+
+
+def _line(
+    *,
+    transaction_id: int,
+    date: date,
+    family_id: Optional[int],
+    payment_method_id: int,
+    category_id: int,
+    transaction_target_id: int,
+    item_id: int,
+    item: schemas.ItemData,
+    ratio: Optional[float],
+) -> Dict[str, Any]:
+    """
+    A `TransactionLine` row for ``item``, sold in a unit of ``ratio`` (a
+    number, or a SQL expression).
+    """
+    return {
+        "transaction_id": transaction_id,
+        "item_id": item_id,
+        "date": date,
+        "family_id": family_id,
+        "payment_method_id": payment_method_id,
+        "category_id": category_id,
+        "transaction_target_id": transaction_target_id,
+        "quantity": item.quantity,
+        "unit_price": item.price,
+        "amount": item.quantity * item.price,
+        "base_quantity": None if ratio is None else item.quantity * ratio,
+    }
+
+
+def fingerprint(obj_in: schemas.TransactionCreate, day: date) -> bytes:
+    """
+    Hash of what makes ``obj_in``, dated ``day``, the same transaction as
+    another: its family, date, payment method, and items with their prices
+    and quantities, in any order.
+    """
+    content = [
+        obj_in.family,
+        day.isoformat(),
+        obj_in.payment_method.name,
+        sorted([item.name, item.price, item.quantity] for item in obj_in.items),
+    ]
+    return hashlib.blake2b(json.dumps(content).encode(), digest_size=16).digest()
+
+
+def _paid_by(family_id):
+    return Transaction.payment_method_id.in_(
+        select(PaymentMethod.id).where(PaymentMethod.family_id == family_id)
+    )
 
 
 class CRUDTransaction(
     CRUDBase[Transaction, schemas.TransactionCreate, schemas.TransactionCreate]
 ):
-    def create(self, db: Session, *, obj_in: schemas.TransactionCreate) -> Transaction:
+    # Statements shared by the sync and the AsyncSession read paths.
+
+    @staticmethod
+    def _get_statement(id: Any) -> Select:
+        return (
+            select(Transaction)
+            .options(*transaction_load_options)
+            .where(Transaction.id == id)
+        )
+
+    @staticmethod
+    def _multi_statement(
+        skip: int, limit: int, after: Optional[Tuple[date, int]]
+    ) -> Select:
+        """
+        Page through transactions ordered by ``(date, id)``.
+
+        ``after`` is the ``(date, id)`` of the last row of the previous page;
+        when given, the page is found by a range scan on ``ix_transaction_date_id``
+        instead of skipping ``skip`` rows, so every page costs the same.
+        """
+        stmt = (
+            select(Transaction)
+            .options(*transaction_load_options)
+            .order_by(Transaction.date, Transaction.id)
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Transaction.date, Transaction.id) > after)
+        else:
+            stmt = stmt.offset(skip)
+        return stmt.limit(limit)
+
+    @staticmethod
+    def _month_statement(target: schemas.TransactionDelete) -> Select:
+        start_date, end_date = month_range(target.year, target.month)
+        stmt = (
+            select(Transaction)
+            .options(*transaction_load_options)
+            .where(and_(Transaction.date >= start_date, Transaction.date < end_date))
+            .order_by(Transaction.date, Transaction.id)
+        )
+        if target.family is not None:
+            stmt = stmt.where(
+                _paid_by(
+                    select(Family.id)
+                    .where(Family.name == target.family)
+                    .scalar_subquery()
+                )
+            )
+        return stmt
+
+    @staticmethod
+    def _plain(db: Session, stmt: Select) -> List[Dict[str, Any]]:
+        """
+        Run one of the statements above and return its transactions as the
+        plain dicts `schemas.Transaction` serializes them to, read with flat
+        column queries (transactions and payment methods, item links, prices)
+        instead of building and validating ORM objects. Each item's price list
+        is built once and shared by every transaction that lists the item.
+        """
+        rows = db.execute(
+            stmt.with_only_columns(
+                Transaction.id,
+                Transaction.date,
+                PaymentMethod.name,
+                PaymentMethod.tax_deduction_rate,
+                PaymentMethod.id,
+            )
+            .select_from(Transaction)
+            .outerjoin(PaymentMethod, PaymentMethod.id == Transaction.payment_method_id)
+        ).all()
+        transactions = {}
+        for id_, day, name, tax_deduction_rate, payment_method_id in rows:
+            transactions[id_] = {
+                "date": day,
+                "id": id_,
+                "payment_method": None
+                if payment_method_id is None
+                else {
+                    "name": name,
+                    "tax_deduction_rate": tax_deduction_rate,
+                    "id": payment_method_id,
+                },
+                "items": [],
+            }
+
+        items: Dict[int, Dict[str, Any]] = {}
+        for chunk in chunks(list(transactions)):
+            links = db.execute(
+                select(TransactionItemAssociation.transaction_id, Item.id, Item.name)
+                .join(Item, Item.id == TransactionItemAssociation.item_id)
+                .where(TransactionItemAssociation.transaction_id.in_(chunk))
+                .order_by(TransactionItemAssociation.transaction_id, Item.id)
+            )
+            for transaction_id, item_id, name in links:
+                item = items.get(item_id)
+                if item is None:
+                    item = items[item_id] = {"name": name, "id": item_id, "prices": []}
+                transactions[transaction_id]["items"].append(item)
+
+        for chunk in chunks(list(items)):
+            prices = db.execute(
+                select(Price.item_id, Price.date, Price.id)
+                .where(Price.item_id.in_(chunk))
+                .order_by(Price.item_id, Price.id)
+            )
+            for item_id, day, price_id in prices:
+                items[item_id]["prices"].append({"date": day, "id": price_id})
+
+        return [transactions[id_] for id_, *_ in rows]
+
+    def get(self, db: Session, id: Any) -> Optional[Transaction]:
+        return db.scalars(self._get_statement(id)).first()
+
+    def get_plain(self, db: Session, id: Any) -> Optional[Dict[str, Any]]:
+        transactions = self._plain(db, self._get_statement(id))
+        return transactions[0] if transactions else None
+
+    def get_multi(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Transaction]:
+        return db.scalars(self._multi_statement(skip, limit, after)).all()
+
+    def get_multi_plain(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._plain(db, self._multi_statement(skip, limit, after))
+
+    def find_duplicate(
+        self, db: Session, obj_in: schemas.TransactionCreate
+    ) -> Optional[int]:
+        """
+        Id of an existing transaction with the same `fingerprint` as
+        ``obj_in``, found with one probe of ix_transaction_fingerprint in the
+        partition of its month.
+        """
+        try:
+            day = parse_date(obj_in.date)
+        except ValueError:
+            return None
+        return db.scalar(
+            select(Transaction.id)
+            .where(
+                Transaction.date == day,
+                Transaction.fingerprint == fingerprint(obj_in, day),
+            )
+            .limit(1)
+        )
+
+    @staticmethod
+    def _reject_duplicates(
+        db: Session,
+        results: List[schemas.TransactionBulkResult],
+        keys: Dict[int, Tuple[date, bytes]],
+    ) -> None:
+        """
+        Refuse the transactions of a batch that have the same content as an
+        existing transaction or as an earlier one of the batch, by their
+        ``(date, fingerprint)`` ``keys``.
+        """
+        pending = {
+            i: keys[i] for i, result in enumerate(results) if result.error is None
+        }
+        existing = {}
+        for chunk in chunks(list(pending.values())):
+            rows = db.execute(
+                select(Transaction.id, Transaction.date, Transaction.fingerprint)
+                .where(
+                    Transaction.date.in_({day for day, _ in chunk}),
+                    Transaction.fingerprint.in_({digest for _, digest in chunk}),
+                )
+            )
+            for id_, day, digest in rows:
+                existing[(day, bytes(digest))] = id_
+        first = {}
+        for i, key in pending.items():
+            if key in existing:
+                results[i].error = f"Transaction {existing[key]} has the same content."
+            elif key in first:
+                results[i].error = f"Same content as the transaction at {first[key]}."
+            else:
+                first[key] = i
+
+    def create(
+        self, db: Session, *, obj_in: schemas.TransactionCreate, commit: bool = True
+    ) -> Transaction:
+        """
+        Create a transaction, and commit unless ``commit`` is false; the
+        caller then commits it with writes of its own.
+        """
+        if settings.REJECT_DUPLICATE_TRANSACTIONS:
+            duplicate = self.find_duplicate(db, obj_in)
+            if duplicate is not None:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Transaction {duplicate} has the same content.",
+                )
         # Extract data from obj_in
         try:
             with db.begin_nested():
@@ -38,6 +349,10 @@ class CRUDTransaction(
                     payment_method_id=payment_method.id,
                     date=parse_date(obj_in.date),
                 )
+                transaction.fingerprint = fingerprint(obj_in, transaction.date)
+                partitions.ensure(db, [transaction.date])
+                spend = SpendDelta()
+                lines = []
                 for item in items:
                     transaction_target = TransactionTarget.get_transaction_target(
                         db=db, transaction_target=item.transaction_target
@@ -52,24 +367,65 @@ class CRUDTransaction(
                     }
                     new_item = Item.get_item(db=db, item_dict=item_dict)
 
-                    # Create the price
-                    price = Price.get_price(
-                        db=db, value=item.price, date_str=obj_in.date
+                    # Create the price, associated with the item
+                    Price.get_price(
+                        db=db,
+                        value=item.price,
+                        date_str=obj_in.date,
+                        item_id=new_item.id,
                     )
 
-                    # Associate the price with the item
-                    new_item.prices.append(price)
                     transaction.items.append(new_item)
-                    transaction_target.items.append(new_item)
-                db.add(price)
-
+                    db.execute(
+                        insert(TransactionTargetItem)
+                        .values(
+                            transaction_target_id=transaction_target.id,
+                            item_id=new_item.id,
+                        )
+                        .on_conflict_do_nothing()
+                    )
+                    lines.append(
+                        (item, new_item.id, category.id, transaction_target.id, unit.id)
+                    )
+                    spend.add(
+                        family_id=payment_method.family_id,
+                        day=transaction.date,
+                        category_id=category.id,
+                        payment_method_id=payment_method.id,
+                        transaction_target_id=transaction_target.id,
+                        amount=item.quantity * item.price,
+                    )
                 # Create the transaction
 
                 db.add(transaction)
-                db.commit()
+                db.flush()
+                rows = [
+                    _line(
+                        transaction_id=transaction.id,
+                        date=transaction.date,
+                        family_id=payment_method.family_id,
+                        payment_method_id=payment_method.id,
+                        category_id=category_id,
+                        transaction_target_id=target_id,
+                        item_id=item_id,
+                        item=item,
+                        # Looked up by the INSERT itself.
+                        ratio=select(Unit.ratio)
+                        .where(Unit.id == unit_id)
+                        .scalar_subquery(),
+                    )
+                    for item, item_id, category_id, target_id, unit_id in lines
+                ]
+                if rows:
+                    db.execute(insert(TransactionLine).values(rows))
+                account.post(db, Transaction.id == transaction.id)
+                monthly_spend.apply(db, spend)
+                touch(db, data_versions.month(transaction.date))
+                if commit:
+                    db.commit()
 
         except Exception as e:
-            db.rollback()
+            rollback(db, e)
             traceback.print_exc()
             raise HTTPException(
                 status_code=400,
@@ -79,41 +435,498 @@ class CRUDTransaction(
         db.refresh(transaction)
         return transaction
 
-    def delete_all(self, db: Session):
-        db.query(Transaction).all().delete(synchronize_session=False)
+    def create_bulk(
+        self,
+        db: Session,
+        *,
+        objs_in: List[schemas.TransactionCreate],
+        commit: bool = True,
+    ) -> List[schemas.TransactionBulkResult]:
+        """
+        Create many transactions at once.
+
+        Instead of the per-item get-or-create round trips of ``create``, the
+        distinct dimension keys of the whole batch are resolved with a few
+        set-based statements, and the transactions and association rows are
+        written with executemany. Transactions that cannot be created (bad
+        date, unknown unit, or with REJECT_DUPLICATE_TRANSACTIONS set, the same
+        content as another) are reported in their result and skipped; the rest
+        of the batch is written in a single database transaction, committed
+        unless ``commit`` is false.
+        """
+        results = [schemas.TransactionBulkResult(index=i) for i in range(len(objs_in))]
+        dates = {}
+        for i, obj_in in enumerate(objs_in):
+            try:
+                dates[i] = parse_date(obj_in.date)
+            except ValueError:
+                results[i].error = "Invalid date."
+
+        try:
+            families = get_ids(
+                db,
+                Family,
+                ["name"],
+                {(obj_in.family,) for obj_in in objs_in if obj_in.family is not None},
+            )
+            units = get_ids(
+                db,
+                Unit,
+                ["name"],
+                {(item.unit,) for obj_in in objs_in for item in obj_in.items},
+            )
+            for i, obj_in in enumerate(objs_in):
+                if results[i].error is None and any(
+                    (item.unit,) not in units for item in obj_in.items
+                ):
+                    results[i].error = "There is no proper unit."
+            keys = {i: (day, fingerprint(objs_in[i], day)) for i, day in dates.items()}
+            if settings.REJECT_DUPLICATE_TRANSACTIONS:
+                self._reject_duplicates(db, results, keys)
+            valid = [i for i, result in enumerate(results) if result.error is None]
+
+            payment_method_rows = {}
+            category_rows = {}
+            target_rows = {}
+            for i in valid:
+                obj_in = objs_in[i]
+                family_id = families.get((obj_in.family,))
+                payment_method_rows[(obj_in.payment_method.name, family_id)] = {
+                    "name": obj_in.payment_method.name,
+                    "family_id": family_id,
+                }
+                for item in obj_in.items:
+                    category_rows[(item.category,)] = {"name": item.category}
+                    target_rows[(item.transaction_target,)] = {
+                        "name": item.transaction_target
+                    }
+            payment_methods = get_or_create_ids(
+                db, PaymentMethod, ["name", "family_id"], payment_method_rows
+            )
+            categories = get_or_create_ids(db, Category, ["name"], category_rows)
+            targets = get_or_create_ids(db, TransactionTarget, ["name"], target_rows)
+
+            item_rows = {}
+            for i in valid:
+                for item in objs_in[i].items:
+                    item_rows.setdefault(
+                        (item.name,),
+                        {
+                            "name": item.name,
+                            "category_id": categories[(item.category,)],
+                            "unit_id": units[(item.unit,)],
+                        },
+                    )
+            items = get_or_create_ids(db, Item, ["name"], item_rows)
+
+            prices = {}
+            for i in valid:
+                for item in objs_in[i].items:
+                    prices[(dates[i], item.price)] = items[(item.name,)]
+            upsert_prices(db, prices)
+
+            # Reserve the ids up front so the rows can go out with executemany
+            # and still be matched back to their position in the batch.
+            transaction_ids = db.scalars(
+                select(
+                    func.nextval(func.pg_get_serial_sequence("transaction", "id"))
+                ).select_from(func.generate_series(1, len(valid)))
+            ).all()
+
+            ratios = _unit_ratios(db, units.values())
+            transaction_rows = []
+            line_rows = []
+            item_links = set()
+            target_links = set()
+            spend = SpendDelta()
+            for i, transaction_id in zip(valid, transaction_ids):
+                obj_in = objs_in[i]
+                family_id = families.get((obj_in.family,))
+                payment_method_id = payment_methods[
+                    (obj_in.payment_method.name, family_id)
+                ]
+                transaction_rows.append(
+                    {
+                        "id": transaction_id,
+                        "payment_method_id": payment_method_id,
+                        "date": dates[i],
+                        "fingerprint": keys[i][1],
+                    }
+                )
+                for item in obj_in.items:
+                    item_id = items[(item.name,)]
+                    target_id = targets[(item.transaction_target,)]
+                    item_links.add((transaction_id, item_id))
+                    target_links.add((target_id, item_id))
+                    line = _line(
+                        transaction_id=transaction_id,
+                        date=dates[i],
+                        family_id=family_id,
+                        payment_method_id=payment_method_id,
+                        category_id=categories[(item.category,)],
+                        transaction_target_id=target_id,
+                        item_id=item_id,
+                        item=item,
+                        ratio=ratios[units[(item.unit,)]],
+                    )
+                    line_rows.append(line)
+                    spend.add(
+                        family_id=family_id,
+                        day=dates[i],
+                        category_id=line["category_id"],
+                        payment_method_id=payment_method_id,
+                        transaction_target_id=target_id,
+                        amount=line["amount"],
+                    )
+                results[i].id = transaction_id
+
+            partitions.ensure(db, (dates[i] for i in valid))
+            for chunk in chunks(transaction_rows):
+                db.execute(insert(Transaction), chunk)
+            for chunk in chunks(sorted(item_links)):
+                db.execute(
+                    insert(TransactionItemAssociation).on_conflict_do_nothing(),
+                    [
+                        {"transaction_id": transaction_id, "item_id": item_id}
+                        for transaction_id, item_id in chunk
+                    ],
+                )
+            for chunk in chunks(line_rows):
+                db.execute(insert(TransactionLine), chunk)
+            if transaction_ids:
+                account.post(db, Transaction.id.in_(transaction_ids))
+            for chunk in chunks(sorted(target_links)):
+                db.execute(
+                    insert(TransactionTargetItem).on_conflict_do_nothing(),
+                    [
+                        {"transaction_target_id": target_id, "item_id": item_id}
+                        for target_id, item_id in chunk
+                    ],
+                )
+            monthly_spend.apply(db, spend)
+            touch(db, *{data_versions.month(dates[i]) for i in valid})
+            if commit:
+                db.commit()
+
+        except Exception as e:
+            rollback(db, e)
+            traceback.print_exc()
+            raise HTTPException(
+                status_code=400,
+                detail="An error occurred while creating the transactions",
+            )
+
+        return results
+
+    def delete_all(self, db: Session) -> List[int]:
+        return self.delete_range(db)
 
     def delete_month(self, db: Session, target: schemas.TransactionDelete) -> List[int]:
-        start_date = date(target.year, target.month, 1)
-        end_date = start_date + timedelta(days=32)
-        end_date = end_date.replace(day=1)
-        results = (
-            db.query(Transaction)
-            .with_entities(Transaction.id)
-            .filter(and_(Transaction.date >= start_date, Transaction.date < end_date))
-            .all()
-        )
-        results = [item[0] for item in results]
+        start_date, end_date = month_range(target.year, target.month)
+        return self.delete_range(db, start_date, end_date, family=target.family)
 
-        db.query(Transaction).filter(
-            and_(Transaction.date >= start_date, Transaction.date < end_date)
-        ).delete(synchronize_session=False)
-        db.commit()
+    def delete_range(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        family: Optional[str] = None,
+        commit: bool = True,
+    ) -> List[int]:
+        """
+        Delete the transactions dated in ``[start_date, end_date)`` (unbounded
+        on a side left as None), only those paid by ``family`` when given, and
+        commit unless ``commit`` is false.
+        Without ``family``, the months the range covers entirely are emptied
+        by truncating their partitions, locked before anything is read from
+        them (see `partitions.lock`). What is left goes in a single ``DELETE
+        ... RETURNING id``, run first so that the lines, association rows
+        and ledger entries removed after it are exactly those of the
+        transactions it deleted, whatever commits meanwhile. Items and prices
+        left unreferenced stay until `sweep_orphans` runs.
+        """
+        conditions = []
+        family_id = None
+        if family is not None:
+            family_id = Family.get_family_id(db, family)
+            if family_id is None:
+                return []
+            conditions.append(_paid_by(family_id))
+        if start_date is not None:
+            conditions.append(Transaction.date >= start_date)
+        if end_date is not None:
+            conditions.append(Transaction.date < end_date)
+
+        truncated = []
+        if family is None:
+            truncated = [
+                month
+                for month in partitions.covered(db, start_date, end_date)
+                if partitions.lock(db, month)
+            ]
+
+        results = []
+        for month in truncated:
+            in_month = select(Transaction.id).where(
+                Transaction.date >= month,
+                Transaction.date < partitions.next_month(month),
+            )
+            results += db.scalars(in_month).all()
+            account.unpost(db, in_month)
+            db.execute(
+                delete(TransactionItemAssociation).where(
+                    TransactionItemAssociation.transaction_id.in_(in_month)
+                )
+            )
+            partitions.truncate(db, month)
+
+        rest = conditions + [
+            ~and_(
+                Transaction.date >= month,
+                Transaction.date < partitions.next_month(month),
+            )
+            for month in truncated
+        ]
+        deleted = db.scalars(
+            delete(Transaction)
+            .where(*rest)
+            .returning(Transaction.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for chunk in chunks(deleted):
+            account.unpost(db, chunk)
+            db.execute(
+                delete(TransactionItemAssociation).where(
+                    TransactionItemAssociation.transaction_id.in_(chunk)
+                )
+            )
+            db.execute(
+                delete(TransactionLine)
+                .where(TransactionLine.transaction_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+        results += deleted
+
+        if results:
+            # Months covered entirely lose their rollup rows; a month the range
+            # only cuts into is regenerated from what is left of it.
+            edges = set()
+            full_start, full_end = start_date, end_date
+            if start_date is not None and start_date.day != 1:
+                edges.add(month_range(start_date.year, start_date.month))
+                full_start = month_range(start_date.year, start_date.month)[1]
+            if end_date is not None and end_date.day != 1:
+                edges.add(month_range(end_date.year, end_date.month))
+                full_end = end_date.replace(day=1)
+            if full_start is None or full_end is None or full_start < full_end:
+                monthly_spend.delete_range(db, full_start, full_end, family_id)
+            for month_start, month_end in sorted(edges):
+                monthly_spend.refresh(db, month_start, month_end)
+
+            if start_date is None or end_date is None:
+                touch(db, data_versions.ALL)
+            else:
+                month = start_date.replace(day=1)
+                while month < end_date:
+                    touch(db, data_versions.month(month))
+                    month = month_range(month.year, month.month)[1]
+        if commit:
+            db.commit()
 
         return results
 
+    def sweep_orphans(
+        self,
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        batch_size: int = 1000,
+    ) -> Tuple[int, int]:
+        """
+        Garbage-collect what deleted transactions leave behind, committing
+        every ``batch_size`` rows so that no lock is held for long:
+
+        * prices dated in ``[start_date, end_date)`` on which no transaction
+          of their item took place;
+        * items no transaction refers to, along with all their prices.
+
+        Rows locked by a concurrent writer are skipped and left for the next
+        sweep. Returns the number of prices and items deleted.
+        """
+        referenced = (
+            select(TransactionItemAssociation.item_id)
+            .join(
+                Transaction,
+                Transaction.id == TransactionItemAssociation.transaction_id,
+            )
+            .where(
+                TransactionItemAssociation.item_id == Price.item_id,
+                Transaction.date == Price.date,
+            )
+            .exists()
+        )
+        orphan_prices = select(Price.id).where(~referenced).order_by(Price.id)
+        if start_date is not None:
+            orphan_prices = orphan_prices.where(Price.date >= start_date)
+        if end_date is not None:
+            orphan_prices = orphan_prices.where(Price.date < end_date)
+
+        prices, last_id = 0, 0
+        while True:
+            batch = (
+                orphan_prices.where(Price.id > last_id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            deleted = db.execute(
+                delete(Price)
+                .where(Price.id.in_(batch))
+                .returning(Price.id, Price.item_id)
+            ).all()
+            prices_changed(db, (item_id for _, item_id in deleted))
+            db.commit()
+            prices += len(deleted)
+            if len(deleted) < batch_size:
+                break
+            last_id = max(price_id for price_id, _ in deleted)
+
+        orphan_items = (
+            select(Item.id)
+            .where(
+                ~select(TransactionItemAssociation.item_id)
+                .where(TransactionItemAssociation.item_id == Item.id)
+                .exists()
+            )
+            .order_by(Item.id)
+        )
+        items, last_id = 0, 0
+        while True:
+            ids = db.scalars(
+                orphan_items.where(Item.id > last_id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if ids:
+                db.execute(delete(Price).where(Price.item_id.in_(ids)))
+                deleted = db.execute(
+                    delete(Item).where(Item.id.in_(ids)).returning(Item.id, Item.name)
+                ).all()
+                prices_changed(db, ids)
+                db.commit()
+                for item_id, name in deleted:
+                    dimension_cache.evict(Item, (name,))
+                    name_indexes.discard(Item, item_id, name)
+                items += len(deleted)
+            if len(ids) < batch_size:
+                break
+            last_id = ids[-1]
+
+        db.commit()
+        return prices, items
+
     def retrive_month(
         self, db: Session, target: schemas.TransactionDelete
     ) -> list[schemas.Transaction]:
-        start_date = date(target.year, target.month, 1)
-        end_date = start_date + timedelta(days=32)
-        end_date = end_date.replace(day=1)
-
-        results = (
-            db.query(Transaction)
-            .filter(and_(Transaction.date >= start_date, Transaction.date < end_date))
-            .all()
+        return db.scalars(self._month_statement(target)).all()
+
+    def retrive_month_plain(
+        self, db: Session, target: schemas.TransactionDelete
+    ) -> List[Dict[str, Any]]:
+        return self._plain(db, self._month_statement(target))
+
+    def stream_range(
+        self,
+        db: Session,
+        start_date: date,
+        end_date: date,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Transaction]]:
+        """
+        Yield the transactions in ``[start_date, end_date)`` in batches, read
+        through a server-side cursor. The session's identity map only holds
+        weak references, so batches the caller has dropped are freed and
+        memory stays flat however long the range is.
+        """
+        stmt = (
+            select(Transaction)
+            .options(*transaction_load_options)
+            .where(and_(Transaction.date >= start_date, Transaction.date < end_date))
+            .order_by(Transaction.date, Transaction.id)
+            .execution_options(yield_per=batch_size)
         )
-        return results
+        yield from db.scalars(stmt).partitions()
+
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[Transaction]:
+        result = await db.scalars(
+            self._get_statement(id).execution_options(populate_existing=True)
+        )
+        return result.first()
+
+    async def aget_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Transaction]:
+        result = await db.scalars(self._multi_statement(skip, limit, after))
+        return result.all()
+
+    async def aretrive_month(
+        self, db: AsyncSession, target: schemas.TransactionDelete
+    ) -> list[schemas.Transaction]:
+        result = await db.scalars(self._month_statement(target))
+        return result.all()
+
+    # The write paths are a handful of statements each; they run the sync
+    # implementation on the AsyncSession's connection rather than duplicate it.
+
+    async def acreate(
+        self, db: AsyncSession, *, obj_in: schemas.TransactionCreate
+    ) -> Transaction:
+        transaction = await db.run_sync(
+            lambda session: self.create(session, obj_in=obj_in)
+        )
+        return await self.aget(db, id=transaction.id)
+
+    async def acreate_bulk(
+        self, db: AsyncSession, *, objs_in: List[schemas.TransactionCreate]
+    ) -> List[schemas.TransactionBulkResult]:
+        return await db.run_sync(
+            lambda session: self.create_bulk(session, objs_in=objs_in)
+        )
+
+    async def aget_plain(
+        self, db: AsyncSession, id: Any
+    ) -> Optional[Dict[str, Any]]:
+        return await db.run_sync(lambda session: self.get_plain(session, id))
+
+    async def aget_multi_plain(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[date, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        return await db.run_sync(
+            lambda session: self.get_multi_plain(
+                session, skip=skip, limit=limit, after=after
+            )
+        )
+
+    async def aretrive_month_plain(
+        self, db: AsyncSession, target: schemas.TransactionDelete
+    ) -> List[Dict[str, Any]]:
+        return await db.run_sync(
+            lambda session: self.retrive_month_plain(session, target)
+        )
+
+    async def adelete_month(
+        self, db: AsyncSession, target: schemas.TransactionDelete
+    ) -> List[int]:
+        return await db.run_sync(lambda session: self.delete_month(session, target))
 
 
 transaction = CRUDTransaction(Transaction)
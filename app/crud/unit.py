@@ -1,10 +1,26 @@
+from typing import Any, Dict, Union
+
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
+from app.db.cache import dimension_cache, invalidate
 from app.models import Unit
 from app.schemas.payments import UnitCreate
 
 
 class CRUDUnit(CRUDBase[Unit, UnitCreate, UnitCreate]):
-    pass
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Unit,
+        obj_in: Union[UnitCreate, Dict[str, Any]]
+    ) -> Unit:
+        # Bulk transaction writes take the ratio from the dimension cache.
+        invalidate(
+            db, dimension_cache, dimension_cache.value_key(Unit, "ratio", db_obj.id)
+        )
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
 
 
 crud_unit = CRUDUnit(Unit)
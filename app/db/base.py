@@ -14,3 +14,7 @@ from app.models.payments import (  # noqa
     Unit,
     Family,
 )
+from app.models.report import MonthlySpend  # noqa
+from app.models.ledger import AccountSnapshot, LedgerEntry  # noqa
+from app.models.idempotency import IdempotencyKey  # noqa
+from app.models.job import Job  # noqa
@@ -0,0 +1,234 @@
+from datetime import date
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.db.base_class import Base
+from app.utils.cache_backend import CacheBackend, MemoryCacheBackend
+from app.utils.lru import LRUCache
+from app.utils.prefix_index import PrefixIndex
+
+_STAGED = "dimension_cache_staged"
+_INVALIDATED = "invalidate_on_commit"
+_TOUCHED = "data_versions_touched"
+_NAMED = "name_indexes_staged"
+
+
+class DimensionCache(LRUCache):
+    """
+    Process-wide ``key -> id`` cache for the small lookup tables (family,
+    category, unit, transaction target, payment method, item).
+
+    Ids learned inside a session are only *staged* on it and become visible to
+    other sessions once that session commits, so a rolled back insert can
+    never leave a dangling id behind.
+
+    Column values bulk writes need for each row, such as a unit's ratio, are
+    kept alongside the ids under `value_key`.
+    """
+
+    @staticmethod
+    def _cache_key(model: Base, key: Tuple) -> Tuple[str, Tuple]:
+        return model.__tablename__, key
+
+    def lookup(self, db: Session, model: Base, key: Tuple) -> Optional[int]:
+        cache_key = self._cache_key(model, key)
+        staged = db.info.get(_STAGED)
+        if staged and cache_key in staged:
+            return staged[cache_key]
+        return self.get(cache_key)
+
+    def stage(self, db: Session, model: Base, key: Tuple, id: int) -> None:
+        if self.enabled:
+            db.info.setdefault(_STAGED, {})[self._cache_key(model, key)] = id
+
+    def evict(self, model: Base, key: Tuple) -> None:
+        self.discard(self._cache_key(model, key))
+
+    @classmethod
+    def value_key(cls, model: Base, column: str, id: int) -> Tuple[str, Tuple]:
+        return cls._cache_key(model, (column, id))
+
+    def lookup_value(
+        self, db: Session, model: Base, column: str, id: int
+    ) -> Optional[Any]:
+        return self.lookup(db, model, (column, id))
+
+    def stage_value(
+        self, db: Session, model: Base, column: str, id: int, value: Any
+    ) -> None:
+        self.stage(db, model, (column, id), value)
+
+
+dimension_cache = DimensionCache(
+    maxsize=settings.DIMENSION_CACHE_SIZE, enabled=settings.DIMENSION_CACHE_ENABLED
+)
+
+# item_id -> app.utils.series.PriceSeries, see app.crud.price.
+price_series_cache = LRUCache(
+    maxsize=settings.PRICE_SERIES_CACHE_SIZE,
+    enabled=settings.PRICE_SERIES_CACHE_ENABLED,
+)
+
+
+class NameIndexes:
+    """
+    Process-wide `PrefixIndex` of the names autocomplete looks up, per table;
+    see app.crud.search. Each is read from its table on first use; names a
+    session resolves are staged on it and indexed once it commits.
+    """
+
+    TABLES = ("item", "transaction_target", "category")
+
+    def __init__(self, enabled: bool = True):
+        self.indexes = {table: PrefixIndex(enabled=enabled) for table in self.TABLES}
+
+    def get(self, model: Base) -> PrefixIndex:
+        return self.indexes[model.__tablename__]
+
+    def stage(self, db: Session, model: Base, id: int, name: str) -> None:
+        index = self.indexes.get(model.__tablename__)
+        if index is not None and index.enabled:
+            db.info.setdefault(_NAMED, []).append((index, id, name))
+
+    def discard(self, model: Base, id: int, name: str) -> None:
+        index = self.indexes.get(model.__tablename__)
+        if index is not None:
+            index.discard(id, name)
+
+    def clear(self) -> None:
+        for index in self.indexes.values():
+            index.clear()
+
+
+name_indexes = NameIndexes(enabled=settings.NAME_INDEX_ENABLED)
+
+
+def invalidate_all() -> None:
+    """
+    Forget everything cached from the database, after writes made by another
+    process (see app.core.jobs): cached ids and name indexes are read again,
+    cached responses are rebuilt.
+    """
+    dimension_cache.clear()
+    price_series_cache.clear()
+    name_indexes.clear()
+    data_versions.bump([data_versions.ALL])
+
+
+def invalidate(db: Session, cache: LRUCache, key: Hashable) -> None:
+    """
+    Drop ``key`` from ``cache`` now, and again once ``db`` commits so that a
+    reader racing the write cannot leave the pre-commit value behind.
+    """
+    cache.discard(key)
+    db.info.setdefault(_INVALIDATED, []).append((cache, key))
+
+
+class DataVersions:
+    """
+    Version counters of the data cached responses are built from: a month of
+    transactions, an item's price history, and ``ALL`` for changes that
+    cannot be narrowed down. They live in the response cache backend; see
+    app.api.cache.
+    """
+
+    ALL = "all"
+    # Bumped ahead of any other counter, see `bump`.
+    SEQUENCE = "sequence"
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @staticmethod
+    def month(day: Optional[date]) -> str:
+        return "month:none" if day is None else f"month:{day:%Y-%m}"
+
+    @staticmethod
+    def item(item_id: int) -> str:
+        return f"item:{item_id}"
+
+    def current(self, keys: Sequence[str]) -> List[int]:
+        return self.backend.get_counters(keys)
+
+    def sequence(self) -> int:
+        return self.backend.get_counters([self.SEQUENCE])[0]
+
+    def bump(self, keys: Iterable[str]) -> None:
+        # A reader that finds the sequence unchanged after reading its
+        # versions therefore knows none of them moved in the meantime.
+        self.backend.incr(self.SEQUENCE)
+        for key in keys:
+            self.backend.incr(key)
+
+
+data_versions = DataVersions(
+    MemoryCacheBackend(
+        maxsize=settings.RESPONSE_CACHE_SIZE, enabled=settings.RESPONSE_CACHE_ENABLED
+    )
+)
+
+
+def touch(db: Session, *keys: str) -> None:
+    """Bump the data versions of ``keys`` once ``db`` commits."""
+    db.info.setdefault(_TOUCHED, set()).update(keys)
+
+
+def prices_changed(db: Session, item_ids: Iterable[int]) -> None:
+    """Invalidate what is derived from the price histories of ``item_ids``."""
+    for item_id in set(item_ids):
+        invalidate(db, price_series_cache, item_id)
+        touch(db, data_versions.item(item_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_staged(session: Session) -> None:
+    staged: Dict[Hashable, int] = session.info.pop(_STAGED, None)
+    if staged:
+        for cache_key, id_ in staged.items():
+            dimension_cache.set(cache_key, id_)
+    for cache, key in session.info.pop(_INVALIDATED, ()):
+        cache.discard(key)
+    touched = session.info.pop(_TOUCHED, None)
+    if touched:
+        data_versions.bump(touched)
+    for index, id_, name in session.info.pop(_NAMED, ()):
+        index.add(id_, name)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_staged(session: Session, previous_transaction) -> None:
+    session.info.pop(_STAGED, None)
+    session.info.pop(_INVALIDATED, None)
+    session.info.pop(_TOUCHED, None)
+    session.info.pop(_NAMED, None)
+
+
+def cached_instance(db: Session, model: Base, id: int, **values: Any) -> Base:
+    """
+    Return a persistent instance for a cached id without emitting a SELECT.
+
+    Only the given column values are populated; any other attribute is loaded
+    lazily on first access.
+    """
+    obj = model(id=id, **values)
+    make_transient_to_detached(obj)
+    return db.merge(obj, load=False)
+
+
+def rollback(db: Session, exc: Exception) -> None:
+    """
+    Roll back a failed ingest and drop cached ids that can no longer be
+    trusted: everything when the rollback itself fails, or when a unique
+    constraint conflict shows the cache disagrees with the database.
+    """
+    try:
+        db.rollback()
+    except Exception:
+        dimension_cache.clear()
+        raise
+    if isinstance(exc, IntegrityError):
+        dimension_cache.clear()
@@ -0,0 +1,152 @@
+"""
+EXPLAIN-based check that the month-scoped queries use their indexes.
+
+    python -m app.db.explain [year] [month]
+
+Queries on the partitioned transaction table must also be pruned to the one
+partition of the month; their index is then found under the partition's name
+for it (``transaction_pYYYY_MM_date_id_idx``), which is accepted as the
+parent's.
+
+Sequential scans are disabled for the check so that it reports whether the
+planner can answer each query from its index rather than whether it prefers
+to at the current table size. Run it against representative data: on a
+near-empty table any index is as cheap as any other and the choice is noise.
+"""
+import re
+import sys
+from datetime import date
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, select, text
+from sqlalchemy.orm import Session
+
+from app.db import partitions
+from app.db.session import SessionLocal
+from app.models import Price, Transaction
+from app.utils.case import month_range
+
+
+# Relations a plan node reads or writes: "Seq Scan on x", "Delete on x", ...
+_RELATION = re.compile(r"\bon (\w+)")
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    index: str
+    used: bool
+    plan: str
+    # Partitions the plan touches, and whether that is only the expected one;
+    # None for an unpartitioned table.
+    scanned: Tuple[str, ...] = ()
+    pruned: Optional[bool] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.used and self.pruned is not False
+
+
+def explain(db: Session, stmt) -> str:
+    compiled = stmt.compile(dialect=db.get_bind().dialect)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+    return "\n".join(row[0] for row in rows)
+
+
+def index_names(db: Session, index: str) -> Set[str]:
+    """``index`` and the indexes of its table's partitions attached to it."""
+    children = db.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits AS i "
+            "JOIN pg_class AS c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:index AS regclass)"
+        ),
+        {"index": index},
+    ).all()
+    return {index, *children}
+
+
+def check_month_queries(db: Session, year: int, month: int) -> List[PlanCheck]:
+    start_date, end_date = month_range(year, month)
+    in_month = and_(Transaction.date >= start_date, Transaction.date < end_date)
+    checks = [
+        (
+            "retrive_month",
+            "transaction",
+            "ix_transaction_date_id",
+            select(Transaction).where(in_month),
+        ),
+        (
+            "delete_month",
+            "transaction",
+            "ix_transaction_date_id",
+            delete(Transaction).where(in_month),
+        ),
+        (
+            "payment_method_month",
+            "transaction",
+            "ix_transaction_payment_method_id_date",
+            select(Transaction).where(Transaction.payment_method_id == 1, in_month),
+        ),
+        (
+            "item_price_month",
+            "price",
+            "ix_price_item_id_date",
+            select(Price).where(
+                Price.item_id == 1, Price.date >= start_date, Price.date < end_date
+            ),
+        ),
+    ]
+
+    results = []
+    try:
+        db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for name, table, index, stmt in checks:
+            plan = explain(db, stmt)
+            used = any(
+                re.search(rf"\b{index_name}\b", plan)
+                for index_name in index_names(db, index)
+            )
+            if table not in partitions.PARTITIONED_TABLES:
+                results.append(PlanCheck(name, index, used, plan))
+                continue
+            scanned = tuple(
+                sorted(
+                    {
+                        relation
+                        for relation in _RELATION.findall(plan)
+                        if partitions.is_partition(relation)
+                    }
+                )
+            )
+            expected = (partitions.partition_name(table, start_date),)
+            results.append(
+                PlanCheck(name, index, used, plan, scanned, scanned == expected)
+            )
+    finally:
+        db.rollback()
+    return results
+
+
+def main(argv: List[str]) -> int:
+    today = date.today()
+    year = int(argv[0]) if argv else today.year
+    month = int(argv[1]) if len(argv) > 1 else today.month
+
+    db = SessionLocal()
+    try:
+        results = check_month_queries(db, year, month)
+    finally:
+        db.close()
+
+    for result in results:
+        line = f"{'ok' if result.ok else 'FAIL':4} {result.name}: {result.index}"
+        if result.pruned is not None:
+            line += f", partitions {', '.join(result.scanned) or 'none'}"
+        print(line)
+        if not result.ok:
+            print(result.plan)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
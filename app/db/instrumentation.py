@@ -0,0 +1,69 @@
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest parameter repr written to the slow query log.
+MAX_LOGGED_PARAMETERS = 1000
+
+
+class RequestStats:
+    """
+    What one request spent, in seconds: filled in by the cursor events below
+    and by the timing of `app.api.timing`.
+    """
+
+    __slots__ = ("queries", "db", "serialize", "endpoint_done")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.endpoint_done: Optional[float] = None
+
+
+# Set by the request middleware. Threadpool workers and asyncio tasks run
+# with a copy of the context, which shares the (mutable) stats object.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - context._query_started
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db += elapsed
+
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold >= 0 and elapsed * 1000 >= threshold:
+        logger.warning(
+            "Slow query (%.1f ms): %s; parameters: %s",
+            elapsed * 1000,
+            statement,
+            _truncate(repr(parameters)),
+        )
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_LOGGED_PARAMETERS:
+        return text
+    return text[:MAX_LOGGED_PARAMETERS] + "..."
+
+
+def listen(engine: Engine) -> None:
+    """Time every statement run through ``engine``."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,173 @@
+"""
+Monthly range partitions of the tables partitioned by date: ``transaction``
+and ``transaction_line``. The rows dated in a month live in
+``<table>_pYYYY_MM``; both tables always have the same months.
+
+There is no default partition, so a month needs its partitions before
+anything dated in it is written: the write paths call `ensure` with the
+dates they are about to insert, and `ensure_ahead` creates the coming months
+in advance (on startup, and from ``manage.py create-partitions``).
+"""
+import re
+from datetime import date
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+PARTITIONED_TABLES = ("transaction", "transaction_line")
+
+# Serializes partition creation across sessions (pg_advisory_xact_lock key).
+PARTITION_LOCK = 0x7061727469
+
+_PARTITION_NAME = re.compile(
+    r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$"
+)
+
+_STAGED = "partitions_created"
+
+# Months known to have their partitions, shared by the process. Partitions are
+# never dropped by the application (see `truncate`), so it only grows.
+_known: Set[date] = set()
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partition(name: str) -> bool:
+    """Whether ``name`` is a month partition rather than a table of its own."""
+    match = _PARTITION_NAME.match(name)
+    return match is not None and match["table"] in PARTITIONED_TABLES
+
+
+def existing(db: Session, table: str = PARTITIONED_TABLES[0]) -> List[date]:
+    """The months ``table`` has a partition for, in order."""
+    names = db.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits AS i "
+            "JOIN pg_class AS c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": f'"{table}"'},
+    )
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match is not None:
+            months.append(date(int(match["year"]), int(match["month"]), 1))
+    return sorted(months)
+
+
+def ensure(db: Session, days: Iterable[date]) -> None:
+    """
+    Create, inside the caller's transaction, the partitions missing for the
+    months of ``days``. Creating one locks the parent table until commit;
+    months already known cost nothing.
+    """
+    months = {month_start(day) for day in days if day is not None}
+    months -= _known
+    staged = db.info.get(_STAGED)
+    if staged:
+        months -= staged
+    if not months:
+        return
+    present = months.intersection(existing(db))
+    _known.update(present)
+    months -= present
+    if not months:
+        return
+
+    # Whoever held the lock before has committed its partitions by now.
+    db.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK)))
+    for month in sorted(months):
+        for table in PARTITIONED_TABLES:
+            db.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" '
+                    f'PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{month}') TO ('{next_month(month)}')"
+                )
+            )
+    db.info.setdefault(_STAGED, set()).update(months)
+
+
+def ensure_ahead(db: Session, months: int, today: Optional[date] = None) -> None:
+    """Create the partitions of this month and the ``months`` after, and commit."""
+    month = month_start(today or date.today())
+    days = []
+    for _ in range(months + 1):
+        days.append(month)
+        month = next_month(month)
+    ensure(db, days)
+    db.commit()
+
+
+def covered(
+    db: Session, start_date: Optional[date], end_date: Optional[date]
+) -> List[date]:
+    """The months with partitions lying entirely within ``[start, end)``."""
+    return [
+        month
+        for month in existing(db)
+        if (start_date is None or month >= start_date)
+        and (end_date is None or next_month(month) <= end_date)
+    ]
+
+
+def _names(month: date) -> str:
+    return ", ".join(
+        f'"{partition_name(table, month)}"' for table in PARTITIONED_TABLES
+    )
+
+
+def lock(db: Session, month: date) -> bool:
+    """
+    Take the partitions of ``month`` to the caller's transaction (ACCESS
+    EXCLUSIVE, until it ends), as `truncate` needs: nothing can be written to
+    or read from the month meanwhile, so what the caller reads of it stays
+    what it will truncate. If a reader holds on to them past
+    ``PARTITION_LOCK_TIMEOUT_MS``, nothing is locked and False returned, for
+    the caller to delete the rows instead.
+    """
+    timeout = f"{settings.PARTITION_LOCK_TIMEOUT_MS}ms"
+    try:
+        with db.begin_nested():
+            db.execute(select(func.set_config("lock_timeout", timeout, True)))
+            db.execute(text(f"LOCK TABLE {_names(month)} IN ACCESS EXCLUSIVE MODE"))
+    except OperationalError:
+        return False
+    db.execute(text("SET LOCAL lock_timeout TO DEFAULT"))
+    return True
+
+
+def truncate(db: Session, month: date) -> None:
+    """
+    Empty the partitions of ``month``, `lock`ed by the caller's transaction.
+    They stay attached, so that every process can keep writing to the month
+    without checking again.
+    """
+    db.execute(text(f"TRUNCATE {_names(month)}"))
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_staged(session: Session) -> None:
+    staged = session.info.pop(_STAGED, None)
+    if staged:
+        _known.update(staged)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_staged(session: Session, previous_transaction) -> None:
+    session.info.pop(_STAGED, None)
@@ -1,7 +1,42 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db import instrumentation
+from app.db.pool import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    async_pool_metrics,
+    sync_pool_metrics,
+)
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+engine = create_engine(
+    settings.SQLALCHEMY_DATABASE_URI, poolclass=TimedQueuePool, **pool_options
+)
+sync_pool_metrics.listen(engine.pool)
+instrumentation.listen(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **pool_options,
+    )
+    async_pool_metrics.listen(async_engine.sync_engine.pool)
+    instrumentation.listen(async_engine.sync_engine)
+    # Objects are serialized after the session is gone; keep them loaded.
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
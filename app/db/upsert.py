@@ -0,0 +1,100 @@
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import and_, literal_column, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.db.base_class import Base
+
+
+def _conflict_target(model: Base, key: Dict[str, Any]) -> Dict[str, Any]:
+    nulls = [
+        getattr(model, column).is_(None)
+        for column, value in key.items()
+        if value is None
+    ]
+    return dict(
+        index_elements=[column for column, value in key.items() if value is not None],
+        index_where=and_(*nulls) if nulls else None,
+    )
+
+
+def _insert_statement(
+    model: Base, key: Dict[str, Any], values: Optional[Dict[str, Any]]
+) -> Insert:
+    # Core insert: ORM-enabled DML cannot return the `previous` subquery.
+    return insert(model.__table__).values({**key, **(values or {})})
+
+
+def previous(model: Base, column: str):
+    """
+    ``RETURNING`` expression for the value ``column`` held before the
+    statement ran (``NULL`` for a row it inserted): a subquery there reads the
+    snapshot the statement started from.
+    """
+    old = model.__table__.alias("previous")
+    # Spelled out: the compiler does not correlate subqueries in RETURNING.
+    target_id = literal_column(f'"{model.__tablename__}".id')
+    return (
+        select(old.c[column])
+        .where(old.c.id == target_id)
+        .scalar_subquery()
+        .label(f"previous_{column}")
+    )
+
+
+def upsert_id(
+    db: Session,
+    model: Base,
+    key: Dict[str, Any],
+    values: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Return the id of the ``model`` row identified by ``key``, inserting it
+    with ``values`` if it does not exist yet.
+
+    ``key`` must match a unique constraint; for a key with ``NULL`` members,
+    a partial unique index over the other columns ``WHERE <column> IS NULL``.
+    The row is inserted with ``INSERT ... ON CONFLICT DO NOTHING RETURNING
+    id``, which waits for a concurrent insert of the same key rather than
+    failing, and leaves an existing row untouched: no new row version, no
+    lock held to the end of the transaction. When it returns nothing, the
+    row existed and a second statement selects its id.
+    """
+    stmt = _insert_statement(model, key, values).on_conflict_do_nothing(
+        **_conflict_target(model, key)
+    )
+    id_ = db.execute(stmt.returning(model.id)).scalar_one_or_none()
+    if id_ is not None:
+        return id_
+    match = [
+        getattr(model, column).is_(None)
+        if value is None
+        else getattr(model, column) == value
+        for column, value in key.items()
+    ]
+    return db.execute(select(model.id).where(*match)).scalar_one()
+
+
+def upsert_replacing(
+    db: Session,
+    model: Base,
+    key: Dict[str, Any],
+    values: Dict[str, Any],
+    update: Sequence[str],
+) -> Row:
+    """
+    As `upsert_id`, overwriting the ``update`` columns of an existing row with
+    the new values, in a single ``INSERT ... ON CONFLICT DO UPDATE``. Returns
+    the id followed by the values those columns held before (``None`` for a
+    new row).
+    """
+    stmt = _insert_statement(model, key, values)
+    stmt = stmt.on_conflict_do_update(
+        **_conflict_target(model, key),
+        set_={column: stmt.excluded[column] for column in update},
+    )
+    return db.execute(
+        stmt.returning(model.id, *(previous(model, column) for column in update))
+    ).one()
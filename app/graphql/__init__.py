@@ -0,0 +1 @@
+from .schema import graphql_router, schema
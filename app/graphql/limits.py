@@ -0,0 +1,114 @@
+"""
+Query complexity limit. The depth limit is strawberry's QueryDepthLimiter;
+depth alone still lets a shallow query ask for a page of transactions with
+every item and every price of each, so queries are also costed: one per
+field, times the size of the list it is nested in.
+"""
+from typing import Optional, Set, Type
+
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLNamedType,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+)
+from graphql.pyutils import Undefined
+from strawberry.extensions import AddValidationRules
+
+# Rows assumed for a list field without a ``first`` argument.
+DEFAULT_LIST_SIZE = 10
+# Rows assumed for a ``first`` argument given as a variable, which validation
+# cannot see: the most a page may hold.
+MAX_PAGE_SIZE = 500
+
+
+def _list_size(node: FieldNode, field) -> int:
+    for argument in node.arguments:
+        if argument.name.value == "first":
+            if isinstance(argument.value, IntValueNode):
+                return int(argument.value.value)
+            return MAX_PAGE_SIZE
+    first = field.args.get("first")
+    if first is not None and first.default_value not in (None, Undefined):
+        return first.default_value
+    return DEFAULT_LIST_SIZE
+
+
+def create_validator(max_complexity: int) -> Type[ValidationRule]:
+    class ComplexityValidator(ValidationRule):
+        def enter_operation_definition(
+            self, node: OperationDefinitionNode, *args
+        ) -> None:
+            root = self.context.schema.get_root_type(node.operation)
+            if root is None:
+                return
+            complexity = self.cost(root, node.selection_set, set())
+            if complexity > max_complexity:
+                self.report_error(
+                    GraphQLError(
+                        f"Query complexity of {complexity} exceeds the maximum "
+                        f"of {max_complexity}.",
+                        node,
+                    )
+                )
+
+        def cost(
+            self,
+            parent: GraphQLNamedType,
+            selection_set: Optional[SelectionSetNode],
+            fragments: Set[str],
+        ) -> int:
+            if selection_set is None:
+                return 0
+            fields = getattr(parent, "fields", {})
+            total = 0
+            for selection in selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    field = fields.get(selection.name.value)
+                    if field is None:
+                        # Introspection, or an unknown field reported elsewhere.
+                        continue
+                    nested = self.cost(
+                        get_named_type(field.type), selection.selection_set, fragments
+                    )
+                    if is_list_type(get_nullable_type(field.type)):
+                        nested *= _list_size(selection, field)
+                    total += 1 + nested
+                elif isinstance(selection, InlineFragmentNode):
+                    condition = selection.type_condition
+                    type_ = (
+                        self.context.schema.get_type(condition.name.value)
+                        if condition is not None
+                        else parent
+                    )
+                    total += self.cost(type_, selection.selection_set, fragments)
+                elif isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    fragment = self.context.get_fragment(name)
+                    # Cycles are reported by NoFragmentCyclesRule.
+                    if fragment is None or name in fragments:
+                        continue
+                    type_ = self.context.schema.get_type(
+                        fragment.type_condition.name.value
+                    )
+                    total += self.cost(
+                        type_, fragment.selection_set, fragments | {name}
+                    )
+            return total
+
+    return ComplexityValidator
+
+
+class QueryComplexityLimiter(AddValidationRules):
+    """Reject queries costing more than ``max_complexity``, see above."""
+
+    def __init__(self, max_complexity: int):
+        super().__init__([create_validator(max_complexity)])
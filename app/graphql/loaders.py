@@ -0,0 +1,187 @@
+"""
+The DataLoaders of a GraphQL request. Each loads every key asked for in the
+same tick with a single statement, so a query runs one statement per
+(distinct) field it nests, however many rows each level returns.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from starlette.concurrency import run_in_threadpool
+from strawberry.dataloader import DataLoader
+
+from app.graphql import types
+from app.models import (
+    Category,
+    Family,
+    Item,
+    PaymentMethod,
+    Price,
+    Transaction,
+    Unit,
+)
+from app.models.payments import TransactionItemAssociation, TransactionLine
+
+# Columns each type is built from, see the functions below.
+TRANSACTION_COLUMNS = (Transaction.id, Transaction.date, Transaction.payment_method_id)
+ITEM_COLUMNS = (Item.id, Item.name, Item.category_id, Unit.name.label("unit"))
+PAYMENT_METHOD_COLUMNS = (
+    PaymentMethod.id,
+    PaymentMethod.name,
+    PaymentMethod.tax_deduction_rate,
+    PaymentMethod.family_id,
+)
+
+
+def transaction(row) -> types.Transaction:
+    return types.Transaction(
+        id=row.id, date=row.date, payment_method_id=row.payment_method_id
+    )
+
+
+def item(row) -> types.Item:
+    return types.Item(
+        id=row.id, name=row.name, unit=row.unit, category_id=row.category_id
+    )
+
+
+def family(row) -> types.Family:
+    return types.Family(id=row.id, name=row.name)
+
+
+def payment_method(row) -> types.PaymentMethod:
+    return types.PaymentMethod(
+        id=row.id,
+        name=row.name,
+        tax_deduction_rate=row.tax_deduction_rate,
+        family_id=row.family_id,
+    )
+
+
+def category(row) -> types.Category:
+    return types.Category(id=row.id, name=row.name)
+
+
+def price(row) -> types.Price:
+    return types.Price(id=row.id, value=row.value, date=row.date)
+
+
+def line(row) -> types.TransactionLine:
+    return types.TransactionLine(
+        quantity=row.quantity,
+        unit_price=row.unit_price,
+        amount=row.amount,
+        item_id=row.item_id,
+    )
+
+
+def items_select(*columns) -> Select:
+    """The items with their unit's name, after ``columns``."""
+    return (
+        select(*columns, *ITEM_COLUMNS)
+        .select_from(Item)
+        .outerjoin(Unit, Unit.id == Item.unit_id)
+    )
+
+
+class Loaders:
+    def __init__(self, db: Union[Session, AsyncSession]):
+        self.db = db
+        # Loaders of one tick are dispatched together; the session takes
+        # their statements one at a time.
+        self._lock = asyncio.Lock()
+
+        self.transaction = DataLoader(self._transactions)
+        self.item = DataLoader(self._items)
+        self.family = DataLoader(self._families)
+        self.payment_method = DataLoader(self._payment_methods)
+        self.category = DataLoader(self._categories)
+        self.payment_methods_by_family = DataLoader(self._payment_methods_by_family)
+        self.items_by_transaction = DataLoader(self._items_by_transaction)
+        self.lines_by_transaction = DataLoader(self._lines_by_transaction)
+        self.prices_by_item = DataLoader(self._prices_by_item)
+
+    async def fetch(self, stmt: Select) -> Sequence[Any]:
+        async with self._lock:
+            if isinstance(self.db, AsyncSession):
+                return (await self.db.execute(stmt)).all()
+            return await run_in_threadpool(lambda: self.db.execute(stmt).all())
+
+    async def _by_id(
+        self, stmt: Select, build: Callable, ids: List[int]
+    ) -> List[Optional[Any]]:
+        by_id = {row.id: build(row) for row in await self.fetch(stmt)}
+        return [by_id.get(id_) for id_ in ids]
+
+    async def _grouped(
+        self, stmt: Select, build: Callable, ids: List[int]
+    ) -> List[List[Any]]:
+        """Group the rows of ``stmt`` by their first column, in their order."""
+        groups: Dict[int, List] = defaultdict(list)
+        for row in await self.fetch(stmt):
+            groups[row[0]].append(build(row))
+        return [groups.get(id_, []) for id_ in ids]
+
+    async def _transactions(self, ids: List[int]):
+        stmt = select(*TRANSACTION_COLUMNS).where(Transaction.id.in_(ids))
+        return await self._by_id(stmt, transaction, ids)
+
+    async def _items(self, ids: List[int]):
+        return await self._by_id(items_select().where(Item.id.in_(ids)), item, ids)
+
+    async def _families(self, ids: List[int]):
+        stmt = select(Family.id, Family.name).where(Family.id.in_(ids))
+        return await self._by_id(stmt, family, ids)
+
+    async def _payment_methods(self, ids: List[int]):
+        stmt = select(*PAYMENT_METHOD_COLUMNS).where(PaymentMethod.id.in_(ids))
+        return await self._by_id(stmt, payment_method, ids)
+
+    async def _categories(self, ids: List[int]):
+        stmt = select(Category.id, Category.name).where(Category.id.in_(ids))
+        return await self._by_id(stmt, category, ids)
+
+    async def _payment_methods_by_family(self, ids: List[int]):
+        stmt = (
+            select(PaymentMethod.family_id.label("key"), *PAYMENT_METHOD_COLUMNS)
+            .where(PaymentMethod.family_id.in_(ids))
+            .order_by(PaymentMethod.id)
+        )
+        return await self._grouped(stmt, payment_method, ids)
+
+    async def _items_by_transaction(self, ids: List[int]):
+        association = TransactionItemAssociation
+        stmt = (
+            items_select(association.transaction_id)
+            .join(association, association.item_id == Item.id)
+            .where(association.transaction_id.in_(ids))
+            .order_by(association.transaction_id, Item.id)
+        )
+        return await self._grouped(stmt, item, ids)
+
+    async def _lines_by_transaction(self, ids: List[int]):
+        stmt = (
+            select(
+                TransactionLine.transaction_id,
+                TransactionLine.item_id,
+                TransactionLine.quantity,
+                TransactionLine.unit_price,
+                TransactionLine.amount,
+            )
+            .where(TransactionLine.transaction_id.in_(ids))
+            .order_by(TransactionLine.transaction_id, TransactionLine.id)
+        )
+        return await self._grouped(stmt, line, ids)
+
+    async def _prices_by_item(self, ids: List[int]):
+        stmt = (
+            select(Price.item_id, Price.id, Price.value, Price.date)
+            .where(Price.item_id.in_(ids))
+            .order_by(Price.item_id, Price.id)
+        )
+        return await self._grouped(stmt, price, ids)
+
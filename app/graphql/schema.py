@@ -0,0 +1,122 @@
+from typing import List, Optional
+
+import strawberry
+from fastapi import Depends
+from sqlalchemy import select
+from strawberry.extensions import QueryDepthLimiter
+from strawberry.fastapi import BaseContext, GraphQLRouter
+from strawberry.types import Info
+
+from app.api.deps import get_async_db, get_db
+from app.core.config import settings
+from app.graphql import loaders, types
+from app.graphql.limits import MAX_PAGE_SIZE, QueryComplexityLimiter
+from app.models import Category, Family, Item, PaymentMethod, Transaction
+from app.utils.case import month_range
+
+
+class Context(BaseContext):
+    def __init__(self, db):
+        super().__init__()
+        self.loaders = loaders.Loaders(db)
+
+
+def _page(skip: int, first: int) -> None:
+    if skip < 0 or not 0 < first <= MAX_PAGE_SIZE:
+        raise ValueError(
+            f"first must be between 1 and {MAX_PAGE_SIZE}, skip at least 0."
+        )
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    async def transaction(self, info: Info, id: int) -> Optional[types.Transaction]:
+        return await info.context.loaders.transaction.load(id)
+
+    @strawberry.field(description="The transactions of a month, by date.")
+    async def transactions(
+        self,
+        info: Info,
+        year: int,
+        month: int,
+        family: Optional[str] = None,
+        skip: int = 0,
+        first: int = 100,
+    ) -> List[types.Transaction]:
+        _page(skip, first)
+        start_date, end_date = month_range(year, month)
+        stmt = (
+            select(*loaders.TRANSACTION_COLUMNS)
+            .where(Transaction.date >= start_date, Transaction.date < end_date)
+            .order_by(Transaction.date, Transaction.id)
+            .offset(skip)
+            .limit(first)
+        )
+        if family is not None:
+            stmt = (
+                stmt.join(
+                    PaymentMethod, PaymentMethod.id == Transaction.payment_method_id
+                )
+                .join(Family, Family.id == PaymentMethod.family_id)
+                .where(Family.name == family)
+            )
+        rows = await info.context.loaders.fetch(stmt)
+        return [loaders.transaction(row) for row in rows]
+
+    @strawberry.field
+    async def item(self, info: Info, id: int) -> Optional[types.Item]:
+        return await info.context.loaders.item.load(id)
+
+    @strawberry.field
+    async def items(
+        self,
+        info: Info,
+        category: Optional[str] = None,
+        skip: int = 0,
+        first: int = 100,
+    ) -> List[types.Item]:
+        _page(skip, first)
+        stmt = loaders.items_select().order_by(Item.id).offset(skip).limit(first)
+        if category is not None:
+            stmt = stmt.join(Category, Category.id == Item.category_id).where(
+                Category.name == category
+            )
+        rows = await info.context.loaders.fetch(stmt)
+        return [loaders.item(row) for row in rows]
+
+    @strawberry.field
+    async def families(self, info: Info) -> List[types.Family]:
+        stmt = select(Family.id, Family.name).order_by(Family.id)
+        rows = await info.context.loaders.fetch(stmt)
+        return [loaders.family(row) for row in rows]
+
+    @strawberry.field
+    async def payment_methods(self, info: Info) -> List[types.PaymentMethod]:
+        stmt = select(*loaders.PAYMENT_METHOD_COLUMNS).order_by(PaymentMethod.id)
+        rows = await info.context.loaders.fetch(stmt)
+        return [loaders.payment_method(row) for row in rows]
+
+    @strawberry.field
+    async def categories(self, info: Info) -> List[types.Category]:
+        stmt = select(Category.id, Category.name).order_by(Category.id)
+        rows = await info.context.loaders.fetch(stmt)
+        return [loaders.category(row) for row in rows]
+
+
+schema = strawberry.Schema(
+    query=Query,
+    extensions=[
+        QueryDepthLimiter(max_depth=settings.GRAPHQL_MAX_DEPTH),
+        QueryComplexityLimiter(max_complexity=settings.GRAPHQL_MAX_COMPLEXITY),
+    ],
+)
+
+
+async def get_context(
+    db=Depends(get_async_db if settings.DB_ASYNC else get_db),
+) -> Context:
+    return Context(db)
+
+
+graphql_router = GraphQLRouter(schema, context_getter=get_context)
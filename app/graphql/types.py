@@ -0,0 +1,112 @@
+"""
+GraphQL types of the payments models.
+
+They are built from plain rows by `app.graphql.loaders`, never from ORM
+instances, so that a field can only reach the database through a loader.
+References to other objects are kept as private ids and resolved through the
+request's loaders.
+"""
+from datetime import date
+from typing import List, Optional
+
+import strawberry
+from strawberry.types import Info
+
+
+@strawberry.type
+class Family:
+    id: int
+    name: str
+
+    @strawberry.field
+    async def payment_methods(self, info: Info) -> List["PaymentMethod"]:
+        return await info.context.loaders.payment_methods_by_family.load(self.id)
+
+
+@strawberry.type
+class PaymentMethod:
+    id: int
+    name: str
+    tax_deduction_rate: Optional[float]
+    family_id: strawberry.Private[Optional[int]]
+
+    @strawberry.field
+    async def family(self, info: Info) -> Optional[Family]:
+        if self.family_id is None:
+            return None
+        return await info.context.loaders.family.load(self.family_id)
+
+
+@strawberry.type
+class Category:
+    id: int
+    name: str
+
+
+@strawberry.type
+class Price:
+    id: int
+    value: float
+    date: Optional[date]
+
+
+@strawberry.type
+class Item:
+    id: int
+    name: str
+    unit: Optional[str]
+    category_id: strawberry.Private[Optional[int]]
+
+    @strawberry.field
+    async def category(self, info: Info) -> Optional[Category]:
+        if self.category_id is None:
+            return None
+        return await info.context.loaders.category.load(self.category_id)
+
+    @strawberry.field
+    async def prices(self, info: Info) -> List[Price]:
+        return await info.context.loaders.prices_by_item.load(self.id)
+
+    @strawberry.field(description="The most recent of the item's prices.")
+    async def latest_price(self, info: Info) -> Optional[Price]:
+        prices = await info.context.loaders.prices_by_item.load(self.id)
+        dated = [price for price in prices if price.date is not None]
+        return max(dated, key=lambda price: (price.date, price.id), default=None)
+
+
+@strawberry.type
+class TransactionLine:
+    quantity: float
+    unit_price: float
+    amount: float
+    item_id: strawberry.Private[int]
+
+    @strawberry.field
+    async def item(self, info: Info) -> Optional[Item]:
+        return await info.context.loaders.item.load(self.item_id)
+
+
+@strawberry.type
+class Transaction:
+    id: int
+    date: date
+    payment_method_id: strawberry.Private[Optional[int]]
+
+    @strawberry.field
+    async def payment_method(self, info: Info) -> Optional[PaymentMethod]:
+        if self.payment_method_id is None:
+            return None
+        return await info.context.loaders.payment_method.load(self.payment_method_id)
+
+    @strawberry.field
+    async def items(self, info: Info) -> List[Item]:
+        return await info.context.loaders.items_by_transaction.load(self.id)
+
+    @strawberry.field
+    async def lines(self, info: Info) -> List[TransactionLine]:
+        return await info.context.loaders.lines_by_transaction.load(self.id)
+
+    @strawberry.field(description="What the transaction's lines cost in total.")
+    async def total(self, info: Info) -> float:
+        lines = await info.context.loaders.lines_by_transaction.load(self.id)
+        return sum(line.amount for line in lines)
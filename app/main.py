@@ -2,7 +2,12 @@ from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
+from app.api.timing import time_request
 from app.core.config import settings
+from app.core.ingest import ingest_buffer
+from app.core.jobs import job_runner
+from app.db import partitions
+from app.db.session import SessionLocal
 
 app = FastAPI(
     title=settings.PROJECT_NAME, openapi_url=f"{settings.API_STR}/openapi.json"
@@ -17,4 +22,24 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+app.middleware("http")(time_request)
+
+
+@app.on_event("startup")
+def create_partitions() -> None:
+    db = SessionLocal()
+    try:
+        partitions.ensure_ahead(db, settings.PARTITION_MONTHS_AHEAD)
+    finally:
+        db.close()
+
+
+if settings.INGEST_BUFFER_ENABLED:
+    app.on_event("startup")(ingest_buffer.start)
+    app.on_event("shutdown")(ingest_buffer.stop)
+if settings.JOB_WORKERS > 0:
+    app.on_event("startup")(job_runner.start)
+    app.on_event("shutdown")(job_runner.stop)
+
+
 app.include_router(api_router)
@@ -10,3 +10,7 @@ from .payments import (  # noqa
     Unit,
     Family,
 )
+from .report import MonthlySpend  # noqa
+from .ledger import AccountSnapshot, LedgerEntry  # noqa
+from .idempotency import IdempotencyKey  # noqa
+from .job import Job  # noqa
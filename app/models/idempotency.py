@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, func
+
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    """
+    An ``Idempotency-Key`` sent with a write request, and the response it got:
+    a retry carrying the same key is answered with that response instead of
+    being handled again. See app.api.idempotency.
+    """
+
+    __tablename__ = "idempotency_key"
+
+    key = Column(String(255), primary_key=True)
+    # The request the key was first sent with; another request reusing the
+    # key is refused.
+    path = Column(String, nullable=False)
+    request_hash = Column(LargeBinary, nullable=False)
+    # Both null while the first request is being handled.
+    status_code = Column(Integer)
+    response = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db.base_class import Base
+
+
+class Job(Base):
+    """
+    A long-running operation (statement import, purge) run in the background
+    by app.core.jobs, one chunk per database transaction.
+    """
+
+    __tablename__ = "job"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(16), nullable=False)
+    params = Column(JSONB, nullable=False)
+    # queued, running, succeeded or failed.
+    status = Column(String(16), nullable=False, default="queued")
+    # Chunks (rows imported, months purged) out of ``total``, committed with
+    # the chunks themselves: a job that is run again resumes after them.
+    done = Column(Integer, nullable=False, default=0)
+    total = Column(Integer)
+    result = Column(JSONB)
+    error = Column(Text)
+    # Times the job was claimed by a runner. Also fences the runs: a run
+    # only records progress while the attempt is still its own.
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    # Moved on by every chunk; a running job that has not been heard of for
+    # JOB_STALE_SECONDS is taken to have died and is claimed again.
+    heartbeat_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (Index("ix_job_status_id", "status", "id"),)
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer
+
+from app.db.base_class import Base
+
+
+class LedgerEntry(Base):
+    """
+    A movement of an account's balance: one per transaction paid with a
+    payment method attached to the account, for minus the transaction's
+    amount.
+    """
+
+    __tablename__ = "ledger_entry"
+
+    id = Column(Integer, primary_key=True)
+    account_id = Column(
+        Integer, ForeignKey("account.id", ondelete="CASCADE"), nullable=False
+    )
+    # Unique: a transaction is posted at most once. No foreign key, the
+    # transactions being partitioned; deleting them reverts their entries.
+    transaction_id = Column(Integer, unique=True)
+    date = Column(Date, nullable=False)
+    amount = Column(Float, nullable=False)
+
+    __table_args__ = (Index("ix_ledger_entry_account_id_date", "account_id", "date"),)
+
+
+class AccountSnapshot(Base):
+    """
+    Checkpoint of an account's balance: the sum of its entries dated up to
+    and including ``date``. Kept in step with the entries posted afterwards,
+    so that a balance at any date is a snapshot plus the entries since.
+    """
+
+    __tablename__ = "account_snapshot"
+
+    account_id = Column(
+        Integer, ForeignKey("account.id", ondelete="CASCADE"), primary_key=True
+    )
+    date = Column(Date, primary_key=True)
+    balance = Column(Float, nullable=False)
@@ -1,22 +1,41 @@
 from datetime import datetime
+from typing import Optional
 
 from fastapi import HTTPException
 from sqlalchemy import (
     Column,
     Integer,
+    LargeBinary,
     String,
     ForeignKey,
     Date,
     Float,
+    Index,
     UniqueConstraint,
-    and_,
 )
 from sqlalchemy.orm import relationship, Session
 
 from app.db.base_class import Base
+from app.db.cache import (
+    cached_instance,
+    dimension_cache,
+    name_indexes,
+    prices_changed,
+)
+from app.db.upsert import upsert_id, upsert_replacing
 from app.utils.case import parse_date
 
 
+def trigram_index(table: str) -> Index:
+    """pg_trgm index of the ``name`` column, for ILIKE and similarity search."""
+    return Index(
+        f"ix_{table}_name_trgm",
+        "name",
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
 class Family(Base):
     __tablename__ = "family"
 
@@ -25,6 +44,17 @@ class Family(Base):
 
     payment_methods = relationship("PaymentMethod", back_populates="family")
 
+    @staticmethod
+    def get_family_id(db: Session, name: str):
+        if name is None:
+            return None
+        family_id = dimension_cache.lookup(db, Family, (name,))
+        if family_id is None:
+            family_id = db.query(Family.id).filter(Family.name == name).scalar()
+            if family_id is not None:
+                dimension_cache.stage(db, Family, (name,), family_id)
+        return family_id
+
 
 class Account(Base):
     __tablename__ = "account"
@@ -34,7 +64,13 @@ class Account(Base):
 
     family_id = Column(Integer, ForeignKey("family.id"), index=True)
 
-    balance = Column(Integer)
+    # Kept up to date by app.crud.account as ledger entries are posted.
+    balance = Column(Float, nullable=False, default=0.0)
+    # Posted since the last AccountSnapshot; a new one is taken past
+    # LEDGER_SNAPSHOT_INTERVAL.
+    entries_since_snapshot = Column(Integer, nullable=False, default=0)
+
+    payment_methods = relationship("PaymentMethod", back_populates="account")
 
 
 class PaymentMethod(Base):
@@ -45,30 +81,41 @@ class PaymentMethod(Base):
     tax_deduction_rate = Column(Float)
 
     family_id = Column(Integer, ForeignKey("family.id"), index=True)
+    # Transactions paid with the payment method post to this account.
+    account_id = Column(Integer, ForeignKey("account.id"), index=True)
 
     transactions = relationship("Transaction", back_populates="payment_method")
     family = relationship("Family", back_populates="payment_methods")
+    account = relationship("Account", back_populates="payment_methods")
 
     __table_args__ = (
         UniqueConstraint("name", "family_id", name="payment_mtd_name_family_id"),
+        # The constraint above treats NULLs as distinct.
+        Index(
+            "payment_mtd_name_no_family",
+            "name",
+            unique=True,
+            postgresql_where=family_id.is_(None),
+        ),
     )
 
     @staticmethod
     def get_payment_method(db: Session, name: str, family: str):
-        payment_method = (
-            db.query(PaymentMethod)
-            .join(Family)
-            .filter(and_(PaymentMethod.name == name, Family.name == family))
-        )
+        family_id = Family.get_family_id(db, name=family)
+        key = (name, family_id)
+        payment_method_id = dimension_cache.lookup(db, PaymentMethod, key)
+        if payment_method_id is not None:
+            return cached_instance(
+                db, PaymentMethod, payment_method_id, name=name, family_id=family_id
+            )
 
-        if payment_method.count() > 0:
-            return payment_method.first()
-        else:
-            f = db.query(Family).filter(Family.name == family).first()
-            item = PaymentMethod(name=name, family=f)
-            db.add(item)
-            db.flush()
-            return item
+        payment_method_id = upsert_id(
+            db, PaymentMethod, {"name": name, "family_id": family_id}
+        )
+        dimension_cache.stage(db, PaymentMethod, key, payment_method_id)
+        return cached_instance(
+            db, PaymentMethod, payment_method_id, name=name, family_id=family_id
+        )
 
 
 class Category(Base):
@@ -79,17 +126,18 @@ class Category(Base):
 
     items = relationship("Item", back_populates="category")
 
+    __table_args__ = (trigram_index("category"),)
+
     @staticmethod
     def get_category(db: Session, name: str):
-        category_q = db.query(Category).filter(Category.name == name)
+        category_id = dimension_cache.lookup(db, Category, (name,))
+        if category_id is not None:
+            return cached_instance(db, Category, category_id, name=name)
 
-        if category_q.count() > 0:
-            return category_q.first()
-        else:
-            item = Category(name=name)
-            db.add(item)
-            db.flush()
-            return item
+        category_id = upsert_id(db, Category, {"name": name})
+        dimension_cache.stage(db, Category, (name,), category_id)
+        name_indexes.stage(db, Category, category_id, name)
+        return cached_instance(db, Category, category_id, name=name)
 
 
 class Unit(Base):
@@ -103,12 +151,15 @@ class Unit(Base):
 
     @staticmethod
     def get_unit(db: Session, name: str):
-        unit_q = db.query(Unit).filter(Unit.name == name)
+        unit_id = dimension_cache.lookup(db, Unit, (name,))
+        if unit_id is not None:
+            return cached_instance(db, Unit, unit_id, name=name)
 
-        if unit_q.count() > 0:
-            return unit_q.first()
-        else:
+        unit = db.query(Unit).filter(Unit.name == name).first()
+        if unit is None:
             raise HTTPException(status_code=404, detail="There is no proper unit.")
+        dimension_cache.stage(db, Unit, (name,), unit.id)
+        return unit
 
 
 class Price(Base):
@@ -122,25 +173,30 @@ class Price(Base):
 
     item = relationship("Item", back_populates="prices")
 
-    __table_args__ = (UniqueConstraint("date", "value", name="price_date_cost"),)
+    __table_args__ = (
+        UniqueConstraint("date", "value", name="price_date_cost"),
+        Index("ix_price_item_id_date", "item_id", "date"),
+    )
 
     @staticmethod
-    def get_price(db: Session, value: float, date_str: str):
-        price_date = parse_date(date_str)
-        prices = db.query(Price).filter(
-            and_(
-                Price.value == value,
-                Price.date == price_date,
-            )
+    def get_price(
+        db: Session, value: float, date_str: str, item_id: Optional[int] = None
+    ):
+        """
+        Get or create the price; with ``item_id``, an existing one is
+        re-pointed to that item.
+        """
+        key = {"date": parse_date(date_str), "value": value}
+        if item_id is None:
+            price_id = upsert_id(db, Price, key)
+            return cached_instance(db, Price, price_id, **key)
+
+        price_id, previous_item_id = upsert_replacing(
+            db, Price, key, {"item_id": item_id}, update=["item_id"]
         )
-
-        if prices.count() > 0:
-            return prices.first()
-        else:
-            price = Price(value=value, date=price_date)
-            db.add(price)
-            db.flush()
-            return price
+        if previous_item_id != item_id:
+            prices_changed(db, {item_id, previous_item_id} - {None})
+        return cached_instance(db, Price, price_id, item_id=item_id, **key)
 
 
 class Item(Base):
@@ -152,38 +208,103 @@ class Item(Base):
     category_id = Column(Integer, ForeignKey("category.id"), index=True)
     unit_id = Column(Integer, ForeignKey("unit.id"), index=True)
 
-    prices = relationship("Price", back_populates="item")
+    # Ordered so that serialized transactions are stable (ETags, and the
+    # plain rows of CRUDTransaction.*_plain).
+    prices = relationship("Price", back_populates="item", order_by="Price.id")
     category = relationship("Category", back_populates="items")
     unit = relationship("Unit", back_populates="items")
     transaction_targets = relationship(
         "TransactionTarget", secondary="transaction_target_item", back_populates="items"
     )
     transactions = relationship(
-        "Transaction", secondary="transaction_item_association", back_populates="items"
+        "Transaction",
+        secondary="transaction_item_association",
+        primaryjoin="Item.id == foreign(TransactionItemAssociation.item_id)",
+        secondaryjoin="Transaction.id"
+        " == foreign(TransactionItemAssociation.transaction_id)",
+        back_populates="items",
     )
 
+    __table_args__ = (trigram_index("item"),)
+
     @staticmethod
     def get_item(db: Session, item_dict: dict):
-        item = db.query(Item).filter(Item.name == item_dict["name"]).first()
-
-        if item is not None:
-            return item
+        name = item_dict["name"]
+        item_id = dimension_cache.lookup(db, Item, (name,))
+        if item_id is not None:
+            return cached_instance(db, Item, item_id, name=name)
 
-        item = Item(**item_dict)
-        db.add(item)
-        db.flush()
-        return item
+        values = {
+            column: value for column, value in item_dict.items() if column != "name"
+        }
+        item_id = upsert_id(db, Item, {"name": name}, values)
+        dimension_cache.stage(db, Item, (name,), item_id)
+        name_indexes.stage(db, Item, item_id, name)
+        return cached_instance(db, Item, item_id, name=name)
 
 
 class TransactionItemAssociation(Base):
     __tablename__ = "transaction_item_association"
-    transaction_id = Column(
-        Integer, ForeignKey("transaction.id", ondelete="CASCADE"), primary_key=True
-    )
+    # No foreign key: the partitioned transaction table has no unique key on
+    # id alone. CRUDTransaction.delete_range removes the rows itself.
+    transaction_id = Column(Integer, primary_key=True)
     item_id = Column(
         Integer, ForeignKey("item.id", ondelete="CASCADE"), primary_key=True
     )
 
+    __table_args__ = (
+        Index("ix_transaction_item_association_item_id", "item_id"),
+    )
+
+
+class TransactionLine(Base):
+    """
+    One item of a transaction as recorded: its quantity and price, and the
+    dimensions the monthly rollup groups by, copied from the transaction and
+    the item so that spend aggregates are a scan of this table alone.
+    Partitioned by month on ``date``, like `Transaction`.
+    """
+
+    __tablename__ = "transaction_line"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # No foreign key, see TransactionItemAssociation.
+    transaction_id = Column(Integer, nullable=False, index=True)
+    item_id = Column(
+        Integer, ForeignKey("item.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+
+    date = Column(Date, primary_key=True)
+    family_id = Column(Integer, ForeignKey("family.id"))
+    payment_method_id = Column(Integer, ForeignKey("payment_method.id"))
+    category_id = Column(Integer, ForeignKey("category.id"))
+    transaction_target_id = Column(Integer, ForeignKey("transaction_target.id"))
+
+    # In the item's unit.
+    quantity = Column(Float, nullable=False, default=1.0)
+    unit_price = Column(Float, nullable=False)
+    # quantity * unit_price: what the line cost.
+    amount = Column(Float, nullable=False)
+    # quantity * unit.ratio: the quantity in the base unit, comparable across
+    # items measured in different units.
+    base_quantity = Column(Float)
+
+    __table_args__ = (
+        # Covers the rollup: its key columns and the amount, by date.
+        Index(
+            "ix_transaction_line_date",
+            "date",
+            postgresql_include=[
+                "family_id",
+                "category_id",
+                "payment_method_id",
+                "transaction_target_id",
+                "amount",
+            ],
+        ),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
 
 class TransactionTarget(Base):
     __tablename__ = "transaction_target"
@@ -197,19 +318,27 @@ class TransactionTarget(Base):
         back_populates="transaction_targets",
     )
 
+    __table_args__ = (trigram_index("transaction_target"),)
+
     @staticmethod
     def get_transaction_target(db: Session, transaction_target: str):
-        transaction_target_quary = db.query(TransactionTarget).filter(
-            TransactionTarget.name == transaction_target
-        )
+        key = (transaction_target,)
+        transaction_target_id = dimension_cache.lookup(db, TransactionTarget, key)
+        if transaction_target_id is not None:
+            return cached_instance(
+                db, TransactionTarget, transaction_target_id, name=transaction_target
+            )
 
-        if transaction_target_quary.count():
-            return transaction_target_quary.first()
-        else:
-            transaction_target = TransactionTarget(name=transaction_target)
-            db.add(transaction_target)
-            db.flush()
-            return transaction_target
+        transaction_target_id = upsert_id(
+            db, TransactionTarget, {"name": transaction_target}
+        )
+        dimension_cache.stage(db, TransactionTarget, key, transaction_target_id)
+        name_indexes.stage(
+            db, TransactionTarget, transaction_target_id, transaction_target
+        )
+        return cached_instance(
+            db, TransactionTarget, transaction_target_id, name=transaction_target
+        )
 
 
 class TransactionTargetItem(Base):
@@ -225,14 +354,37 @@ class TransactionTargetItem(Base):
 
 
 class Transaction(Base):
+    """
+    Range-partitioned by month on ``date`` (see app.db.partitions), so the
+    primary key has to include it; ids still come from a single sequence.
+    Queries bounded by date only scan the partitions of their months.
+    """
+
     __tablename__ = "transaction"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
 
     payment_method_id = Column(Integer, ForeignKey("payment_method.id"))
 
-    date = Column(Date, default=datetime.now)
+    date = Column(Date, primary_key=True, default=datetime.now)
+
+    # Hash of the content the transaction was created from, see
+    # app.crud.transaction.fingerprint; null for CSV imports.
+    fingerprint = Column(LargeBinary)
 
     payment_method = relationship("PaymentMethod", back_populates="transactions")
     items = relationship(
-        "Item", secondary="transaction_item_association", back_populates="transactions"
+        "Item",
+        secondary="transaction_item_association",
+        primaryjoin="Transaction.id"
+        " == foreign(TransactionItemAssociation.transaction_id)",
+        secondaryjoin="Item.id == foreign(TransactionItemAssociation.item_id)",
+        back_populates="transactions",
+        order_by="Item.id",
+    )
+
+    __table_args__ = (
+        Index("ix_transaction_date_id", "date", "id"),
+        Index("ix_transaction_payment_method_id_date", "payment_method_id", "date"),
+        Index("ix_transaction_fingerprint", "fingerprint"),
+        {"postgresql_partition_by": "RANGE (date)"},
     )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Date, Float, Integer
+
+from app.db.base_class import Base
+
+
+class MonthlySpend(Base):
+    """
+    Spending rolled up per month, kept up to date by the transaction write
+    paths. Unknown dimensions are stored as 0 rather than NULL so that every
+    row has a well-defined key for ``ON CONFLICT``.
+    """
+
+    __tablename__ = "monthly_spend"
+
+    family_id = Column(Integer, primary_key=True, default=0)
+    month = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True, default=0)
+    payment_method_id = Column(Integer, primary_key=True, default=0)
+    transaction_target_id = Column(Integer, primary_key=True, default=0)
+
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
@@ -1 +1,6 @@
 from .payments import *
+from .report import *
+from .price import *
+from .search import *
+from .ingest import *
+from .job import *
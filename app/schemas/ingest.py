@@ -0,0 +1,18 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class IngestStatus(str, Enum):
+    queued = "queued"
+    created = "created"
+    failed = "failed"
+
+
+class IngestTicket(BaseModel):
+    ticket: str
+    status: IngestStatus = IngestStatus.queued
+    # Set once written: the transaction's id, or why it was not created.
+    id: Optional[int] = None
+    error: Optional[str] = None
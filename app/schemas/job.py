@@ -0,0 +1,36 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from .payments import TransactionRangeDelete
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class PurgeJobCreate(TransactionRangeDelete):
+    # Sweep the items and prices left unreferenced afterwards.
+    sweep: bool = False
+
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    done: int
+    total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,5 @@
 from datetime import date
+from enum import Enum
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -28,12 +29,19 @@ class AccountCreate(AccountBase):
 
 class Account(AccountBase):
     id: int
-    balance: int
+    balance: float
 
     class Config:
         orm_mode = True
 
 
+class AccountBalance(BaseModel):
+    account_id: int
+    # End of the day; None for the current balance.
+    at: Optional[date]
+    balance: float
+
+
 class PaymentMethodBase(BaseModel):
     name: str
     tax_deduction_rate: float
@@ -156,9 +164,39 @@ class TransactionCreate(BaseModel):
     items: List[ItemData]
 
 
+class TransactionBulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ImportRejectedRow(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    lines: int
+    transactions: int
+    rejected: List[ImportRejectedRow]
+
+
 class TransactionDelete(BaseModel):
     year: int
     month: int
+    family: Optional[str] = None
+
+
+class TransactionRangeDelete(BaseModel):
+    # Both ends inclusive.
+    start_date: date
+    end_date: date
+    family: Optional[str] = None
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
 
 
 class Transaction(TransactionBase):
@@ -0,0 +1,23 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ItemPriceSeries(BaseModel):
+    item_id: int
+    item: str
+    dates: List[date]
+    values: List[float]
+    rolling: Optional[List[float]] = None
+
+
+class PriceIndexPoint(BaseModel):
+    month: date
+    index: float
+    items: int
+
+
+class CategoryPriceIndex(BaseModel):
+    category: Optional[str]
+    points: List[PriceIndexPoint]
@@ -0,0 +1,20 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class MonthlySpend(BaseModel):
+    month: date
+    family: Optional[str]
+    category: Optional[str]
+    payment_method: Optional[str]
+    transaction_target: Optional[str]
+    total: float
+    count: int
+
+
+class CategorySpend(BaseModel):
+    category: Optional[str]
+    total: float
+    count: int
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class NameMatch(BaseModel):
+    id: int
+    name: str
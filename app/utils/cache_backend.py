@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.utils.lru import LRUCache
+
+
+class CacheBackend(ABC):
+    """
+    Storage behind the response cache: evictable entries plus named counters
+    that must never be evicted (they version the entries). Implementations
+    must be safe to share between threads.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def get_counters(self, keys: Sequence[str]) -> List[int]:
+        """Current value of each counter, 0 for one never incremented."""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process-local backend: entries in an LRU, counters in a plain dict."""
+
+    def __init__(self, maxsize: int = 1024, enabled: bool = True):
+        self.entries = LRUCache(maxsize=maxsize, enabled=enabled)
+        self.counters: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.entries.set(key, value)
+
+    def get_counters(self, keys: Sequence[str]) -> List[int]:
+        return [self.counters.get(key, 0) for key in keys]
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self.counters[key] = self.counters.get(key, 0) + 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.entries.stats(), "counters": len(self.counters)}
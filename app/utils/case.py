@@ -1,5 +1,13 @@
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from typing import Tuple
 
 
 def parse_date(date_str: str) -> date:
     return datetime.strptime(date_str, "%Y-%m-%d").date()
+
+
+def month_range(year: int, month: int) -> Tuple[date, date]:
+    """Return ``[start, end)`` of the given month."""
+    start_date = date(year, month, 1)
+    end_date = (start_date + timedelta(days=32)).replace(day=1)
+    return start_date, end_date
@@ -0,0 +1,23 @@
+import base64
+from datetime import date
+from typing import Tuple
+
+from app.utils.case import parse_date
+
+
+def encode_cursor(cursor_date: date, id: int) -> str:
+    raw = f"{cursor_date.isoformat()}:{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """
+    Inverse of `encode_cursor`. Raises `ValueError` for anything that was not
+    produced by it.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_str, id_str = raw.split(":")
+        return parse_date(date_str), int(id_str)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
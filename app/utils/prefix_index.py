@@ -0,0 +1,79 @@
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Iterable, List, Tuple
+
+
+class PrefixIndex:
+    def __init__(self, enabled: bool = True):
+        """
+        Thread-safe sorted list of ``(id, name)`` answering case-insensitive
+        prefix lookups: bisect to the first name not below the prefix, then
+        read on while names start with it.
+
+        **Parameters**
+
+        * `enabled`: When false nothing is stored and `loaded` stays false
+        """
+        self.enabled = enabled
+        self.loaded = False
+        # (casefolded name, name, id), sorted.
+        self._entries: List[Tuple[str, str, int]] = []
+        self._lock = Lock()
+
+    @staticmethod
+    def _entry(id_: int, name: str) -> Tuple[str, str, int]:
+        return name.casefold(), name, id_
+
+    def load(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """
+        Fill the index with every ``(id, name)`` of the table. Names added
+        while the rows were being read are kept.
+        """
+        if not self.enabled:
+            return
+        entries = [self._entry(id_, name) for id_, name in rows if name is not None]
+        with self._lock:
+            self._entries = sorted(set(entries).union(self._entries))
+            self.loaded = True
+
+    def add(self, id_: int, name: str) -> None:
+        if not self.enabled or name is None:
+            return
+        entry = self._entry(id_, name)
+        with self._lock:
+            i = bisect_left(self._entries, entry)
+            if i == len(self._entries) or self._entries[i] != entry:
+                insort(self._entries, entry, lo=i)
+
+    def discard(self, id_: int, name: str) -> None:
+        if name is None:
+            return
+        entry = self._entry(id_, name)
+        with self._lock:
+            i = bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Up to ``limit`` ``(id, name)`` whose name starts with ``prefix``, by name."""
+        key = prefix.casefold()
+        found = []
+        with self._lock:
+            i = bisect_left(self._entries, (key,))
+            while (
+                len(found) < limit
+                and i < len(self._entries)
+                and self._entries[i][0].startswith(key)
+            ):
+                _, name, id_ = self._entries[i]
+                found.append((id_, name))
+                i += 1
+        return found
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,96 @@
+import math
+from array import array
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PriceSeries:
+    """
+    Daily price series of one item held as two parallel typed arrays:
+    ``days`` (``date.toordinal()``, ascending) and ``values``.
+    """
+
+    __slots__ = ("days", "values")
+
+    def __init__(self, days: Optional[array] = None, values: Optional[array] = None):
+        self.days = days if days is not None else array("l")
+        self.values = values if values is not None else array("d")
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def between(
+        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+    ) -> "PriceSeries":
+        """The part of the series dated in ``[start_date, end_date)``."""
+        lo = 0 if start_date is None else bisect_left(self.days, start_date.toordinal())
+        hi = (
+            len(self.days)
+            if end_date is None
+            else bisect_left(self.days, end_date.toordinal())
+        )
+        return PriceSeries(self.days[lo:hi], self.values[lo:hi])
+
+    def dates(self) -> List[date]:
+        return [date.fromordinal(day) for day in self.days]
+
+
+def rolling_mean(values: array, window: int) -> array:
+    """
+    Trailing mean over the last ``window`` points (fewer at the start), in one
+    pass over a running sum.
+    """
+    result = array("d", [0.0]) * len(values)
+    total = 0.0
+    for i, value in enumerate(values):
+        total += value
+        if i >= window:
+            total -= values[i - window]
+        result[i] = total / min(i + 1, window)
+    return result
+
+
+def monthly_means(series: PriceSeries) -> Dict[date, float]:
+    """Average price per calendar month, keyed by the first day of the month."""
+    sums: Dict[date, List[float]] = {}
+    for day, value in zip(series.days, series.values):
+        month = date.fromordinal(day).replace(day=1)
+        acc = sums.setdefault(month, [0.0, 0])
+        acc[0] += value
+        acc[1] += 1
+    return {month: total / count for month, (total, count) in sums.items()}
+
+
+def chained_index(
+    monthly: Iterable[Dict[date, float]], base: float = 100.0
+) -> List[Tuple[date, float, int]]:
+    """
+    Chained Jevons price index over several items' monthly means.
+
+    Each month's link is the geometric mean of the relatives of the items
+    priced in it, each against the item's most recent earlier month, so items
+    entering or leaving the basket do not move the index. Returns ``(month,
+    index, items)`` with ``items`` the number of relatives behind the link;
+    the first month is the base and a month without relatives carries the
+    index over unchanged.
+    """
+    log_sums: Dict[date, float] = {}
+    counts: Dict[date, int] = {}
+    months = set()
+    for means in monthly:
+        ordered = sorted(means.items())
+        months.update(means)
+        for (_, prev), (month, value) in zip(ordered, ordered[1:]):
+            if prev > 0 and value > 0:
+                log_sums[month] = log_sums.get(month, 0.0) + math.log(value / prev)
+                counts[month] = counts.get(month, 0) + 1
+
+    index = base
+    result = []
+    for month in sorted(months):
+        count = counts.get(month, 0)
+        if count:
+            index *= math.exp(log_sums[month] / count)
+        result.append((month, index, count))
+    return result
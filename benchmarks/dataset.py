@@ -0,0 +1,123 @@
+"""
+Synthetic dataset for the benchmarks.
+
+Everything it creates is named ``bench-*`` and generated from a fixed random
+seed, so the same size always produces the same data.
+"""
+import random
+from typing import List, NamedTuple
+
+from app import crud, schemas
+from app.db.session import SessionLocal
+from app.db.upsert import upsert_id
+from app.models import Family, PaymentMethod, Unit
+
+BATCH_SIZE = 1000
+
+
+class DatasetSize(NamedTuple):
+    families: int = 3
+    payment_methods: int = 2  # per family
+    categories: int = 20
+    units: int = 3
+    items: int = 500
+    targets: int = 50
+    years: int = 2
+    transactions_per_month: int = 200
+    items_per_transaction: int = 4
+
+    @property
+    def transactions(self) -> int:
+        return self.years * 12 * self.transactions_per_month
+
+
+def family_name(i: int) -> str:
+    return f"bench-family-{i}"
+
+
+def payment_method_name(i: int) -> str:
+    return f"bench-pm-{i}"
+
+
+def create_dimensions(size: DatasetSize) -> None:
+    """
+    Families, units and payment methods, which the ingest paths would create
+    without a ratio or a tax deduction rate.
+    """
+    db = SessionLocal()
+    try:
+        for i in range(size.units):
+            upsert_id(db, Unit, {"name": f"bench-unit-{i}"}, {"ratio": float(i + 1)})
+        for f in range(size.families):
+            family_id = upsert_id(db, Family, {"name": family_name(f)})
+            for i in range(size.payment_methods):
+                upsert_id(
+                    db,
+                    PaymentMethod,
+                    {"name": payment_method_name(i), "family_id": family_id},
+                    {"tax_deduction_rate": 0.1 * (i + 1)},
+                    update=["tax_deduction_rate"],
+                )
+        db.commit()
+    finally:
+        db.close()
+
+
+def transactions(
+    size: DatasetSize, year: int, month: int, count: int, rng: random.Random
+) -> List[schemas.TransactionCreate]:
+    """``count`` random transactions dated in the given month."""
+    objs_in = []
+    for _ in range(count):
+        items = []
+        # Distinct: CRUDTransaction.create links an item once per transaction.
+        count_items = rng.randint(1, 2 * size.items_per_transaction - 1)
+        for item in rng.sample(range(size.items), min(count_items, size.items)):
+            items.append(
+                schemas.ItemData(
+                    name=f"bench-item-{item}",
+                    transaction_target=f"bench-target-{rng.randrange(size.targets)}",
+                    # An item keeps the category and unit it was created with.
+                    category=f"bench-category-{item % size.categories}",
+                    unit=f"bench-unit-{item % size.units}",
+                    price=round(rng.uniform(0.5, 200), 2),
+                    quantity=rng.randint(1, 5),
+                )
+            )
+        objs_in.append(
+            schemas.TransactionCreate(
+                family=family_name(rng.randrange(size.families)),
+                date=f"{year}-{month:02d}-{rng.randint(1, 28):02d}",
+                payment_method=schemas.PaymentMethodData(
+                    name=payment_method_name(rng.randrange(size.payment_methods))
+                ),
+                items=items,
+            )
+        )
+    return objs_in
+
+
+def seed(size: DatasetSize, first_year: int, random_seed: int = 0) -> int:
+    """
+    Create the dataset: ``size.years`` years of transactions from
+    ``first_year`` on, through `CRUDTransaction.create_bulk`. Returns the
+    number of transactions created.
+    """
+    create_dimensions(size)
+    rng = random.Random(random_seed)
+    created = 0
+    db = SessionLocal()
+    try:
+        for year in range(first_year, first_year + size.years):
+            for month in range(1, 13):
+                objs_in = transactions(
+                    size, year, month, size.transactions_per_month, rng
+                )
+                for start in range(0, len(objs_in), BATCH_SIZE):
+                    results = crud.transaction.create_bulk(
+                        db, objs_in=objs_in[start : start + BATCH_SIZE]
+                    )
+                    created += sum(result.id is not None for result in results)
+    finally:
+        db.close()
+    return created
@@ -0,0 +1,296 @@
+"""
+Benchmark the ingest and read hot paths, in-process, against the configured
+database.
+
+    python -m benchmarks.hot_paths [--seed] [--first-year 2021] [--years 2]
+                                   [--transactions-per-month 200] ...
+                                   [--repeat 30] [--output results.json]
+
+With ``--seed`` the synthetic dataset (`benchmarks.dataset`) is created
+first; without it, a dataset seeded with the same size and first year by an
+earlier run is assumed. Each case runs ``--warmup`` times untimed, then
+``--repeat`` times timed, recording latency percentiles and the number of
+SQL statements per run, then once more under tracemalloc for its peak
+memory. The HTTP cases go through the ASGI app with the settings of the
+environment, so e.g. ``RESPONSE_CACHE_ENABLED=false`` or
+``FAST_JSON_RESPONSES=true`` change what they measure.
+
+Writes happen in the year after the dataset, which is emptied again at the
+end. Results are written as JSON, to ``--output`` or stdout.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main as asgi
+from app import crud, schemas
+from app.core.config import settings
+from app.db import session
+from app.db.session import SessionLocal
+from app.utils.cursor import encode_cursor
+from benchmarks.dataset import DatasetSize, seed, transactions
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], Any]
+    # Untimed preparation before every run of ``run``.
+    setup: Optional[Callable[[], Any]] = None
+
+
+class QueryCounter:
+    """Counts the statements sent through the engines of `app.db.session`."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        engines = [session.engine]
+        if session.async_engine is not None:
+            engines.append(session.async_engine.sync_engine)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        self.count += 1
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, round(p / 100 * len(ordered) + 0.5 - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(
+    case: Case, counter: QueryCounter, warmup: int, repeat: int
+) -> Dict[str, Any]:
+    def once() -> Tuple[float, int]:
+        if case.setup is not None:
+            case.setup()
+        before = counter.count
+        started = time.perf_counter()
+        case.run()
+        return time.perf_counter() - started, counter.count - before
+
+    for _ in range(warmup):
+        once()
+    latencies, queries = map(list, zip(*(once() for _ in range(repeat))))
+
+    if case.setup is not None:
+        case.setup()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    ms = 1000
+    return {
+        "runs": repeat,
+        "latency_ms": {
+            "min": latencies[0] * ms,
+            "p50": percentile(latencies, 50) * ms,
+            "p90": percentile(latencies, 90) * ms,
+            "p99": percentile(latencies, 99) * ms,
+            "max": latencies[-1] * ms,
+            "mean": sum(latencies) / repeat * ms,
+        },
+        "queries": {"min": min(queries), "max": max(queries)},
+        "peak_memory_bytes": peak,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cases(
+    size: DatasetSize, first_year: int, client: TestClient, rng: random.Random
+) -> List[Case]:
+    last_year = first_year + size.years - 1
+    scratch_year = last_year + 1
+
+    def dataset_month() -> schemas.TransactionDelete:
+        return schemas.TransactionDelete(
+            year=rng.randint(first_year, last_year), month=rng.randint(1, 12)
+        )
+
+    def dataset_day() -> date:
+        return date(rng.randint(first_year, last_year), rng.randint(1, 12), 1)
+
+    def with_session(fn: Callable[..., Any]) -> Callable[[], Any]:
+        def run() -> Any:
+            db = SessionLocal()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+
+        return run
+
+    def create(db) -> Any:
+        (obj_in,) = transactions(size, scratch_year, 1, 1, rng)
+        return crud.transaction.create(db, obj_in=obj_in)
+
+    def fill_scratch_month() -> None:
+        db = SessionLocal()
+        try:
+            crud.transaction.create_bulk(
+                db,
+                objs_in=transactions(
+                    size, scratch_year, 2, size.transactions_per_month, rng
+                ),
+            )
+        finally:
+            db.close()
+
+    scratch_month = schemas.TransactionDelete(year=scratch_year, month=2)
+    # Read once up front: ids of the dataset to fetch by id.
+    ids = with_session(
+        lambda db: [t.id for t in crud.transaction.get_multi(db, limit=1000)]
+    )()
+
+    def post_transaction() -> Any:
+        (obj_in,) = transactions(size, scratch_year, 1, 1, rng)
+        return client.post("/api/transaction/", content=obj_in.json())
+
+    def get_month() -> Any:
+        return client.post(
+            "/api/transaction/retrive_month", content=dataset_month().json()
+        )
+
+    def get_page() -> Any:
+        cursor = encode_cursor(dataset_day(), 0)
+        return client.get("/api/transaction/", params={"cursor": cursor})
+
+    def get_report() -> Any:
+        month = dataset_month()
+        return client.get(
+            "/api/report/monthly", params={"year": month.year, "month": month.month}
+        )
+
+    return [
+        Case("crud.create", with_session(create)),
+        Case(
+            "crud.retrive_month",
+            with_session(lambda db: crud.transaction.retrive_month(db, dataset_month())),
+        ),
+        Case(
+            "crud.get_multi.cursor",
+            with_session(
+                lambda db: crud.transaction.get_multi(db, after=(dataset_day(), 0))
+            ),
+        ),
+        Case(
+            "crud.get_multi.offset",
+            with_session(
+                lambda db: crud.transaction.get_multi(
+                    db, skip=rng.randrange(size.transactions)
+                )
+            ),
+        ),
+        Case(
+            "crud.delete_month",
+            with_session(lambda db: crud.transaction.delete_month(db, scratch_month)),
+            setup=fill_scratch_month,
+        ),
+        Case("http.post_transaction", post_transaction),
+        Case(
+            "http.get_transaction",
+            lambda: client.get(f"/api/transaction/{rng.choice(ids)}"),
+        ),
+        Case("http.get_transactions", get_page),
+        Case("http.retrive_month", get_month),
+        Case("http.report_monthly", get_report),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="create the dataset")
+    parser.add_argument("--first-year", type=int, default=2021)
+    for field, default in DatasetSize._field_defaults.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=default)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--output", help="file to write the results to")
+    args = parser.parse_args()
+
+    size = DatasetSize(*(getattr(args, field) for field in DatasetSize._fields))
+    scratch_year = args.first_year + size.years
+    started_at = datetime.now(timezone.utc)
+
+    seeded = None
+    if args.seed:
+        started = time.perf_counter()
+        seeded = {
+            "transactions": seed(size, args.first_year, args.random_seed),
+            "seconds": time.perf_counter() - started,
+        }
+
+    counter = QueryCounter()
+    rng = random.Random(args.random_seed)
+    results = {}
+    with TestClient(asgi.app) as client:
+        try:
+            for case in cases(size, args.first_year, client, rng):
+                results[case.name] = measure(case, counter, args.warmup, args.repeat)
+                print(
+                    f"{case.name}: p50 "
+                    f"{results[case.name]['latency_ms']['p50']:.2f} ms",
+                    file=sys.stderr,
+                )
+        finally:
+            db = SessionLocal()
+            try:
+                crud.transaction.delete_range(
+                    db, date(scratch_year, 1, 1), date(scratch_year + 1, 1, 1)
+                )
+            finally:
+                db.close()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "settings": {
+            name: getattr(settings, name)
+            for name in (
+                "DB_ASYNC",
+                "DB_POOL_SIZE",
+                "DIMENSION_CACHE_ENABLED",
+                "PRICE_SERIES_CACHE_ENABLED",
+                "RESPONSE_CACHE_ENABLED",
+                "FAST_JSON_RESPONSES",
+            )
+        },
+        "dataset": {"first_year": args.first_year, **size._asdict()},
+        "seed": seeded,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
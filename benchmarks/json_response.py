@@ -0,0 +1,135 @@
+"""
+Compare the response_model path of the transaction read endpoints with the
+plain-row path behind FAST_JSON_RESPONSES, and check their bodies are equal.
+
+    python -m benchmarks.json_response [--year 2023] [--month 1] [--seed 2000]
+                                       [--repeat 5]
+
+With ``--seed N``, N synthetic transactions are first added to the month
+(through create_bulk, and left in place). Runs against the configured
+database.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import parse_obj_as
+
+from app import crud, schemas
+from app.api.fast_json import dumps_transactions, orjson
+from app.db.session import SessionLocal
+from app.db.upsert import upsert_id
+from app.models import PaymentMethod, Unit
+
+
+def seed(year: int, month: int, count: int, items: int = 500) -> None:
+    rng = random.Random(0)
+    db = SessionLocal()
+    try:
+        # Created up front: the ingest paths leave tax_deduction_rate unset,
+        # which schemas.PaymentMethod rejects.
+        upsert_id(db, Unit, {"name": "ea"}, {"ratio": 1.0})
+        for name, rate in (("bench-card", 0.1), ("bench-cash", 0.2)):
+            upsert_id(
+                db,
+                PaymentMethod,
+                {"name": name, "family_id": None},
+                {"tax_deduction_rate": rate},
+                update=["tax_deduction_rate"],
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    objs_in = [
+        schemas.TransactionCreate(
+            date=f"{year}-{month:02d}-{rng.randint(1, 28):02d}",
+            payment_method=schemas.PaymentMethodData(
+                name=rng.choice(["bench-card", "bench-cash"])
+            ),
+            items=[
+                schemas.ItemData(
+                    name=f"bench-item-{rng.randrange(items)}",
+                    transaction_target=f"bench-shop-{rng.randrange(20)}",
+                    category=f"bench-category-{rng.randrange(10)}",
+                    unit="ea",
+                    price=round(rng.uniform(0.5, 100), 2),
+                    quantity=1,
+                )
+                for _ in range(rng.randint(1, 6))
+            ],
+        )
+        for _ in range(count)
+    ]
+    db = SessionLocal()
+    try:
+        for start in range(0, count, 1000):
+            crud.transaction.create_bulk(db, objs_in=objs_in[start : start + 1000])
+    finally:
+        db.close()
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--year", type=int, default=2023)
+    parser.add_argument("--month", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.year, args.month, args.seed)
+    target = schemas.TransactionDelete(year=args.year, month=args.month)
+
+    def model_path() -> bytes:
+        db = SessionLocal()
+        try:
+            transactions = crud.transaction.retrive_month(db, target)
+            content = parse_obj_as(List[schemas.Transaction], transactions)
+            return JSONResponse(content=jsonable_encoder(content)).body
+        finally:
+            db.close()
+
+    def plain_path() -> bytes:
+        db = SessionLocal()
+        try:
+            return dumps_transactions(crud.transaction.retrive_month_plain(db, target))
+        finally:
+            db.close()
+
+    body = model_path()
+    if plain_path() != body:
+        raise SystemExit("plain-row response differs from the response_model one")
+
+    model = timed(model_path, args.repeat)
+    plain = timed(plain_path, args.repeat)
+    print(
+        json.dumps(
+            {
+                "transactions": len(json.loads(body)),
+                "bytes": len(body),
+                "encoder": "orjson" if orjson is not None else "json",
+                "response_model_s": min(model),
+                "plain_s": min(plain),
+                "speedup": min(model) / min(plain),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
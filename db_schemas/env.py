@@ -6,6 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.core.config import settings
+from app.db import partitions
 from app.db.base import Base
 
 # this is the Alembic Config object, which provides
@@ -30,6 +31,13 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def include_name(name, type_, parent_names):
+    # The monthly partitions are created at runtime, see app.db.partitions.
+    if type_ == "table":
+        return not partitions.is_partition(name)
+    return True
+
+
 def get_url():
     return settings.SQLALCHEMY_DATABASE_URI
 
@@ -52,6 +60,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -74,7 +83,12 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_name=include_name,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
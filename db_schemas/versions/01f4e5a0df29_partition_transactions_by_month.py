@@ -0,0 +1,213 @@
+"""partition transactions by month
+
+Revision ID: 01f4e5a0df29
+Revises: a5427bc6d234
+Create Date: 2026-10-17 22:06:47.318420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "01f4e5a0df29"
+down_revision = "a5427bc6d234"
+branch_labels = None
+depends_on = None
+
+# Foreign keys on transaction.id: a partitioned table has no unique key on id
+# alone for them to reference.
+REFERENCES = [
+    ("transaction_item_association", "CASCADE"),
+    ("transaction_line", "CASCADE"),
+    ("ledger_entry", None),
+]
+
+LINE_COLUMNS = (
+    "id, transaction_id, item_id, date, family_id, payment_method_id, "
+    "category_id, transaction_target_id, quantity, unit_price, amount, "
+    "base_quantity"
+)
+
+
+def _transaction_table(primary_key, **kw) -> None:
+    op.create_table(
+        "transaction",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('transaction_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("payment_method_id", sa.Integer(), nullable=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(["payment_method_id"], ["payment_method.id"]),
+        sa.PrimaryKeyConstraint(*primary_key),
+        **kw,
+    )
+
+
+def _line_table(primary_key, **kw) -> None:
+    op.create_table(
+        "transaction_line",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('transaction_line_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("transaction_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("family_id", sa.Integer(), nullable=True),
+        sa.Column("payment_method_id", sa.Integer(), nullable=True),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("transaction_target_id", sa.Integer(), nullable=True),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("base_quantity", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["category_id"], ["category.id"]),
+        sa.ForeignKeyConstraint(["family_id"], ["family.id"]),
+        sa.ForeignKeyConstraint(["item_id"], ["item.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["payment_method_id"], ["payment_method.id"]),
+        sa.ForeignKeyConstraint(["transaction_target_id"], ["transaction_target.id"]),
+        sa.PrimaryKeyConstraint(*primary_key),
+        **kw,
+    )
+
+
+def _drop_indexes() -> None:
+    op.drop_index("ix_transaction_date_id", table_name="transaction")
+    op.drop_index(
+        "ix_transaction_payment_method_id_date", table_name="transaction"
+    )
+    op.drop_index("ix_transaction_line_date", table_name="transaction_line")
+    op.drop_index(
+        op.f("ix_transaction_line_item_id"), table_name="transaction_line"
+    )
+    op.drop_index(
+        op.f("ix_transaction_line_transaction_id"), table_name="transaction_line"
+    )
+
+
+def _create_indexes() -> None:
+    # Built once the rows are in, as in fa42fd38e886.
+    op.create_index("ix_transaction_date_id", "transaction", ["date", "id"])
+    op.create_index(
+        "ix_transaction_payment_method_id_date",
+        "transaction",
+        ["payment_method_id", "date"],
+    )
+    op.create_index(
+        op.f("ix_transaction_line_item_id"), "transaction_line", ["item_id"]
+    )
+    op.create_index(
+        op.f("ix_transaction_line_transaction_id"),
+        "transaction_line",
+        ["transaction_id"],
+    )
+    op.create_index(
+        "ix_transaction_line_date",
+        "transaction_line",
+        ["date"],
+        postgresql_include=[
+            "family_id",
+            "category_id",
+            "payment_method_id",
+            "transaction_target_id",
+            "amount",
+        ],
+    )
+
+
+def _set_aside(table: str, suffix: str) -> None:
+    """Rename ``table`` out of the way, with the constraint its pkey names."""
+    op.rename_table(table, f"{table}_{suffix}")
+    op.execute(
+        f'ALTER TABLE "{table}_{suffix}" '
+        f'RENAME CONSTRAINT "{table}_pkey" TO "{table}_{suffix}_pkey"'
+    )
+
+
+def upgrade() -> None:
+    for table, _ in REFERENCES:
+        op.drop_constraint(
+            f"{table}_transaction_id_fkey", table, type_="foreignkey"
+        )
+    _drop_indexes()
+    op.drop_index("ix_transaction_id", table_name="transaction")
+    _set_aside("transaction", "unpartitioned")
+    _set_aside("transaction_line", "unpartitioned")
+
+    _transaction_table(["id", "date"], postgresql_partition_by="RANGE (date)")
+    _line_table(["id", "date"], postgresql_partition_by="RANGE (date)")
+    # The sequences follow the columns, or dropping the old tables drops them.
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+    op.execute("ALTER SEQUENCE transaction_line_id_seq OWNED BY transaction_line.id")
+
+    # One partition per month with transactions, and the current month; the
+    # application creates the next ones (app.db.partitions).
+    months = op.get_bind().execute(
+        sa.text(
+            "SELECT CAST(date_trunc('month', date) AS date) AS month "
+            "FROM transaction_unpartitioned "
+            "UNION SELECT CAST(date_trunc('month', current_date) AS date) "
+            "ORDER BY month"
+        )
+    )
+    for (month,) in months.all():
+        next_month = month.replace(
+            year=month.year + month.month // 12, month=month.month % 12 + 1
+        )
+        for table in ("transaction", "transaction_line"):
+            op.execute(
+                f'CREATE TABLE "{table}_p{month:%Y_%m}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month}') TO ('{next_month}')"
+            )
+
+    op.execute(
+        'INSERT INTO "transaction" (id, payment_method_id, date) '
+        "SELECT id, payment_method_id, date FROM transaction_unpartitioned"
+    )
+    op.execute(
+        f"INSERT INTO transaction_line ({LINE_COLUMNS}) "
+        f"SELECT {LINE_COLUMNS} FROM transaction_line_unpartitioned"
+    )
+    op.drop_table("transaction_line_unpartitioned")
+    op.drop_table("transaction_unpartitioned")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _drop_indexes()
+    _set_aside("transaction", "partitioned")
+    _set_aside("transaction_line", "partitioned")
+
+    _transaction_table(["id"])
+    _line_table(["id"])
+    op.execute('ALTER SEQUENCE transaction_id_seq OWNED BY "transaction".id')
+    op.execute("ALTER SEQUENCE transaction_line_id_seq OWNED BY transaction_line.id")
+
+    op.execute(
+        'INSERT INTO "transaction" (id, payment_method_id, date) '
+        "SELECT id, payment_method_id, date FROM transaction_partitioned"
+    )
+    op.execute(
+        f"INSERT INTO transaction_line ({LINE_COLUMNS}) "
+        f"SELECT {LINE_COLUMNS} FROM transaction_line_partitioned"
+    )
+    # Drops the month partitions with them.
+    op.drop_table("transaction_line_partitioned")
+    op.drop_table("transaction_partitioned")
+    op.create_index(op.f("ix_transaction_id"), "transaction", ["id"])
+    _create_indexes()
+    for table, ondelete in REFERENCES:
+        op.create_foreign_key(
+            f"{table}_transaction_id_fkey",
+            table,
+            "transaction",
+            ["transaction_id"],
+            ["id"],
+            ondelete=ondelete,
+        )
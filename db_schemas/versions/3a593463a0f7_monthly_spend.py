@@ -0,0 +1,41 @@
+"""monthly spend
+
+Revision ID: 3a593463a0f7
+Revises: 5a0d67232eff
+Create Date: 2026-10-17 13:40:02.117934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3a593463a0f7"
+down_revision = "5a0d67232eff"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fill it afterwards with `python manage.py rebuild-monthly-spend`.
+    op.create_table(
+        "monthly_spend",
+        sa.Column("family_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("payment_method_id", sa.Integer(), nullable=False),
+        sa.Column("transaction_target_id", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "family_id",
+            "month",
+            "category_id",
+            "payment_method_id",
+            "transaction_target_id",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_spend")
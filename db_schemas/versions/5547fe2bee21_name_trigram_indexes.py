@@ -0,0 +1,43 @@
+"""name trigram indexes
+
+Revision ID: 5547fe2bee21
+Revises: 01f4e5a0df29
+Create Date: 2026-10-17 23:02:15.640371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5547fe2bee21"
+down_revision = "01f4e5a0df29"
+branch_labels = None
+depends_on = None
+
+TABLES = ("item", "transaction_target", "category")
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f"ix_{table}_name_trgm",
+                table,
+                ["name"],
+                postgresql_using="gin",
+                postgresql_ops={"name": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                f"ix_{table}_name_trgm",
+                table_name=table,
+                postgresql_concurrently=True,
+            )
+    # The extension is left installed: other objects may depend on it.
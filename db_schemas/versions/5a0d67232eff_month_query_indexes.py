@@ -0,0 +1,49 @@
+"""month query indexes
+
+Revision ID: 5a0d67232eff
+Revises: d3c97dfc3c96
+Create Date: 2026-10-17 11:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5a0d67232eff"
+down_revision = "d3c97dfc3c96"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # transaction(date) range scans are served by ix_transaction_date_id.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transaction_payment_method_id_date",
+            "transaction",
+            ["payment_method_id", "date"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_price_item_id_date",
+            "price",
+            ["item_id", "date"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_price_item_id_date",
+            table_name="price",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_transaction_payment_method_id_date",
+            table_name="transaction",
+            postgresql_concurrently=True,
+        )
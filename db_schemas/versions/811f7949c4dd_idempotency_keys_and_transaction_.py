@@ -0,0 +1,39 @@
+"""idempotency keys and transaction fingerprints
+
+Revision ID: 811f7949c4dd
+Revises: 5547fe2bee21
+Create Date: 2026-10-17 20:41:45.277384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "811f7949c4dd"
+down_revision = "5547fe2bee21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotency_key",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("request_hash", sa.LargeBinary(), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("response", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    # Existing transactions keep a null fingerprint: only those created from
+    # here on are compared.
+    op.add_column("transaction", sa.Column("fingerprint", sa.LargeBinary()))
+    op.create_index("ix_transaction_fingerprint", "transaction", ["fingerprint"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transaction_fingerprint", table_name="transaction")
+    op.drop_column("transaction", "fingerprint")
+    op.drop_table("idempotency_key")
@@ -0,0 +1,38 @@
+"""association item_id index
+
+Revision ID: 886d48afca15
+Revises: 3a593463a0f7
+Create Date: 2026-10-17 15:12:40.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "886d48afca15"
+down_revision = "3a593463a0f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The primary key leads with transaction_id; the orphan sweep looks items
+    # up the other way round.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transaction_item_association_item_id",
+            "transaction_item_association",
+            ["item_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_transaction_item_association_item_id",
+            table_name="transaction_item_association",
+            postgresql_concurrently=True,
+        )
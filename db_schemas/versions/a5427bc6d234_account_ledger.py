@@ -0,0 +1,101 @@
+"""account ledger
+
+Revision ID: a5427bc6d234
+Revises: fa42fd38e886
+Create Date: 2026-10-17 21:18:30.772015
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a5427bc6d234"
+down_revision = "fa42fd38e886"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_entry",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["transaction_id"], ["transaction.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("transaction_id"),
+    )
+    op.create_index(
+        "ix_ledger_entry_account_id_date", "ledger_entry", ["account_id", "date"]
+    )
+    op.create_table(
+        "account_snapshot",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("balance", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("account_id", "date"),
+    )
+
+    op.add_column("payment_method", sa.Column("account_id", sa.Integer()))
+    op.create_index(
+        op.f("ix_payment_method_account_id"), "payment_method", ["account_id"]
+    )
+    op.create_foreign_key(
+        "payment_method_account_id_fkey",
+        "payment_method",
+        "account",
+        ["account_id"],
+        ["id"],
+    )
+
+    # Nothing maintained balances so far; whatever they hold is taken as an
+    # opening entry, so that they agree with the ledger.
+    op.alter_column(
+        "account",
+        "balance",
+        type_=sa.Float(),
+        existing_type=sa.Integer(),
+        postgresql_using="coalesce(balance, 0)::double precision",
+    )
+    op.alter_column("account", "balance", nullable=False, existing_type=sa.Float())
+    op.execute(
+        """
+        INSERT INTO ledger_entry (account_id, date, amount)
+        SELECT id, current_date, balance FROM account WHERE balance <> 0
+        """
+    )
+    op.add_column(
+        "account",
+        sa.Column(
+            "entries_since_snapshot",
+            sa.Integer(),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+    op.alter_column("account", "entries_since_snapshot", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("account", "entries_since_snapshot")
+    op.alter_column(
+        "account",
+        "balance",
+        type_=sa.Integer(),
+        existing_type=sa.Float(),
+        nullable=True,
+        postgresql_using="round(balance)::integer",
+    )
+    op.drop_constraint(
+        "payment_method_account_id_fkey", "payment_method", type_="foreignkey"
+    )
+    op.drop_index(op.f("ix_payment_method_account_id"), table_name="payment_method")
+    op.drop_column("payment_method", "account_id")
+    op.drop_table("account_snapshot")
+    op.drop_index("ix_ledger_entry_account_id_date", table_name="ledger_entry")
+    op.drop_table("ledger_entry")
@@ -0,0 +1,37 @@
+"""transaction date id index
+
+Revision ID: d3c97dfc3c96
+Revises: 65eaf9a5cf48
+Create Date: 2026-10-17 10:12:41.208316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d3c97dfc3c96"
+down_revision = "65eaf9a5cf48"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transaction_date_id",
+            "transaction",
+            ["date", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_transaction_date_id",
+            table_name="transaction",
+            postgresql_concurrently=True,
+        )
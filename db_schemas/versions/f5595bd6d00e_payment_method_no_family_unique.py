@@ -0,0 +1,51 @@
+"""payment method without family unique index
+
+Revision ID: f5595bd6d00e
+Revises: 886d48afca15
+Create Date: 2026-10-17 16:02:51.730114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f5595bd6d00e"
+down_revision = "886d48afca15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # payment_mtd_name_family_id treats NULL family_ids as distinct, so
+    # duplicates may exist; fold them into the oldest row first. Run
+    # `manage.py rebuild-monthly-spend` afterwards if any were merged.
+    duplicates = """
+        SELECT id, min(id) OVER (PARTITION BY name) AS keep
+        FROM payment_method
+        WHERE family_id IS NULL
+    """
+    op.execute(
+        f"""
+        UPDATE transaction SET payment_method_id = d.keep
+        FROM ({duplicates}) AS d
+        WHERE transaction.payment_method_id = d.id AND d.id <> d.keep
+        """
+    )
+    op.execute(
+        f"""
+        DELETE FROM payment_method USING ({duplicates}) AS d
+        WHERE payment_method.id = d.id AND d.id <> d.keep
+        """
+    )
+    op.create_index(
+        "payment_mtd_name_no_family",
+        "payment_method",
+        ["name"],
+        unique=True,
+        postgresql_where=sa.text("family_id IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("payment_mtd_name_no_family", table_name="payment_method")
@@ -0,0 +1,109 @@
+"""transaction line
+
+Revision ID: fa42fd38e886
+Revises: f5595bd6d00e
+Create Date: 2026-10-17 20:41:12.503196
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "fa42fd38e886"
+down_revision = "f5595bd6d00e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transaction_line",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("family_id", sa.Integer(), nullable=True),
+        sa.Column("payment_method_id", sa.Integer(), nullable=True),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("transaction_target_id", sa.Integer(), nullable=True),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("base_quantity", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["category_id"], ["category.id"]),
+        sa.ForeignKeyConstraint(["family_id"], ["family.id"]),
+        sa.ForeignKeyConstraint(["item_id"], ["item.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["payment_method_id"], ["payment_method.id"]),
+        sa.ForeignKeyConstraint(
+            ["transaction_id"], ["transaction.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["transaction_target_id"], ["transaction_target.id"]
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_transaction_line_item_id"), "transaction_line", ["item_id"]
+    )
+    op.create_index(
+        op.f("ix_transaction_line_transaction_id"),
+        "transaction_line",
+        ["transaction_id"],
+    )
+
+    # Existing transactions only recorded which items they held: backfill one
+    # line per item with a quantity of 1, valued and attributed the way the
+    # rollup used to rebuild them (the item's price on the transaction date,
+    # its first transaction target), so that the rollup does not move.
+    op.execute(
+        """
+        INSERT INTO transaction_line (
+            transaction_id, item_id, date, family_id, payment_method_id,
+            category_id, transaction_target_id, quantity, unit_price, amount,
+            base_quantity
+        )
+        SELECT
+            t.id, i.id, t.date, pm.family_id, t.payment_method_id,
+            i.category_id, target.id, 1, coalesce(price.value, 0),
+            coalesce(price.value, 0), unit.ratio
+        FROM transaction AS t
+        JOIN transaction_item_association AS a ON a.transaction_id = t.id
+        JOIN item AS i ON i.id = a.item_id
+        LEFT JOIN payment_method AS pm ON pm.id = t.payment_method_id
+        LEFT JOIN unit ON unit.id = i.unit_id
+        LEFT JOIN LATERAL (
+            SELECT min(transaction_target_id) AS id
+            FROM transaction_target_item
+            WHERE item_id = i.id
+        ) AS target ON true
+        LEFT JOIN LATERAL (
+            SELECT max(value) AS value
+            FROM price
+            WHERE item_id = i.id AND date = t.date
+        ) AS price ON true
+        ORDER BY t.id, i.id
+        """
+    )
+    # Built after the backfill rather than maintained through it.
+    op.create_index(
+        "ix_transaction_line_date",
+        "transaction_line",
+        ["date"],
+        postgresql_include=[
+            "family_id",
+            "category_id",
+            "payment_method_id",
+            "transaction_target_id",
+            "amount",
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transaction_line_date", table_name="transaction_line")
+    op.drop_index(
+        op.f("ix_transaction_line_transaction_id"), table_name="transaction_line"
+    )
+    op.drop_index(op.f("ix_transaction_line_item_id"), table_name="transaction_line")
+    op.drop_table("transaction_line")
@@ -3,7 +3,11 @@ from fastapi import FastAPI
 from app import main
 from app.core.config import settings
 
-app = FastAPI()
+# Starlette does not run the startup and shutdown handlers of mounted
+# applications.
+app = FastAPI(
+    on_startup=main.app.router.on_startup, on_shutdown=main.app.router.on_shutdown
+)
 
 
 app.mount(settings.API_STR, main.app)
@@ -0,0 +1,149 @@
+"""
+Maintenance commands.
+
+    python manage.py rebuild-monthly-spend [--from YYYY-MM] [--to YYYY-MM]
+    python manage.py import-csv PATH
+    python manage.py sweep-orphans [--from YYYY-MM] [--to YYYY-MM]
+    python manage.py reconcile-accounts [--fix]
+    python manage.py create-partitions [--ahead MONTHS]
+    python manage.py purge-idempotency-keys
+"""
+import argparse
+from datetime import date
+
+from app import crud
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import SessionLocal
+
+
+def parse_month(value: str) -> date:
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def rebuild_monthly_spend(args: argparse.Namespace) -> None:
+    end_date = next_month(args.to_month) if args.to_month else None
+    db = SessionLocal()
+    try:
+        crud.monthly_spend.rebuild(db, args.from_month, end_date)
+    finally:
+        db.close()
+
+
+def import_csv(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as file:
+            result = crud.statement.import_csv(db, file)
+    finally:
+        db.close()
+    print(f"{result.transactions} transactions from {result.lines} lines")
+    for row in result.rejected:
+        print(f"line {row.line}: {row.error}")
+
+
+def sweep_orphans(args: argparse.Namespace) -> None:
+    end_date = next_month(args.to_month) if args.to_month else None
+    db = SessionLocal()
+    try:
+        prices, items = crud.transaction.sweep_orphans(
+            db, args.from_month, end_date, batch_size=args.batch_size
+        )
+    finally:
+        db.close()
+    print(f"deleted {prices} prices and {items} items")
+
+
+def reconcile_accounts(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        discrepancies = crud.account.reconcile(db, fix=args.fix)
+    finally:
+        db.close()
+    for account_id, day, recorded, expected in discrepancies:
+        where = "balance" if day is None else f"snapshot of {day}"
+        print(f"account {account_id} {where}: {recorded} instead of {expected}")
+    fixed = ", fixed" if args.fix and discrepancies else ""
+    print(f"{len(discrepancies)} discrepancies{fixed}")
+    if discrepancies and not args.fix:
+        raise SystemExit(1)
+
+
+def create_partitions(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        partitions.ensure_ahead(db, args.ahead)
+        months = partitions.existing(db)
+    finally:
+        db.close()
+    print(
+        f"{len(months)} monthly partitions, "
+        f"{months[0]:%Y-%m} to {months[-1]:%Y-%m}"
+    )
+
+
+def purge_idempotency_keys(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        purged = crud.idempotency_key.purge(db)
+    finally:
+        db.close()
+    print(f"deleted {purged} idempotency keys")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-monthly-spend", help="Regenerate the monthly_spend rollup."
+    )
+    rebuild.add_argument("--from", dest="from_month", type=parse_month)
+    rebuild.add_argument("--to", dest="to_month", type=parse_month)
+    rebuild.set_defaults(func=rebuild_monthly_spend)
+
+    import_ = commands.add_parser(
+        "import-csv", help="Import a CSV statement (see CRUDStatement.import_csv)."
+    )
+    import_.add_argument("path")
+    import_.set_defaults(func=import_csv)
+
+    sweep = commands.add_parser(
+        "sweep-orphans", help="Delete items and prices no transaction refers to."
+    )
+    sweep.add_argument("--from", dest="from_month", type=parse_month)
+    sweep.add_argument("--to", dest="to_month", type=parse_month)
+    sweep.add_argument("--batch-size", type=int, default=1000)
+    sweep.set_defaults(func=sweep_orphans)
+
+    reconcile = commands.add_parser(
+        "reconcile-accounts",
+        help="Check account balances and snapshots against the full ledger.",
+    )
+    reconcile.add_argument("--fix", action="store_true")
+    reconcile.set_defaults(func=reconcile_accounts)
+
+    create = commands.add_parser(
+        "create-partitions",
+        help="Create the transaction partitions of the coming months.",
+    )
+    create.add_argument("--ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD)
+    create.set_defaults(func=create_partitions)
+
+    purge = commands.add_parser(
+        "purge-idempotency-keys",
+        help="Delete the idempotency keys past IDEMPOTENCY_KEY_TTL_HOURS.",
+    )
+    purge.set_defaults(func=purge_idempotency_keys)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
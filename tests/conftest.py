@@ -0,0 +1,49 @@
+"""
+The tests run against the database of ``SQLALCHEMY_DATABASE_URI``, migrated
+with ``alembic upgrade head``; every test starts from empty tables holding
+only two families, their payment methods and two units.
+"""
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.cache import invalidate_all
+from app.db.session import SessionLocal, engine
+from main import app
+
+
+@pytest.fixture(autouse=True)
+def clean() -> None:
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+        conn.execute(
+            text("INSERT INTO unit (name, ratio) VALUES ('ea', 1), ('kg', 1000)")
+        )
+        conn.execute(text("INSERT INTO family (name) VALUES ('lee'), ('kim')"))
+        conn.execute(
+            text(
+                "INSERT INTO payment_method (name, family_id, tax_deduction_rate) "
+                "VALUES ('card', 1, 0.1), ('cash', 1, 0.2), ('card', 2, 0.1)"
+            )
+        )
+    invalidate_all()
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+
+from app import crud
+from app.core.config import settings
+from app.db.cache import invalidate_all
+
+from tests.utils import transactions
+
+API = f"{settings.API_STR}/transaction"
+
+
+def read(client, monkeypatch, fast: bool) -> dict:
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast)
+    invalidate_all()
+    month = {"year": 2023, "month": 4}
+    return {
+        "list": client.get(f"{API}/", params={"limit": 50}).content,
+        "one": client.get(f"{API}/1").content,
+        "month": client.post(f"{API}/retrive_month", json=month).content,
+    }
+
+
+@pytest.mark.parametrize(
+    "rate", [0.1, 1e-05, 1e17, 0.0], ids=["short", "tiny", "huge", "zero"]
+)
+def test_fast_json_matches_response_model(db, client, monkeypatch, rate):
+    db.execute(
+        text("UPDATE payment_method SET tax_deduction_rate = :rate WHERE id = 2"),
+        {"rate": rate},
+    )
+    db.commit()
+    objs_in = transactions(6)
+    objs_in[0].items[0].name = "café ☕"
+    crud.transaction.create_bulk(db, objs_in=objs_in)
+
+    fast = read(client, monkeypatch, fast=True)
+    assert fast == read(client, monkeypatch, fast=False)
+    assert fast["month"].startswith(b"[{") and "café ☕".encode() in fast["month"]
@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text
+
+from app import crud
+from app.api.idempotency import REPLAYED_HEADER, _request_hash
+from app.core.config import settings
+from app.models import IdempotencyKey, Transaction
+
+from main import app
+from tests.utils import transactions
+
+API = f"{settings.API_STR}/transaction/"
+
+
+@pytest.fixture
+def payload() -> dict:
+    return transactions(1)[0].dict()
+
+
+def count(db, model) -> int:
+    db.expire_all()
+    return db.scalar(select(func.count()).select_from(model))
+
+
+def post(client, payload, key="key-1"):
+    return client.post(API, json=payload, headers={"Idempotency-Key": key})
+
+
+def test_retry_is_replayed(db, client, payload):
+    first = post(client, payload)
+    retry = post(client, payload)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.content == first.content
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert count(db, Transaction) == 1
+
+
+def test_key_of_another_request_is_refused(db, client, payload):
+    post(client, payload)
+    other = post(client, {**payload, "date": "2023-04-02"})
+
+    assert other.status_code == 422
+    assert count(db, Transaction) == 1
+
+
+def test_key_still_being_handled_conflicts(db, client, payload):
+    crud.idempotency_key.claim(
+        db, "key-1", "/transaction/", _request_hash(transactions(1)[0])
+    )
+
+    assert post(client, payload).status_code == 409
+    assert count(db, Transaction) == 0
+
+
+def test_failed_request_releases_its_key(db, client, payload):
+    bad = {**payload, "items": [{**payload["items"][0], "unit": "parsec"}]}
+    assert post(client, bad).status_code == 400
+    assert count(db, IdempotencyKey) == 0
+
+    assert post(client, payload).status_code == 200
+    assert count(db, Transaction) == 1
+
+
+def test_write_and_response_commit_together(db, payload, monkeypatch):
+    def broken(db, key, status_code, response):
+        db.execute(text("SELECT 1 / 0"))
+
+    monkeypatch.setattr(crud.idempotency_key, "complete", broken)
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert post(client, payload).status_code == 500
+
+    # Neither the transaction nor the key: the retry can go ahead.
+    assert count(db, Transaction) == 0
+    assert count(db, IdempotencyKey) == 0
@@ -0,0 +1,33 @@
+from app import crud, schemas
+from app.core.ingest import IngestBuffer
+
+from tests.utils import transactions
+
+
+def test_failed_batch_fails_its_tickets(monkeypatch):
+    buffer = IngestBuffer(maxsize=10, batch_size=10, tickets_kept=10)
+    batch = [(f"ticket-{i}", obj_in) for i, obj_in in enumerate(transactions(3))]
+
+    def broken(db, *, objs_in):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(crud.transaction, "create_bulk", broken)
+    buffer._write(batch)
+
+    for ticket, _ in batch:
+        result = buffer.get(ticket)
+        assert result.status == schemas.IngestStatus.failed
+        assert result.error == IngestBuffer.FAILED
+    assert buffer.written == 0
+
+
+def test_batch_is_written_in_one_go(db):
+    buffer = IngestBuffer(maxsize=10, batch_size=10, tickets_kept=10)
+    batch = [(f"ticket-{i}", obj_in) for i, obj_in in enumerate(transactions(3))]
+    buffer._write(batch)
+
+    results = [buffer.get(ticket) for ticket, _ in batch]
+    assert {result.status for result in results} == {schemas.IngestStatus.created}
+    ids = [result.id for result in results]
+    assert sorted(t.id for t in crud.transaction.get_multi(db)) == sorted(ids)
+    assert (buffer.batches, buffer.written) == (1, 3)
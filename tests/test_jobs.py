@@ -0,0 +1,158 @@
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+
+import pytest
+from sqlalchemy import select, text
+
+from app import crud
+from app.core import jobs
+from app.core.config import settings
+from app.core.jobs import JobRunner
+from app.crud.job import StaleJob
+from app.db.cache import data_versions
+from app.models import Transaction
+
+from tests.utils import transactions
+
+
+def purge(db, **params):
+    return crud.job.create(
+        db,
+        "purge",
+        {"start_date": "2023-04-01", "end_date": "2023-06-30", **params},
+    )
+
+
+def make_stale(db, id):
+    db.execute(
+        text("UPDATE job SET heartbeat_at = now() - interval '1 day' WHERE id = :id"),
+        {"id": id},
+    )
+    db.commit()
+
+
+def test_claim_takes_queued_then_stale_jobs(db):
+    first, second = purge(db), purge(db)
+
+    assert crud.job.claim(db) == (first.id, 1)
+    assert crud.job.claim(db) == (second.id, 1)
+    assert crud.job.claim(db) is None
+
+    make_stale(db, first.id)
+    assert crud.job.claim(db) == (first.id, 2)
+
+
+def test_stale_run_is_fenced_off(db):
+    job = purge(db)
+    crud.job.claim(db)
+    make_stale(db, job.id)
+    crud.job.claim(db)
+
+    with pytest.raises(StaleJob):
+        crud.job.progress(db, job.id, 1, done=1)
+    db.rollback()
+    crud.job.progress(db, job.id, 2, done=1)
+    db.commit()
+
+
+def test_purge_resumes_after_the_months_done(db):
+    for month in (4, 5, 6):
+        crud.transaction.create_bulk(
+            db, objs_in=transactions(3, month=month, start=10 * month)
+        )
+    job = purge(db)
+    _, attempt = crud.job.claim(db)
+    # The run that died had purged April.
+    crud.job.progress(db, job.id, attempt, done=1, total=3)
+    db.commit()
+
+    jobs.run(job.id, attempt)
+
+    db.expire_all()
+    job = crud.job.get(db, job.id)
+    assert (job.status, job.done, job.result) == ("succeeded", 3, {"deleted": 6})
+    left = db.scalars(select(Transaction.date).order_by(Transaction.date)).all()
+    assert left == [date(2023, 4, day) for day in (1, 2, 3)]
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class BrokenPool:
+    def submit(self, *args):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+
+@pytest.mark.anyio
+async def test_broken_pool_requeues_the_job(db, monkeypatch):
+    job = purge(db)
+    id, attempt = crud.job.claim(db)
+    runner = JobRunner(workers=1)
+    new_pool = object()
+    monkeypatch.setattr(runner, "_new_pool", lambda: new_pool)
+    runner._pool = BrokenPool()
+    runner._wake = asyncio.Event()
+    runner._task = asyncio.get_running_loop().create_future()
+
+    runner._submit(id, attempt)
+    await asyncio.wait_for(runner._wake.wait(), 5)
+
+    assert runner._pool is new_pool
+    assert runner._running == {}
+    db.expire_all()
+    assert crud.job.get(db, job.id).status == "queued"
+    runner._task.cancel()
+
+
+def test_progress_of_running_jobs_drops_the_caches(db):
+    job = purge(db)
+    id, attempt = crud.job.claim(db)
+    runner = JobRunner(workers=1)
+    runner._running[id] = None
+
+    def observed() -> bool:
+        before = data_versions.current([data_versions.ALL])
+        runner._observe()
+        return data_versions.current([data_versions.ALL]) != before
+
+    assert observed()
+    assert not observed()
+    crud.job.progress(db, id, attempt, done=1, total=3)
+    db.commit()
+    assert observed()
+    assert not observed()
+    # Chunks all done, still running: sweeping, every poll drops them.
+    crud.job.progress(db, id, attempt, done=3)
+    db.commit()
+    assert observed()
+    assert observed()
+
+
+def test_import_upload_is_kept_for_the_job(db, client, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "JOB_DATA_DIR", str(tmp_path / "jobs"))
+    body = b"date,payment_method,item\n" * 10000
+
+    response = client.post(f"{settings.API_STR}/jobs/import", content=body)
+
+    assert response.status_code == 202
+    job = crud.job.get(db, response.json()["id"])
+    with open(job.params["path"], "rb") as file:
+        assert file.read() == body
+
+
+def test_job_given_up_on_loses_its_upload(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 1)
+    path = tmp_path / "statement.csv"
+    path.write_text("date\n")
+    job = crud.job.create(db, "import", {"path": str(path)})
+    crud.job.claim(db)
+    make_stale(db, job.id)
+
+    assert JobRunner._claim() is None
+
+    db.expire_all()
+    assert crud.job.get(db, job.id).status == "failed"
+    assert not path.exists()
@@ -0,0 +1,131 @@
+"""
+The read endpoints served from an AsyncSession (``DB_ASYNC``) must answer as
+the synchronous ones do, and the async CRUD methods as their sync versions.
+"""
+from typing import AsyncIterator, Iterator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import crud, schemas
+from app.api.deps import get_async_db
+from app.api.endpoints import transaction_async
+from app.core.config import settings
+from app.crud.unit import crud_unit
+from app.db.cache import invalidate_all
+
+from tests.utils import transactions
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+def async_sessions() -> async_sessionmaker:
+    # NullPool: asyncpg connections belong to the event loop that opened them.
+    engine = create_async_engine(
+        settings.SQLALCHEMY_ASYNC_DATABASE_URI, poolclass=NullPool
+    )
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+async def async_db(async_sessions) -> AsyncIterator[AsyncSession]:
+    async with async_sessions() as db:
+        yield db
+
+
+@pytest.fixture
+def async_client(async_sessions) -> Iterator[TestClient]:
+    """The async read endpoints, mounted as the API router does with DB_ASYNC."""
+
+    async def get_db() -> AsyncIterator[AsyncSession]:
+        async with async_sessions() as db:
+            yield db
+
+    api = FastAPI()
+    api.include_router(transaction_async.read_router, prefix="/transaction")
+    api.dependency_overrides[get_async_db] = get_db
+    app = FastAPI()
+    app.mount(settings.API_STR, api)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(params=[False, True], ids=["models", "fast_json"])
+def fast_json(request, monkeypatch) -> bool:
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", request.param)
+    return request.param
+
+
+def read_all(client: TestClient) -> dict:
+    # The sync and async endpoints share the response cache.
+    invalidate_all()
+    api = f"{settings.API_STR}/transaction"
+    listed = client.get(f"{api}/", params={"limit": 5})
+    assert listed.status_code == 200
+    month = client.post(f"{api}/retrive_month", json={"year": 2023, "month": 4})
+    assert month.status_code == 200
+    return {
+        "list": listed.json(),
+        "next": listed.headers.get("x-next-cursor"),
+        "one": client.get(f"{api}/2").json(),
+        "missing": client.get(f"{api}/999").status_code,
+        "month": month.json(),
+    }
+
+
+def test_async_reads_match_sync_reads(db, client, async_client, fast_json):
+    crud.transaction.create_bulk(db, objs_in=transactions(8))
+
+    sync = read_all(client)
+    assert len(sync["list"]) == 5
+    assert sync["next"] is not None
+    assert len(sync["month"]) == 8
+    assert sync["one"]["id"] == 2
+    assert sync["missing"] == 404
+    assert read_all(async_client) == sync
+
+
+@pytest.mark.anyio
+async def test_async_transaction_crud(db, async_db):
+    month = schemas.TransactionDelete(year=2023, month=4)
+    created = await crud.transaction.acreate(async_db, obj_in=transactions(1)[0])
+    results = await crud.transaction.acreate_bulk(
+        async_db, objs_in=transactions(3, start=1)
+    )
+    assert [result.error for result in results] == [None] * 3
+
+    fetched = await crud.transaction.aget(async_db, id=created.id)
+    assert schemas.Transaction.from_orm(fetched) == schemas.Transaction.from_orm(
+        crud.transaction.get(db, id=created.id)
+    )
+    assert len(fetched.items) == 2
+    listed = await crud.transaction.aget_multi(async_db, limit=2)
+    assert len(listed) == 2
+    in_month = await crud.transaction.aretrive_month(async_db, month)
+    assert sorted(t.id for t in in_month) == sorted(
+        t.id for t in crud.transaction.retrive_month(db, month)
+    )
+    assert len(in_month) == 4
+
+
+@pytest.mark.anyio
+async def test_async_base_crud(async_db):
+    unit = await crud_unit.acreate(
+        async_db, obj_in=schemas.UnitCreate(name="lb", ratio=453.6)
+    )
+    assert (await crud_unit.aget(async_db, unit.id)).name == "lb"
+    assert "lb" in [u.name for u in await crud_unit.aget_multi(async_db)]
+
+    updated = await crud_unit.aupdate(async_db, db_obj=unit, obj_in={"ratio": 450})
+    assert updated.ratio == 450
+
+    await crud_unit.aremove(async_db, id=unit.id)
+    async_db.expunge_all()
+    assert await crud_unit.aget(async_db, unit.id) is None
@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app import crud, schemas
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import engine
+from app.models import Transaction
+from app.models.payments import TransactionItemAssociation, TransactionLine
+
+from tests.utils import transactions
+
+
+@pytest.fixture
+def posted(db, monkeypatch):
+    """Three months of transactions, those paid by card posted to an account."""
+    monkeypatch.setattr(settings, "LEDGER_SNAPSHOT_INTERVAL", 5)
+    account = crud.account.create(
+        db, obj_in=schemas.AccountCreate(name="bank", family_id=1)
+    )
+    crud.account.attach_payment_method(db, account.id, 1)
+    for month in (4, 5, 6):
+        crud.transaction.create_bulk(
+            db, objs_in=transactions(20, month=month, start=20 * month)
+        )
+    return account
+
+
+@pytest.fixture
+def truncated(monkeypatch) -> list:
+    months = []
+    truncate = partitions.truncate
+
+    def spy(db, month):
+        months.append(month)
+        truncate(db, month)
+
+    monkeypatch.setattr(partitions, "truncate", spy)
+    return months
+
+
+def left(db) -> dict:
+    counts = {
+        model.__tablename__: db.scalar(select(func.count()).select_from(model))
+        for model in (Transaction, TransactionLine, TransactionItemAssociation)
+    }
+    orphans = db.scalar(
+        select(func.count())
+        .select_from(TransactionItemAssociation)
+        .where(
+            ~select(Transaction.id)
+            .where(Transaction.id == TransactionItemAssociation.transaction_id)
+            .exists()
+        )
+    )
+    return {**counts, "orphans": orphans}
+
+
+def test_range_delete_truncates_covered_months(db, posted, truncated):
+    deleted = crud.transaction.delete_range(db, date(2023, 4, 15), date(2023, 6, 1))
+
+    assert truncated == [date(2023, 5, 1)]
+    # April's fall on its first 20 days, 6 of them from the 15th.
+    assert len(deleted) == len(set(deleted)) == 6 + 20
+    assert left(db) == {
+        "transaction": 34,
+        "transaction_line": 68,
+        "transaction_item_association": 68,
+        "orphans": 0,
+    }
+    assert crud.account.reconcile(db) == []
+
+
+def test_range_delete_falls_back_to_deleting_rows(
+    db, posted, truncated, monkeypatch
+):
+    monkeypatch.setattr(settings, "PARTITION_LOCK_TIMEOUT_MS", 50)
+    with engine.connect() as reader:
+        # A reader of May keeps its partitions from being locked.
+        reader.execute(text('SELECT count(*) FROM "transaction_p2023_05"'))
+        deleted = crud.transaction.delete_range(
+            db, date(2023, 4, 15), date(2023, 6, 1)
+        )
+        reader.rollback()
+
+    assert truncated == []
+    assert len(deleted) == 26
+    assert left(db)["transaction"] == 34
+    assert left(db)["orphans"] == 0
+    assert crud.account.reconcile(db) == []
+
+
+def test_family_delete_keeps_balances(db, posted):
+    crud.transaction.create_bulk(
+        db,
+        objs_in=[
+            obj_in.copy(update={"family": "kim"})
+            for obj_in in transactions(5, month=5, start=500)
+        ],
+    )
+    deleted = crud.transaction.delete_month(
+        db, schemas.TransactionDelete(year=2023, month=5, family="lee")
+    )
+
+    assert len(deleted) == 20
+    assert left(db)["transaction"] == 45
+    assert crud.account.reconcile(db) == []
@@ -0,0 +1,58 @@
+from typing import List
+
+from pydantic import parse_obj_as
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.crud.unit import crud_unit
+from app.db.session import SessionLocal, engine
+from app.models.payments import TransactionLine
+
+from tests.utils import count_statements, transactions
+
+
+def read_statements(read) -> int:
+    """
+    Statements issued on a fresh session by ``read`` and the serialization of
+    what it returns, where lazy loads would show up.
+    """
+    db = SessionLocal()
+    try:
+        with count_statements(engine) as counter:
+            parse_obj_as(List[schemas.Transaction], read(db))
+        return counter.count
+    finally:
+        db.close()
+
+
+def test_reads_issue_a_fixed_number_of_statements(db):
+    month = schemas.TransactionDelete(year=2023, month=4)
+    reads = {
+        "get": lambda db: [crud.transaction.get(db, id=1)],
+        "get_multi": lambda db: crud.transaction.get_multi(db, limit=1000),
+        "retrive_month": lambda db: crud.transaction.retrive_month(db, month),
+    }
+
+    crud.transaction.create_bulk(db, objs_in=transactions(3))
+    few = {name: read_statements(read) for name, read in reads.items()}
+    crud.transaction.create_bulk(db, objs_in=transactions(60, start=3))
+    many = {name: read_statements(read) for name, read in reads.items()}
+
+    assert len(crud.transaction.retrive_month(db, month)) == 63
+    assert many == few
+
+
+def test_bulk_create_takes_unit_ratios_from_the_cache(db):
+    crud.transaction.create_bulk(db, objs_in=transactions(3))
+    with count_statements(engine) as counter:
+        crud.transaction.create_bulk(db, objs_in=transactions(3, start=3))
+    assert not [s for s in counter.statements if "FROM unit" in s]
+
+    crud_unit.update(db, db_obj=crud_unit.get(db, 1), obj_in={"ratio": 2})
+    [result] = crud.transaction.create_bulk(db, objs_in=transactions(1, start=6))
+    lines = db.execute(
+        select(TransactionLine.quantity, TransactionLine.base_quantity).where(
+            TransactionLine.transaction_id == result.id
+        )
+    ).all()
+    assert lines and all(base == 2 * quantity for quantity, base in lines)
@@ -0,0 +1,42 @@
+from sqlalchemy import select, text
+
+from app.db.upsert import upsert_id, upsert_replacing
+from app.models import Category, PaymentMethod, Price
+
+
+def xmin(db, model, id_) -> str:
+    return db.execute(
+        select(text("xmin")).select_from(model).where(model.id == id_)
+    ).scalar_one()
+
+
+def test_upsert_id_leaves_existing_rows_untouched(db):
+    created = upsert_id(db, Category, {"name": "food"})
+    db.commit()
+    version = xmin(db, Category, created)
+
+    assert upsert_id(db, Category, {"name": "food"}) == created
+    db.commit()
+    assert xmin(db, Category, created) == version
+
+    # NULL key members conflict on the partial index and are matched IS NULL.
+    key = {"name": "gift card", "family_id": None}
+    orphan = upsert_id(db, PaymentMethod, key, {"tax_deduction_rate": 0})
+    assert upsert_id(db, PaymentMethod, key) == orphan
+    family = {"name": "gift card", "family_id": 1}
+    assert upsert_id(db, PaymentMethod, family, {"tax_deduction_rate": 0}) != orphan
+
+
+def test_upsert_replacing_returns_previous_values(db):
+    key = {"date": "2023-04-01", "value": 3.5}
+    items = db.execute(
+        text("INSERT INTO item (name) VALUES ('a'), ('b') RETURNING id")
+    ).scalars().all()
+
+    price_id, previous = upsert_replacing(
+        db, Price, key, {"item_id": items[0]}, update=["item_id"]
+    )
+    assert previous is None
+    assert upsert_replacing(
+        db, Price, key, {"item_id": items[1]}, update=["item_id"]
+    ) == (price_id, items[0])
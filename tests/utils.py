@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import schemas
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[StatementCounter]:
+    """Count the statements ``engine`` sends to the database in the block."""
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+def transactions(
+    n: int, year: int = 2023, month: int = 4, start: int = 0
+) -> List[schemas.TransactionCreate]:
+    """
+    ``n`` transactions of the month, two items each; ``start`` offsets the
+    item names so that every transaction brings items of its own.
+    """
+    return [
+        schemas.TransactionCreate(
+            family="lee",
+            date=f"{year}-{month:02d}-{i % 28 + 1:02d}",
+            payment_method={"name": ["card", "cash"][i % 2]},
+            items=[
+                {
+                    "name": f"item-{start + i}-{j}",
+                    "transaction_target": f"target-{i % 3}",
+                    "category": f"category-{j}",
+                    "unit": "ea",
+                    "price": i + j + 0.5,
+                    "quantity": j + 1,
+                }
+                for j in range(2)
+            ],
+        )
+        for i in range(n)
+    ]